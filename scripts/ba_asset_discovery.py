@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Asset Discovery
+Derives image ID lists from the fetched data files instead of probing ID ranges
+"""
+
+import json
+from typing import Dict, List, Any, Iterable, Optional
+
+STUDENT_SOURCES = [
+    ('data/characters/characters.json', 'id'),
+    ('data/students.json', 'Id'),
+    ('corrected_schaledb_data.json', 'id'),
+]
+EQUIPMENT_FILE = 'data/items/equipment.json'
+ITEMS_FILE = 'data/items/items.json'
+
+# Image names prefer the record's icon name, falling back to its ID
+ICON_FIELDS = ('Icon', 'icon', 'Id', 'id')
+
+def load_records(path) -> List[Dict[str, Any]]:
+    """Load a data file as a list of records (dicts keyed by ID are flattened)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+
+    if isinstance(data, dict):
+        records = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                records.append({'Id': key, **value})
+        return records
+    if isinstance(data, list):
+        return [record for record in data if isinstance(record, dict)]
+    return []
+
+def collect_ids(records: Iterable[Dict[str, Any]], fields=ICON_FIELDS) -> List[Any]:
+    """First non-empty field per record, de-duplicated in order"""
+    seen = set()
+    ids = []
+    for record in records:
+        for field in fields:
+            value = record.get(field)
+            if value not in (None, ''):
+                if value not in seen:
+                    seen.add(value)
+                    ids.append(value)
+                break
+    return ids
+
+def discover_student_ids() -> List[Any]:
+    for path, field in STUDENT_SOURCES:
+        ids = collect_ids(load_records(path), (field,))
+        if ids:
+            return ids
+    return []
+
+def discover_equipment_ids() -> List[Any]:
+    return collect_ids(load_records(EQUIPMENT_FILE))
+
+def discover_item_ids(category: Optional[str] = None) -> List[Any]:
+    """Item icons, optionally limited to one item Category (e.g. ``Currency``)"""
+    records = load_records(ITEMS_FILE)
+    if category:
+        records = [r for r in records if str(r.get('Category', '')).lower() == category.lower()]
+    return collect_ids(records)
+
+def discover_school_ids() -> List[Any]:
+    for path, _ in STUDENT_SOURCES:
+        schools = collect_ids(load_records(path), ('School', 'school', 'school_name'))
+        if schools:
+            return schools
+    return []
@@ -4,12 +4,13 @@ Blue Archive Asset Downloader
 Downloads character images and creates organized directory structure for GitHub CDN
 """
 
-import os
-import json
-import requests
 from pathlib import Path
 import time
-from urllib.parse import urlparse
+from ba_download_engine import AsyncDownloadEngine, DownloadJob, stream_to_file
+from ba_asset_manifest import cdn_manifest_assets
+from ba_http import get_session
+from ba_json_output import write_json
+from ba_image_variants import VariantPipeline, cdn_url_formats
 
 def create_directory_structure():
     """Create organized directory structure for assets"""
@@ -31,22 +32,20 @@ def download_image(url, filepath, retries=3):
     """Download image with retry logic"""
     for attempt in range(retries):
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=30)
+            response = get_session().get(url, timeout=30, stream=True)
             response.raise_for_status()
             
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            stream_to_file(response, filepath)
             
             print(f"✅ Downloaded: {filepath}")
             return True
             
         except Exception as e:
             print(f"❌ Attempt {attempt + 1} failed for {url}: {e}")
-            if attempt < retries - 1:
-                time.sleep(2)
+            # The rate limiter only backs off on 429/503; timeouts and
+            # connection errors wait here (2s, 4s, ...)
+            if attempt + 1 < retries:
+                time.sleep(2 ** (attempt + 1))
     
     return False
 
@@ -56,23 +55,18 @@ def get_schaledb_images():
     
     try:
         # Get character list
-        response = requests.get("https://schaledb.com/data/students.json")
+        response = get_session().get("https://schaledb.com/data/students.json")
         response.raise_for_status()
         characters = response.json()
         
         print(f"📊 Found {len(characters)} characters")
         
-        downloaded = 0
-        failed = 0
-        
+        jobs = []
         for char in characters:
             char_id = char.get('Id')
-            name = char.get('Name', 'Unknown')
             
             if not char_id:
                 continue
-                
-            print(f"🔄 Processing {name} (ID: {char_id})")
             
             # Define image URLs and paths
             image_types = {
@@ -84,18 +78,11 @@ def get_schaledb_images():
             
             for img_type, url in image_types.items():
                 filepath = f"images/characters/{img_type}s/{char_id}.webp"
-                
-                if os.path.exists(filepath):
-                    print(f"⏭️  Skipping existing: {filepath}")
-                    continue
-                
-                if download_image(url, filepath):
-                    downloaded += 1
-                else:
-                    failed += 1
-                
-                # Rate limiting
-                time.sleep(0.5)
+                jobs.append(DownloadJob(url, filepath, label=filepath))
+        
+        stats = AsyncDownloadEngine().run(jobs)
+        downloaded = stats['downloaded']
+        failed = stats['failed'] + stats['missing']
         
         print(f"📈 Download complete: {downloaded} success, {failed} failed")
         
@@ -106,7 +93,6 @@ def create_cdn_manifest():
     """Create manifest file for CDN URLs"""
     manifest = {
         "base_url": "https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main",
-        "version": "1.0.0",
         "last_updated": time.strftime("%Y-%m-%d %H:%M:%S UTC"),
         "directories": {
             "character_icons": "/images/characters/icons/",
@@ -120,14 +106,18 @@ def create_cdn_manifest():
         "url_format": {
             "character_icon": "{base_url}/images/characters/icons/{id}.webp",
             "character_portrait": "{base_url}/images/characters/portraits/{id}.webp",
-            "weapon": "{base_url}/images/weapons/{id}.webp"
+            "weapon": "{base_url}/images/weapons/{id}.webp",
+            **cdn_url_formats()
         }
     }
     
-    with open('cdn_manifest.json', 'w', encoding='utf-8') as f:
-        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    # Content hash per file so clients can cache-bust precisely; version changes with any asset
+    version, assets = cdn_manifest_assets(manifest["base_url"], manifest["directories"])
+    manifest = {**manifest, "version": version, "assets": assets}
     
-    print("✅ Created CDN manifest")
+    write_json(manifest, 'cdn_manifest.json')
+    
+    print(f"✅ Created CDN manifest (version {version}, {len(assets)} assets)")
 
 def main():
     """Main function"""
@@ -140,6 +130,9 @@ def main():
     # Download images
     get_schaledb_images()
     
+    # Resized WebP/AVIF variants
+    VariantPipeline().run()
+    
     # Create CDN manifest
     create_cdn_manifest()
     
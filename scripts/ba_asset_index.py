@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Asset Index
+In-memory index of local images built with one os.scandir pass and persisted between runs
+"""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Set
+
+DEFAULT_IMAGES_DIR = Path('images')
+DEFAULT_INDEX_PATH = Path('.cache') / 'asset_index.json'
+
+_made_dirs: Set[str] = set()
+
+def ensure_dir(directory) -> None:
+    """mkdir -p, at most once per directory per process"""
+    # Absolute, so a relative path is not considered made after a chdir
+    key = os.path.abspath(directory)
+    if key not in _made_dirs:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        _made_dirs.add(key)
+
+def atomic_write_json(path, data: Any, **dump_kwargs) -> None:
+    """json.dump to a temp file next to ``path``, then rename it into place.
+
+    Readers see either the old or the new file, and a failed dump leaves the
+    old file and no temp file behind.
+    """
+    path = Path(path)
+    ensure_dir(path.parent)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+class LocalAssetIndex:
+    """Maps ``category/file`` paths under the images dir to category, id, size and mtime.
+
+    Categories touched since the image manifest was last written are kept in
+    ``pending`` (persisted too), so the manifest can be updated incrementally.
+    """
+
+    def __init__(self, images_dir=DEFAULT_IMAGES_DIR, path=DEFAULT_INDEX_PATH):
+        self.images_dir = Path(images_dir)
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.pending: Set[str] = set()
+        self.dirty = False
+
+    def load(self) -> 'LocalAssetIndex':
+        """Load the persisted index, then reconcile it with one scan of the tree"""
+        previous: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            previous = saved.get('entries', {})
+            self.pending = set(saved.get('pending', []))
+        except (FileNotFoundError, ValueError):
+            # No usable index: every category counts as changed
+            self.pending = {'*'}
+
+        self.entries = self._scan()
+        for rel in previous.keys() - self.entries.keys():
+            self.pending.add(previous[rel]['category'])
+        for rel, entry in self.entries.items():
+            old = previous.get(rel)
+            if not old or old['size'] != entry['size'] or old['mtime'] != entry['mtime']:
+                self.pending.add(entry['category'])
+        self.dirty = True
+        return self
+
+    def _scan(self) -> Dict[str, Dict[str, Any]]:
+        entries = {}
+        stack = [(self.images_dir, '')]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                iterator = os.scandir(directory)
+            except FileNotFoundError:
+                continue
+            with iterator:
+                for entry in iterator:
+                    # Dot entries are internal (blob store, temp files)
+                    if entry.name.startswith('.'):
+                        continue
+                    rel = f"{prefix}{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, rel + '/'))
+                    elif entry.is_file():
+                        entries[rel] = self._entry(rel, entry.stat())
+        return entries
+
+    @staticmethod
+    def _entry(rel: str, st: os.stat_result) -> Dict[str, Any]:
+        category, _, name = rel.rpartition('/')
+        return {
+            'category': category,
+            'id': name.split('.', 1)[0],
+            'size': st.st_size,
+            'mtime': int(st.st_mtime)
+        }
+
+    def relative(self, path) -> Optional[str]:
+        try:
+            return Path(path).relative_to(self.images_dir).as_posix()
+        except ValueError:
+            return None
+
+    def exists(self, path) -> bool:
+        rel = self.relative(path)
+        if rel is None:
+            return Path(path).exists()
+        with self.lock:
+            return rel in self.entries
+
+    def get(self, path) -> Optional[Dict[str, Any]]:
+        rel = self.relative(path)
+        with self.lock:
+            return self.entries.get(rel) if rel else None
+
+    def add(self, path):
+        """Record a file that has just landed"""
+        rel = self.relative(path)
+        if rel is None:
+            return
+        entry = self._entry(rel, os.stat(path))
+        with self.lock:
+            self.entries[rel] = entry
+            self.pending.add(entry['category'])
+            self.dirty = True
+
+    def remove(self, path):
+        rel = self.relative(path)
+        with self.lock:
+            entry = self.entries.pop(rel, None) if rel else None
+            if entry:
+                self.pending.add(entry['category'])
+                self.dirty = True
+
+    def category_counts(self, suffix: str = '.webp', categories=None) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self.lock:
+            for rel, entry in self.entries.items():
+                category = entry['category']
+                if not rel.endswith(suffix) or not category:
+                    continue
+                if categories is not None and category not in categories:
+                    continue
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+
+    def take_pending(self) -> Set[str]:
+        """Return and clear the categories changed since the last manifest update"""
+        with self.lock:
+            pending, self.pending = self.pending, set()
+            self.dirty = True
+        return pending
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            atomic_write_json(self.path, {'entries': self.entries, 'pending': sorted(self.pending)},
+                              sort_keys=True)
+            self.dirty = False
+
+_shared_index: Optional[LocalAssetIndex] = None
+_shared_lock = threading.Lock()
+
+def get_shared_index() -> LocalAssetIndex:
+    """Process-wide index, scanned on first use"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = LocalAssetIndex().load()
+        return _shared_index
@@ -4,20 +4,19 @@ Blue Archive Asset Manager
 Downloads and manages game assets
 """
 
-import os
-import json
-import requests
 from pathlib import Path
-import time
-from typing import Dict, List, Any
+from ba_http import get_session
+from ba_asset_manifest import cdn_manifest_assets
+from ba_download_engine import AsyncDownloadEngine, DownloadJob
+from ba_image_variants import VariantPipeline, cdn_url_formats
+from ba_json_output import write_json
+from ba_snapshot import load_dataset
 
 class BlueArchiveAssetManager:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.session = get_session()
         self.images_dir = Path('images')
+        self.engine = AsyncDownloadEngine(self.session)
         
     def download_character_images(self):
         """Download character images from SchaleDB"""
@@ -25,48 +24,25 @@ class BlueArchiveAssetManager:
         
         try:
             # Load character data
-            with open('data/characters/characters.json', 'r', encoding='utf-8') as f:
-                characters = json.load(f)
+            characters = load_dataset('data/characters/characters.json')
             
             image_types = ['icons', 'portraits', 'collection']
-            downloaded = 0
+            jobs = []
             
             for character in characters:
                 char_id = character['id']
-                name = character['name']
-                
-                print(f"🔄 Processing {name} (ID: {char_id})")
                 
                 for img_type in image_types:
-                    # Create directory
-                    img_dir = self.images_dir / 'characters' / img_type
-                    img_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    # Download image
-                    img_file = img_dir / f"{char_id}.webp"
-                    
-                    if img_file.exists():
-                        continue
+                    img_file = self.images_dir / 'characters' / img_type / f"{char_id}.webp"
                     
                     # Try multiple sources
                     urls = [
                         f"https://schaledb.com/images/student/{img_type[:-1]}/{char_id}.webp",
                         f"https://raw.githubusercontent.com/lonqie/SchaleDB/main/images/student/{img_type[:-1]}/{char_id}.webp"
                     ]
-                    
-                    for url in urls:
-                        try:
-                            response = self.session.get(url, timeout=30)
-                            if response.status_code == 200:
-                                with open(img_file, 'wb') as f:
-                                    f.write(response.content)
-                                print(f"✅ Downloaded {img_type}: {char_id}")
-                                downloaded += 1
-                                break
-                        except:
-                            continue
-                    
-                    time.sleep(0.2)  # Rate limiting
+                    jobs.append(DownloadJob(urls, img_file, label=f"{img_type}: {char_id}"))
+            
+            downloaded = self.engine.run(jobs)['downloaded']
             
             print(f"📈 Downloaded {downloaded} images")
             
@@ -77,7 +53,6 @@ class BlueArchiveAssetManager:
         """Create CDN manifest for asset URLs"""
         manifest = {
             "base_url": "https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main",
-            "version": "1.0.0",
             "directories": {
                 "character_icons": "/images/characters/icons/",
                 "character_portraits": "/images/characters/portraits/",
@@ -88,14 +63,18 @@ class BlueArchiveAssetManager:
             "url_format": {
                 "character_icon": "{base_url}/images/characters/icons/{id}.webp",
                 "character_portrait": "{base_url}/images/characters/portraits/{id}.webp",
-                "weapon": "{base_url}/images/weapons/{id}.webp"
+                "weapon": "{base_url}/images/weapons/{id}.webp",
+                **cdn_url_formats()
             }
         }
         
-        with open('cdn_manifest.json', 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        # Content hash per file so clients can cache-bust precisely; version changes with any asset
+        version, assets = cdn_manifest_assets(manifest["base_url"], manifest["directories"])
+        manifest = {**manifest, "version": version, "assets": assets}
+        
+        write_json(manifest, 'cdn_manifest.json')
         
-        print("✅ Created CDN manifest")
+        print(f"✅ Created CDN manifest (version {version}, {len(assets)} assets)")
     
     def run(self):
         """Run the complete asset management process"""
@@ -103,6 +82,7 @@ class BlueArchiveAssetManager:
         print("=" * 40)
         
         self.download_character_images()
+        VariantPipeline().run()
         self.create_cdn_manifest()
         
         print("\n🎉 Asset management complete!")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Asset Manifest
+Per-file hash, size, dimensions and versioned URL for every published image
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from ba_asset_index import LocalAssetIndex, atomic_write_json, get_shared_index
+from ba_http_cache import sha256_file
+
+DEFAULT_METADATA_PATH = Path('.cache') / 'asset_metadata.json'
+# Hex digits of the content hash used in versioned URLs
+URL_HASH_LENGTH = 12
+
+def versioned_url(base_url: str, rel: str, sha256: str) -> str:
+    """CDN URL that changes whenever the file's content does"""
+    return f"{base_url}/images/{rel}?v={sha256[:URL_HASH_LENGTH]}"
+
+def image_dimensions(path) -> Tuple[Optional[int], Optional[int]]:
+    """(width, height) from the image header, or (None, None) without Pillow"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, None
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+def _describe(path: str) -> Dict[str, Any]:
+    """Worker: hash one file and read its dimensions (both release the GIL on I/O)"""
+    width, height = image_dimensions(path)
+    return {'sha256': sha256_file(path), 'width': width, 'height': height}
+
+def content_version(assets: Dict[str, Dict[str, Any]]) -> str:
+    """Short hash over every (path, hash) pair; changes when any asset changes"""
+    digest = hashlib.sha256()
+    for rel in sorted(assets):
+        digest.update(f"{rel}\0{assets[rel]['sha256']}\n".encode('utf-8'))
+    return digest.hexdigest()[:URL_HASH_LENGTH]
+
+class AssetManifestBuilder:
+    """Describes indexed images, reusing cached results for files whose size/mtime are unchanged"""
+
+    def __init__(self, images_dir='images', index: Optional[LocalAssetIndex] = None,
+                 path=DEFAULT_METADATA_PATH, workers: Optional[int] = None):
+        self.images_dir = Path(images_dir)
+        self.index = index or get_shared_index()
+        self.path = Path(path)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.cache: Dict[str, Dict[str, Any]] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.cache = {}
+
+    def describe(self, relpaths: Optional[Iterable[str]] = None,
+                 categories: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """{rel: {sha256, size, width, height}} for the selected indexed files"""
+        with self.index.lock:
+            entries = dict(self.index.entries)
+        if relpaths is not None:
+            wanted = set(relpaths)
+            entries = {rel: entry for rel, entry in entries.items() if rel in wanted}
+        if categories is not None:
+            categories = set(categories)
+            entries = {rel: entry for rel, entry in entries.items() if entry['category'] in categories}
+
+        stale = [
+            rel for rel, entry in entries.items()
+            if (rel not in self.cache
+                or self.cache[rel]['size'] != entry['size']
+                or self.cache[rel]['mtime'] != entry['mtime'])
+        ]
+        if stale:
+            print(f"🔄 Hashing {len(stale)} changed images...")
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                paths = [str(self.images_dir / rel) for rel in stale]
+                for rel, info in zip(stale, executor.map(_describe, paths)):
+                    entry = entries[rel]
+                    self.cache[rel] = {'size': entry['size'], 'mtime': entry['mtime'], **info}
+            self.dirty = True
+
+        return {
+            rel: {key: self.cache[rel][key] for key in ('sha256', 'size', 'width', 'height')}
+            for rel in sorted(entries)
+        }
+
+    def manifest_assets(self, base_url: str, **selection) -> Dict[str, Dict[str, Any]]:
+        """Per-file manifest entries including the versioned URL"""
+        return with_urls(base_url, self.describe(**selection))
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Drop files that are no longer indexed
+        with self.index.lock:
+            self.cache = {rel: info for rel, info in self.cache.items() if rel in self.index.entries}
+        atomic_write_json(self.path, self.cache, sort_keys=True)
+        self.dirty = False
+
+def with_urls(base_url: str, assets: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {rel: {**info, 'url': versioned_url(base_url, rel, info['sha256'])} for rel, info in assets.items()}
+
+def cdn_manifest_assets(base_url: str, directories: Dict[str, str],
+                        builder: Optional[AssetManifestBuilder] = None) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+    """(content version, assets) for the CDN manifest's ``directories`` and their variants"""
+    builder = builder or AssetManifestBuilder()
+    roots = {path.strip('/').split('/', 1)[-1] for path in directories.values()}
+    with builder.index.lock:
+        known = {entry['category'] for entry in builder.index.entries.values()}
+    categories = {
+        category for category in known
+        if category in roots or any(category.startswith(f"variants/{root}/") for root in roots)
+    }
+    assets = builder.manifest_assets(base_url, categories=categories)
+    builder.save()
+    return content_version(assets), assets
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Asset Store
+Content-addressed blob store; published image layouts are links into it
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from ba_asset_index import atomic_write_json, ensure_dir
+from ba_http_cache import sha256_file
+
+DEFAULT_STORE_ROOT = Path('images') / '.objects'
+LINK_MODES = ('hardlink', 'symlink', 'copy')
+
+class AssetStore:
+    """Stores each unique file once under ``root/<sha[:2]>/<sha>``.
+
+    An index maps asset keys (the upstream path such as
+    ``student/icon/10000.webp``) to the hash last seen for them, so layouts
+    that publish the same upstream image can share one download.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_ROOT, link_mode: str = 'hardlink',
+                 fresh_for: float = 6 * 3600, index_path=None):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"link_mode must be one of {LINK_MODES}")
+        self.root = Path(root)
+        self.link_mode = link_mode
+        self.fresh_for = fresh_for
+        self.index_path = Path(index_path) if index_path else self.root / 'index.json'
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.index: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256
+
+    def has(self, sha256: Optional[str]) -> bool:
+        return bool(sha256) and self.object_path(sha256).exists()
+
+    def lookup(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.index.get(key)
+        return entry['sha256'] if entry else None
+
+    def is_fresh(self, key: str) -> bool:
+        """True when the key was verified against upstream recently and its object is present"""
+        with self.lock:
+            entry = self.index.get(key)
+        if not entry or time.time() - entry.get('verified', 0) > self.fresh_for:
+            return False
+        return self.has(entry['sha256'])
+
+    def record(self, key: str, sha256: str):
+        with self.lock:
+            self.index[key] = {'sha256': sha256, 'verified': time.time()}
+            self.dirty = True
+
+    def ingest(self, tmp_path, sha256: str) -> Path:
+        """Move a fully written temp file into the store (or drop it if already stored)"""
+        target = self.object_path(sha256)
+        if target.exists():
+            os.unlink(tmp_path)
+        else:
+            ensure_dir(target.parent)
+            os.replace(tmp_path, target)
+        return target
+
+    def adopt(self, path) -> str:
+        """Bring an existing published file into the store without rewriting it"""
+        path = Path(path)
+        sha256 = sha256_file(path)
+        target = self.object_path(sha256)
+        if not target.exists():
+            ensure_dir(target.parent)
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copy2(path, target)
+        return sha256
+
+    def is_published(self, sha256: Optional[str], dest) -> bool:
+        """True when ``dest`` already is (a link to) the stored object"""
+        if not self.has(sha256) or not os.path.lexists(dest):
+            return False
+        source = self.object_path(sha256)
+        if os.path.islink(dest):
+            return os.path.realpath(dest) == os.path.realpath(source)
+        if self.link_mode == 'copy':
+            return sha256_file(dest) == sha256
+        return os.path.samefile(source, dest)
+
+    def link(self, sha256: str, dest) -> bool:
+        """Publish an object at ``dest``; returns False when it is already there"""
+        dest = Path(dest)
+        source = self.object_path(sha256)
+        if self.is_published(sha256, dest):
+            return False
+
+        ensure_dir(dest.parent)
+        fd, tmp_name = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix='.link')
+        os.close(fd)
+        os.unlink(tmp_name)
+        try:
+            if self.link_mode == 'symlink':
+                os.symlink(os.path.relpath(source, dest.parent), tmp_name)
+            elif self.link_mode == 'hardlink':
+                try:
+                    os.link(source, tmp_name)
+                except OSError:
+                    # Cross-device or no hardlink support
+                    shutil.copy2(source, tmp_name)
+            else:
+                shutil.copy2(source, tmp_name)
+            os.replace(tmp_name, dest)
+        except BaseException:
+            if os.path.lexists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            atomic_write_json(self.index_path, self.index, sort_keys=True)
+            self.dirty = False
+
+_shared_store: Optional[AssetStore] = None
+_shared_lock = threading.Lock()
+
+def get_shared_store() -> AssetStore:
+    """Process-wide object store, loaded on first use"""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = AssetStore()
+        return _shared_store
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Columnar Stage
+Loads mapped characters into a DataFrame for vectorized typing, normalization and statistics
+"""
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from ba_json_output import write_json
+from ba_snapshot import load_dataset, write_snapshot
+
+# Enum columns and the upstream spellings folded into one vocabulary
+ENUM_ALIASES: Dict[str, Dict[str, str]] = {
+    'bullet_type': {'Explosion': 'Explosive', 'Pierce': 'Piercing'},
+    'armor_type': {'LightArmor': 'Light', 'HeavyArmor': 'Heavy', 'Unarmed': 'Special', 'ElasticArmor': 'Elastic'},
+    'squad_type': {'Main': 'Striker', 'Support': 'Special'},
+    'position': {},
+    'school': {},
+    'club': {},
+    'weapon_type': {},
+    'type': {'DamageDealer': 'Dealer'},
+    'range': {},
+}
+INTEGER_COLUMNS = ('id', 'character_id', 'rarity')
+# Columns counted in character_statistics.json
+STATISTICS_COLUMNS = ('school', 'rarity')
+UNKNOWN = 'Unknown'
+# data/characters.json -> data/characters_normalized.json (+ .parquet)
+NORMALIZED_SUFFIX = '_normalized'
+
+def characters_frame(records: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """DataFrame of mapped records with nullable integers, trimmed strings and categorical enums"""
+    frame = pd.DataFrame.from_records(list(records))
+    for column in INTEGER_COLUMNS:
+        if column in frame:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('Int64')
+    for column, aliases in ENUM_ALIASES.items():
+        if column not in frame:
+            continue
+        values = frame[column]
+        try:
+            stripped = values.str.strip()
+            values = stripped.where(stripped.notna(), values)
+        except AttributeError:
+            pass  # no string values at all
+        if aliases:
+            values = values.replace(aliases)
+        frame[column] = values.astype('category')
+    return frame
+
+def frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Plain JSON-ready records (missing values become None)"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def export_frame(frame: pd.DataFrame, json_path, columnar_path=None) -> Optional[Path]:
+    """Write the frame as indented JSON and, when pyarrow is available, as Parquet"""
+    write_json(frame_records(frame), json_path)
+    if columnar_path is None:
+        return None
+    try:
+        frame.to_parquet(columnar_path, index=False)
+    except ImportError:
+        print(f"⚠️  pyarrow is not installed, skipping {columnar_path}")
+        return None
+    return Path(columnar_path)
+
+def _key(value: Any, missing: Any) -> Any:
+    if value is None or (isinstance(value, float) and value != value):
+        return missing
+    return value.item() if hasattr(value, 'item') else value
+
+def value_counts(frame: pd.DataFrame, column: str, missing: Any = UNKNOWN,
+                 as_str: bool = False) -> Dict[Any, int]:
+    """Counts per value in first-seen order; missing values are counted under ``missing``"""
+    if column not in frame or frame.empty:
+        return {missing: len(frame)} if len(frame) else {}
+    series = frame[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    counts = series.value_counts(dropna=False, sort=False)
+    result: Dict[Any, int] = {}
+    for value, count in counts.items():
+        key = _key(value, missing)
+        key = str(key) if as_str and key is not None else key
+        result[key] = result.get(key, 0) + int(count)
+    return result
+
+def statistics_frame(records: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """Raw values of the counted columns, keyed the way the per-record counting did.
+
+    An absent key counts as ``Unknown`` while an explicit null stays null; blank
+    strings and mixed value types (``3`` vs ``'3'``) keep their own keys.
+    """
+    frame = pd.DataFrame(list(records), columns=list(STATISTICS_COLUMNS), dtype=object)
+    # Absent keys are NaN, explicit nulls are None
+    absent = frame.isna() & frame.map(lambda value: value is not None)
+    return frame.mask(absent, UNKNOWN)
+
+def character_statistics(frame: pd.DataFrame, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """data/character_statistics.json from a ``statistics_frame`` (nulls are keyed as null, as before).
+
+    Keys not computed here (e.g. ``game_version``) are kept from ``previous``.
+    """
+    stats = dict(previous or {})
+    stats.update({
+        'total_characters': len(frame),
+        'by_school': value_counts(frame, 'school', missing=None),
+        'by_rarity': value_counts(frame, 'rarity', missing=None),
+        'last_updated': datetime.now().isoformat()
+    })
+    return stats
+
+def normalized_paths(characters_path) -> Tuple[Path, Path]:
+    """JSON and Parquet outputs of the normalized characters, next to the source file"""
+    characters_path = Path(characters_path)
+    stem = characters_path.with_name(characters_path.stem + NORMALIZED_SUFFIX)
+    return stem.with_suffix('.json'), stem.with_suffix('.parquet')
+
+def read_statistics(path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _read_records(path) -> List[Dict[str, Any]]:
+    try:
+        data = load_dataset(path)
+    except (FileNotFoundError, ValueError):
+        return []
+    return list(data.values()) if isinstance(data, dict) else data
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize character data and rebuild statistics")
+    parser.add_argument('--characters', default='data/characters.json',
+                        help="mapped characters to normalize, export and count")
+    args = parser.parse_args(argv)
+
+    characters_path = Path(args.characters)
+    records = _read_records(characters_path)
+    if not records:
+        return
+    frame = characters_frame(records)
+    # The source file keeps its own formatting; the normalized copy sits next to it
+    json_path, parquet_path = normalized_paths(characters_path)
+    export_frame(frame, json_path, parquet_path)
+    stats_path = characters_path.parent / 'character_statistics.json'
+    stats = character_statistics(statistics_frame(records), read_statistics(stats_path))
+    write_json(stats, stats_path)
+    write_snapshot(json_path)
+    write_snapshot(stats_path)
+    print(f"✅ Normalized {len(frame)} characters into {json_path}")
+
+if __name__ == "__main__":
+    main()
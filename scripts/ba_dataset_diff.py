@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Dataset Diff
+Structural diff of record datasets keyed by id: a JSON Patch change set per record and a changelog per game version
+"""
+
+import argparse
+import copy
+import json
+import os
+import shutil
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from ba_asset_index import ensure_dir
+from ba_json_output import write_json
+from ba_snapshot import load_dataset
+
+PATCH_FORMAT = 'ba-patch'
+PATCH_SCHEMA_VERSION = 1
+CHANGES_DIR = Path('data') / 'changes'
+BASELINE_DIR = Path('.cache') / 'dataset_baseline'
+VERSION_FILE = 'version.txt'
+
+# Dataset -> (id field, display name field)
+DATASETS = {
+    'data/characters.json': ('id', 'name'),
+    'data/characters/characters.json': ('id', 'name'),
+    'data/students.json': ('Id', 'Name'),
+    'corrected_schaledb_data.json': ('id', 'name'),
+}
+# Changed fields listed per modified record in the changelog
+CHANGELOG_FIELDS = 6
+
+def _pointer(path: str, key: Any) -> str:
+    """JSON Pointer (RFC 6901) of ``key`` below ``path``"""
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+def diff_values(old: Any, new: Any, path: str = '') -> List[Dict[str, Any]]:
+    """JSON Patch (RFC 6902) operations turning ``old`` into ``new``.
+
+    Objects are compared key by key and lists position by position; equal
+    subtrees are skipped with one C-level ``==`` before recursing.
+    """
+    if old == new and type(old) is type(new):
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in old.items():
+            if key not in new:
+                ops.append({'op': 'remove', 'path': _pointer(path, key)})
+            else:
+                ops.extend(diff_values(value, new[key], _pointer(path, key)))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': _pointer(path, key), 'value': value})
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for i in range(common):
+            ops.extend(diff_values(old[i], new[i], _pointer(path, i)))
+        # Removed from the end first so earlier indexes stay valid
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({'op': 'remove', 'path': _pointer(path, i)})
+        for i in range(common, len(new)):
+            ops.append({'op': 'add', 'path': _pointer(path, '-'), 'value': new[i]})
+        return ops
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if not pointer:
+        return []
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer.split('/')[1:]]
+
+def apply_ops(document: Any, ops: Iterable[Dict[str, Any]]) -> Any:
+    """Apply JSON Patch add/remove/replace operations (returns a new document)"""
+    document = copy.deepcopy(document)
+    for op in ops:
+        parts = _parse_pointer(op['path'])
+        if not parts:
+            document = copy.deepcopy(op['value'])
+            continue
+        parent = document
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+        last = parts[-1]
+        if isinstance(parent, list):
+            if op['op'] == 'add':
+                parent.insert(len(parent) if last == '-' else int(last), copy.deepcopy(op['value']))
+            elif op['op'] == 'remove':
+                del parent[int(last)]
+            else:
+                parent[int(last)] = copy.deepcopy(op['value'])
+        elif op['op'] == 'remove':
+            del parent[last]
+        else:
+            parent[last] = copy.deepcopy(op['value'])
+    return document
+
+class DatasetDiff:
+    """Added, removed and modified records of one dataset, keyed by ``id_field``"""
+
+    def __init__(self, id_field: str = 'id'):
+        self.id_field = id_field
+        self.added: List[Dict[str, Any]] = []
+        self.removed: List[Any] = []
+        # (record id, JSON Patch ops)
+        self.modified: List[Tuple[Any, List[Dict[str, Any]]]] = []
+        # Record ids in new-dataset order
+        self.order: List[Any] = []
+        self.total = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+    def summary(self) -> str:
+        return (f"{len(self.added)} added, {len(self.removed)} removed, "
+                f"{len(self.modified)} modified (of {self.total})")
+
+    def to_patch(self) -> Dict[str, Any]:
+        return {
+            'id_field': self.id_field,
+            'added': self.added,
+            'removed': self.removed,
+            'modified': [{'id': record_id, 'ops': ops} for record_id, ops in self.modified],
+            'order': self.order,
+        }
+
+def index_records(records: Iterable[Any], id_field: str) -> Dict[Any, Dict[str, Any]]:
+    """``{id: record}``; records without an id are ignored"""
+    return {
+        record[id_field]: record
+        for record in records
+        if isinstance(record, dict) and record.get(id_field) is not None
+    }
+
+def diff_datasets(old_records: Iterable[Any], new_records: Iterable[Any], id_field: str = 'id') -> DatasetDiff:
+    """Record-level diff in new-dataset order (removed records in old order)"""
+    old = index_records(old_records, id_field)
+    new = index_records(new_records, id_field)
+    result = DatasetDiff(id_field)
+    result.total = len(new)
+    result.order = list(new)
+    for record_id, record in new.items():
+        previous = old.get(record_id)
+        if previous is None:
+            result.added.append(record)
+        elif previous != record:
+            result.modified.append((record_id, diff_values(previous, record)))
+    result.removed = [record_id for record_id in old if record_id not in new]
+    return result
+
+def apply_patch(records: Iterable[Any], patch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Apply one dataset's patch to the old records.
+
+    Records are put back in the new dataset's order; patches without an
+    ``order`` append added records instead.
+    """
+    id_field = patch['id_field']
+    removed = set(patch['removed'])
+    ops = {entry['id']: entry['ops'] for entry in patch['modified']}
+    result = []
+    for record in records:
+        record_id = record.get(id_field) if isinstance(record, dict) else None
+        if record_id in removed:
+            continue
+        result.append(apply_ops(record, ops[record_id]) if record_id in ops else record)
+    result.extend(patch['added'])
+    if 'order' in patch:
+        position = {record_id: i for i, record_id in enumerate(patch['order'])}
+        # Stable, so records without an id keep their place at the end
+        result.sort(key=lambda record: position.get(
+            record.get(id_field) if isinstance(record, dict) else None, len(position)))
+    return result
+
+def changed_ids(patch: Dict[str, Any]) -> List[Any]:
+    """Ids a sync has to upsert for one dataset's patch"""
+    return [record[patch['id_field']] for record in patch['added']] + [entry['id'] for entry in patch['modified']]
+
+def _load(path) -> List[Any]:
+    data = load_dataset(path)
+    return list(data.values()) if isinstance(data, dict) else data
+
+def load_git_version(path: str, rev: str = 'HEAD') -> List[Any]:
+    """Records of ``path`` as committed at ``rev`` (empty when it did not exist)"""
+    result = subprocess.run(['git', 'show', f"{rev}:{path}"], capture_output=True)
+    if result.returncode != 0:
+        return []
+    data = json.loads(result.stdout)
+    return list(data.values()) if isinstance(data, dict) else data
+
+def _short(value: Any, limit: int = 40) -> str:
+    text = json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+def changelog_section(path: str, diff: DatasetDiff, name_field: Optional[str] = None) -> List[str]:
+    """Markdown lines describing one dataset's changes"""
+    def label(record_id, record=None):
+        name = record.get(name_field) if record and name_field else None
+        return f"{record_id} {name}" if name else str(record_id)
+
+    lines = [f"## {path}", '', diff.summary(), '']
+    if diff.added:
+        lines += ['### Added', ''] + [f"- {label(r.get(diff.id_field), r)}" for r in diff.added] + ['']
+    if diff.removed:
+        lines += ['### Removed', ''] + [f"- {record_id}" for record_id in diff.removed] + ['']
+    if diff.modified:
+        lines += ['### Modified', '']
+        for record_id, ops in diff.modified:
+            changes = [
+                f"`{op['path'][1:]}` {op['op']}" + (f" → {_short(op['value'])}" if 'value' in op else '')
+                for op in ops[:CHANGELOG_FIELDS]
+            ]
+            if len(ops) > CHANGELOG_FIELDS:
+                changes.append(f"{len(ops) - CHANGELOG_FIELDS} more")
+            lines.append(f"- {record_id}: {'; '.join(changes)}")
+        lines.append('')
+    return lines
+
+def read_game_version() -> str:
+    try:
+        with open(VERSION_FILE, 'r', encoding='utf-8') as f:
+            return f.read().strip() or 'unversioned'
+    except FileNotFoundError:
+        return 'unversioned'
+
+def _baseline_path(path: str, which: str) -> Path:
+    return BASELINE_DIR / which / path.replace('/', '__')
+
+def _rotate_baseline(version: str):
+    """Start a new game version: the last state seen becomes the previous version"""
+    marker = BASELINE_DIR / 'version.txt'
+    if marker.exists() and marker.read_text(encoding='utf-8').strip() == version:
+        return
+    if (BASELINE_DIR / 'current').exists():
+        shutil.rmtree(BASELINE_DIR / 'previous', ignore_errors=True)
+        os.replace(BASELINE_DIR / 'current', BASELINE_DIR / 'previous')
+    ensure_dir(BASELINE_DIR)
+    marker.write_text(version, encoding='utf-8')
+
+def write_changes(datasets: Optional[Dict[str, Tuple[str, str]]] = None, rev: Optional[str] = None,
+                  update_baseline: bool = True) -> Optional[Path]:
+    """Diff each dataset against the previous game version and write the patch set and changelog.
+
+    The previous version is the last state seen by a run under an older
+    ``version.txt`` (or the file at git ``rev``), so every run within one game
+    version rewrites that version's changelog cumulatively. Returns the patch
+    set path, or None when nothing changed.
+    """
+    datasets = datasets or DATASETS
+    version = read_game_version()
+    if rev is None:
+        _rotate_baseline(version)
+    diffs: Dict[str, DatasetDiff] = {}
+    for path, (id_field, _) in datasets.items():
+        if not os.path.exists(path):
+            continue
+        if rev is not None:
+            old = load_git_version(path, rev)
+        else:
+            baseline = _baseline_path(path, 'previous')
+            if not baseline.exists():
+                print(f"📌 {path}: no previous version recorded yet")
+                continue
+            old = _load(baseline)
+        diffs[path] = diff_datasets(old, _load(path), id_field)
+        print(f"🔍 {path}: {diffs[path].summary()}")
+
+    changed = {path: diff for path, diff in diffs.items() if diff.changed}
+    patch_path = CHANGES_DIR / f"{version}.patch.json"
+    changelog_path = CHANGES_DIR / f"{version}.md"
+    if changed:
+        write_json({
+            'format': PATCH_FORMAT,
+            'schema_version': PATCH_SCHEMA_VERSION,
+            'game_version': version,
+            'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'datasets': {path: diff.to_patch() for path, diff in changed.items()},
+        }, patch_path, variants=False)
+        lines = [f"# Data changes in {version}", '']
+        for path, diff in changed.items():
+            lines += changelog_section(path, diff, datasets[path][1])
+        with open(changelog_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+        print(f"📝 Wrote {patch_path} and {changelog_path}")
+    else:
+        patch_path = None
+        print("✅ No record changes")
+
+    if update_baseline and rev is None:
+        for path in datasets:
+            if os.path.exists(path):
+                baseline = _baseline_path(path, 'current')
+                ensure_dir(baseline.parent)
+                shutil.copyfile(path, baseline)
+    return patch_path
+
+def load_patch(path) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        patch = json.load(f)
+    if patch.get('format') != PATCH_FORMAT or patch.get('schema_version') != PATCH_SCHEMA_VERSION:
+        raise ValueError(f"{path} is not a version {PATCH_SCHEMA_VERSION} patch set")
+    return patch
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff datasets by record id and write a patch set and changelog")
+    parser.add_argument('files', nargs='*', metavar='OLD NEW',
+                        help="compare two files and print the changelog instead")
+    parser.add_argument('--id', default='id', help="id field when comparing two files")
+    parser.add_argument('--rev', default=None,
+                        help="diff against the datasets committed at this git revision instead of the previous version")
+    parser.add_argument('--no-baseline', action='store_true', help="do not record this run's datasets as the current version")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        if len(args.files) != 2:
+            parser.error("expected OLD and NEW files")
+        old_path, new_path = args.files
+        diff = diff_datasets(_load(old_path), _load(new_path), args.id)
+        print('\n'.join(changelog_section(new_path, diff, 'name')))
+        return
+
+    write_changes(rev=args.rev, update_baseline=not args.no_baseline)
+
+if __name__ == "__main__":
+    main()
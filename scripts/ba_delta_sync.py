@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Delta Sync
+Plans image downloads from one upstream git tree listing instead of probing every URL
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Iterable, Optional
+
+import requests
+
+from ba_asset_index import atomic_write_json
+
+SCHALEDB_TREE_URL = 'https://api.github.com/repos/SchaleDB/SchaleDB/git/trees/main?recursive=1'
+# Prefix of image blobs in the upstream tree; the rest of the path is the asset key
+TREE_IMAGES_PREFIX = 'images/'
+DEFAULT_STATE_PATH = Path('.cache') / 'delta_state.json'
+
+def git_blob_sha1(path) -> str:
+    """Object id git assigns to a file's content, comparable with tree listing SHAs"""
+    digest = hashlib.sha1(f"blob {os.path.getsize(path)}\0".encode('ascii'))
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def parse_tree(tree: dict, prefix: str = TREE_IMAGES_PREFIX) -> Dict[str, str]:
+    """{asset key: blob sha} from a GitHub git/trees response"""
+    return {
+        item['path'][len(prefix):]: item['sha']
+        for item in tree.get('tree', [])
+        if item.get('type') == 'blob' and item['path'].startswith(prefix)
+    }
+
+def fetch_listing(session: requests.Session, url: str = SCHALEDB_TREE_URL) -> Optional[Dict[str, str]]:
+    """One request for the whole upstream inventory; None when it is unavailable or truncated"""
+    headers = {'Accept': 'application/vnd.github+json'}
+    token = os.environ.get('GITHUB_TOKEN')
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    try:
+        response = session.get(url, headers=headers, timeout=60)
+        response.raise_for_status()
+        tree = response.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"⚠️  Could not fetch remote listing: {e}")
+        return None
+    if tree.get('truncated'):
+        print("⚠️  Remote listing is truncated, falling back to a full plan")
+        return None
+    return parse_tree(tree)
+
+def load_listing(path) -> Dict[str, str]:
+    """Listing from a saved git/trees response (or a plain {key: sha} map), e.g. a test fixture"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return parse_tree(data) if 'tree' in data else data
+
+class DeltaPlan:
+    def __init__(self):
+        self.queued: List = []      # new or changed upstream, or missing locally
+        self.unchanged: List = []   # local copy matches the listed blob
+        self.absent: List = []      # not in the upstream listing at all
+        self.deleted: List[str] = []  # keys synced before that upstream no longer has
+
+    def summary(self) -> str:
+        return (f"{len(self.queued)} to fetch, {len(self.unchanged)} unchanged, "
+                f"{len(self.absent)} not upstream, {len(self.deleted)} deleted upstream")
+
+class DeltaPlanner:
+    """Diffs planned jobs against a remote listing and remembers which blob each key was synced at"""
+
+    def __init__(self, listing: Dict[str, str], path=DEFAULT_STATE_PATH, workers: int = 8):
+        self.listing = listing
+        self.path = Path(path)
+        self.workers = workers
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.synced: Dict[str, str] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.synced = {}
+
+    def _local_shas(self, jobs: Iterable) -> Dict[str, Optional[str]]:
+        """Blob SHAs of existing destinations, so a first run adopts files already on disk"""
+        jobs = [job for job in jobs if job.dest.exists()]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            shas = executor.map(lambda job: git_blob_sha1(job.dest), jobs)
+            return {str(job.dest): sha for job, sha in zip(jobs, shas)}
+
+    def plan(self, jobs: Iterable) -> DeltaPlan:
+        jobs = list(jobs)
+        plan = DeltaPlan()
+        unverified = []
+        for job in jobs:
+            remote = self.listing.get(job.key)
+            if remote is None:
+                plan.absent.append(job)
+            elif self.synced.get(job.key) == remote and job.dest.exists():
+                plan.unchanged.append(job)
+            else:
+                unverified.append(job)
+
+        local = self._local_shas(unverified)
+        for job in unverified:
+            if local.get(str(job.dest)) == self.listing[job.key]:
+                self.synced[job.key] = self.listing[job.key]
+                plan.unchanged.append(job)
+            else:
+                plan.queued.append(job)
+
+        plan.deleted = sorted(key for key in self.synced if key not in self.listing)
+        return plan
+
+    def commit(self, jobs: Iterable):
+        """Record keys whose downloaded file now matches the listing"""
+        jobs = [job for job in jobs if job.key in self.listing]
+        local = self._local_shas(jobs)
+        for job in jobs:
+            if local.get(str(job.dest)) == self.listing[job.key]:
+                self.synced[job.key] = self.listing[job.key]
+
+    def forget(self, keys: Iterable[str]):
+        for key in keys:
+            self.synced.pop(key, None)
+
+    def save(self):
+        atomic_write_json(self.path, self.synced, sort_keys=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show which images differ from the upstream listing")
+    parser.add_argument('--listing', help="saved git/trees JSON to diff against instead of fetching")
+    args = parser.parse_args()
+
+    from ba_http import get_session
+    from ba_image_downloader import BlueArchiveImageDownloader
+
+    listing = load_listing(args.listing) if args.listing else fetch_listing(get_session())
+    if listing is None:
+        return
+    downloader = BlueArchiveImageDownloader()
+    plan = DeltaPlanner(listing).plan(downloader.plan_all_jobs())
+    downloader.journal.close()
+    print(f"📋 {plan.summary()}")
+    for key in plan.deleted:
+        print(f"🗑️  Deleted upstream: {key}")
+    for job in plan.queued:
+        print(f"⬇️  {job.key}")
+
+if __name__ == "__main__":
+    main()
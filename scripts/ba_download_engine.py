@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Download Engine
+Concurrent download engine: asyncio schedules jobs with per-host limits onto a thread pool of blocking downloads
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from ba_asset_index import LocalAssetIndex, ensure_dir, get_shared_index
+from ba_asset_store import AssetStore, get_shared_store
+from ba_http import get_session
+from ba_http_cache import (
+    MISSING_STATUSES, NegativeCache, ValidatorCache,
+    sha256_file, get_shared_cache, get_shared_negative_cache
+)
+from ba_job_journal import IN_FLIGHT, OUTCOME_STATES, JobJournal
+from ba_mirrors import MirrorSelector, get_shared_selector, timed_get
+from ba_rate_limiter import THROTTLE_STATUSES, parse_retry_after
+
+DEFAULT_WORKERS = 16
+DEFAULT_PER_HOST = 6
+CHUNK_SIZE = 64 * 1024
+# Backoff between 429/503 retries when the response has no Retry-After
+RETRY_BACKOFF = 1.0
+MAX_RETRY_DELAY = 60.0
+
+class IncompleteDownloadError(IOError):
+    pass
+
+def throttle_delay(response: requests.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a throttled response: Retry-After, else exponential"""
+    delay = parse_retry_after(response.headers.get('Retry-After'))
+    if delay is None:
+        delay = RETRY_BACKOFF * 2 ** attempt
+    return min(delay, MAX_RETRY_DELAY)
+
+def _fsync_directory(directory: Path):
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def stream_to_temp(response: requests.Response, directory, name_hint: str = 'download',
+                   chunk_size: int = CHUNK_SIZE) -> Tuple[str, str]:
+    """Stream a response body into a fsynced temp file in ``directory``.
+
+    The byte count is checked against Content-Length. Returns
+    ``(tmp_path, sha256)``; the caller renames or removes the temp file.
+    """
+    directory = Path(directory)
+    ensure_dir(directory)
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=f".{name_hint}.", suffix='.part')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        expected = response.headers.get('Content-Length')
+        encoded = response.headers.get('Content-Encoding', 'identity') != 'identity'
+        if expected is not None and not encoded and size != int(expected):
+            raise IncompleteDownloadError(f"got {size} of {expected} bytes for {response.url}")
+        return tmp_name, digest.hexdigest()
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+    finally:
+        response.close()
+
+def stream_to_file(response: requests.Response, dest, skip_if_sha256: Optional[str] = None,
+                   chunk_size: int = CHUNK_SIZE) -> Tuple[str, bool]:
+    """Stream a response body into ``dest`` via a temp file and an atomic rename.
+
+    ``dest`` is either the old file or the complete new one, never a partial
+    write. Returns ``(sha256, written)``; nothing is written when the body
+    hashes to ``skip_if_sha256``.
+    """
+    dest = Path(dest)
+    tmp_name, sha256 = stream_to_temp(response, dest.parent, dest.name, chunk_size)
+    if sha256 == skip_if_sha256:
+        os.unlink(tmp_name)
+        return sha256, False
+    os.replace(tmp_name, dest)
+    _fsync_directory(dest.parent)
+    return sha256, True
+
+def asset_key(url: str) -> str:
+    """Key shared by every mirror of an upstream image (its path below /images/)"""
+    path = urlparse(url).path
+    marker = '/images/'
+    if marker in path:
+        return path.split(marker, 1)[1]
+    return url
+
+class DownloadJob:
+    """A single file to fetch, with candidate URLs tried in order"""
+
+    def __init__(self, urls, dest, label: Optional[str] = None, key: Optional[str] = None,
+                 priority: int = 0):
+        self.urls = [urls] if isinstance(urls, str) else list(urls)
+        self.dest = Path(dest)
+        self.label = label or self.dest.name
+        self.key = key or asset_key(self.urls[0])
+        self.priority = priority
+
+class AsyncDownloadEngine:
+    def __init__(self, session: Optional[requests.Session] = None,
+                 workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 timeout: int = 30, retries: int = 3, verbose: bool = True,
+                 cache: Optional[ValidatorCache] = None, revalidate: bool = True,
+                 store: Optional[AssetStore] = None, index: Optional[LocalAssetIndex] = None,
+                 negative_cache: Optional[NegativeCache] = None,
+                 selector: Optional[MirrorSelector] = None,
+                 journal: Optional[JobJournal] = None, time_budget: Optional[float] = None):
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.verbose = verbose
+        # Existing files are revalidated with conditional requests instead of skipped
+        self.cache = cache or get_shared_cache()
+        self.revalidate = revalidate
+        self.store = store or get_shared_store()
+        self.index = index or get_shared_index()
+        self.negative_cache = negative_cache or get_shared_negative_cache()
+        self.selector = selector or get_shared_selector()
+        # With a journal, runs resume from the recorded state and stop at the deadline
+        self.journal = journal
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+        # The shared transport's pools are sized for DEFAULT_WORKERS
+        self.session = session or get_session()
+
+    def run(self, jobs: List[DownloadJob]) -> Dict[str, int]:
+        """Download all jobs and return counters by outcome"""
+        return asyncio.run(self.run_async(jobs))
+
+    async def run_async(self, jobs: List[DownloadJob]) -> Dict[str, int]:
+        stats = {'downloaded': 0, 'linked': 0, 'skipped': 0, 'missing': 0,
+                 'known_missing': 0, 'failed': 0, 'deferred': 0}
+        if self.journal:
+            self.journal.plan(jobs)
+            jobs = self.journal.runnable(jobs)
+        if not jobs:
+            return stats
+
+        # Jobs for the same upstream image are fetched once and linked to every destination
+        groups: Dict[str, List[DownloadJob]] = {}
+        for job in jobs:
+            groups.setdefault(job.key, []).append(job)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for group in groups.values():
+            queue.put_nowait(group)
+
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            async def worker():
+                while not self.out_of_time():
+                    try:
+                        group = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    for outcome in await self._process(group, host_limits, loop, executor):
+                        stats[outcome] += 1
+                    queue.task_done()
+
+            await asyncio.gather(*(worker() for _ in range(min(self.workers, len(groups)))))
+
+        # Groups left when the time budget ran out stay pending in the journal
+        while not queue.empty():
+            stats['deferred'] += len(queue.get_nowait())
+
+        self.cache.save()
+        self.negative_cache.save()
+        self.selector.save()
+        self.store.save()
+        self.index.save()
+        return stats
+
+    def out_of_time(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    async def _process(self, group: List[DownloadJob], host_limits, loop, executor) -> List[str]:
+        outcomes = await self._process_group(group, host_limits, loop, executor)
+        if self.journal:
+            for member, outcome in zip(group, outcomes):
+                self.journal.mark([member], OUTCOME_STATES[outcome])
+        return outcomes
+
+    async def _process_group(self, group: List[DownloadJob], host_limits, loop, executor) -> List[str]:
+        job = group[0]
+        if self.journal:
+            self.journal.mark(group, IN_FLIGHT)
+        if not self.revalidate and all(self.index.exists(j.dest) for j in group):
+            return ['skipped'] * len(group)
+
+        if self.store.is_fresh(job.key):
+            # Verified upstream recently (e.g. by another layout's run); only publish
+            outcome = 'skipped'
+        else:
+            # Stays known_missing when every URL is in the negative cache
+            outcome = 'known_missing'
+            # Mirrors are tried healthiest first
+            for url in self.selector.order(job.urls):
+                if self.negative_cache.is_missing(url):
+                    continue
+                host = urlparse(url).netloc
+                limit = host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+                async with limit:
+                    outcome = await loop.run_in_executor(executor, self._fetch, url, job)
+                if outcome in ('downloaded', 'skipped'):
+                    break
+
+        outcomes = [outcome] * len(group)
+        if outcome in ('downloaded', 'skipped'):
+            sha256 = self.store.lookup(job.key)
+            for i, member in enumerate(group):
+                linked = await loop.run_in_executor(executor, self.store.link, sha256, member.dest)
+                if linked:
+                    self.index.add(member.dest)
+                    if outcome == 'skipped':
+                        outcomes[i] = 'linked'
+
+        if self.verbose:
+            for member, member_outcome in zip(group, outcomes):
+                if member_outcome == 'downloaded':
+                    print(f"✅ Downloaded {member.label}")
+                elif member_outcome == 'linked':
+                    print(f"🔗 Linked {member.label}")
+                elif member_outcome == 'missing':
+                    print(f"❌ Not found {member.label}")
+        return outcomes
+
+    def _fetch(self, url: str, job: DownloadJob) -> str:
+        """Blocking fetch executed on the thread pool; stores the body and records the key"""
+        try:
+            # Any local copy (published file or stored object) allows a conditional request
+            known = self.store.lookup(job.key)
+            if self.index.exists(job.dest):
+                local = job.dest
+            elif self.store.has(known):
+                local = self.store.object_path(known)
+            else:
+                local = None
+            headers = self.cache.conditional_headers(url) if local else {}
+
+            # 429/503 are retried after Retry-After (or an exponential backoff);
+            # this blocks only the pool thread running this job
+            for attempt in range(self.retries):
+                response = timed_get(self.session, url, self.selector,
+                                     headers=headers, timeout=self.timeout, stream=True)
+                if response.status_code not in THROTTLE_STATUSES:
+                    break
+                response.close()
+                if attempt + 1 == self.retries:
+                    break
+                delay = throttle_delay(response, attempt)
+                if self.deadline is not None and time.monotonic() + delay >= self.deadline:
+                    break
+                time.sleep(delay)
+            if response.status_code != 200:
+                response.close()
+                if response.status_code in THROTTLE_STATUSES:
+                    return 'failed'
+                if response.status_code in MISSING_STATUSES:
+                    self.negative_cache.record(url)
+                if response.status_code == 304:
+                    if local == job.dest and not self.store.is_published(known, job.dest):
+                        known = self.store.adopt(job.dest)
+                    self.store.record(job.key, known)
+                    return 'skipped'
+                return 'missing'
+
+            previous = self.cache.get(url).get('sha256')
+            if previous is None and local is not None:
+                previous = sha256_file(local)
+            tmp_name, digest = stream_to_temp(response, self.store.root, job.dest.name)
+            self.store.ingest(tmp_name, digest)
+            self.store.record(job.key, digest)
+            self.cache.remember(url, response, digest)
+            return 'skipped' if digest == previous else 'downloaded'
+        except Exception as e:
+            if self.verbose:
+                print(f"❌ Error downloading {url}: {e}")
+            return 'failed'
@@ -5,18 +5,26 @@ Extracts comprehensive character data from multiple sources
 """
 
 import os
-import json
-import requests
 from pathlib import Path
-import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from ba_http_cache import conditional_get, get_shared_cache
+from ba_field_mapping import TORIKUSHII_CHARACTER
+from ba_http import get_session
+from ba_json_output import write_json
+from ba_json_stream import JsonArrayWriter, fetch_to_spool, iter_json_records
+from ba_snapshot import write_snapshot
+
+ADDITIONAL_DATA_SOURCES = {
+    'items.json': 'https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/items.json',
+    'equipment.json': 'https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/equipment.json',
+    'events.json': 'https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/events.json'
+}
+# Subdirectory of data/ per additional file
+ADDITIONAL_DATA_DIRS = {'items.json': 'items', 'equipment.json': 'items', 'events.json': 'events'}
 
 class BlueArchiveDataFetcher:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.session = get_session()
         self.data_dir = Path('data')
         self.data_dir.mkdir(exist_ok=True)
         
@@ -26,95 +34,82 @@ class BlueArchiveDataFetcher:
         
         try:
             url = "https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/characters.json"
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            output_file = self.data_dir / 'characters' / 'characters.json'
+            spool, response, sha256 = fetch_to_spool(self.session, url, output_file, timeout=30)
             
-            raw_data = response.json()
-            characters = []
+            if spool is None:
+                print("⏭️  Character data unchanged upstream")
+                records = get_shared_cache().get(url).get('records')
+                # Caches written before the count was stored fall back to one pass over the output
+                return records if records is not None else sum(1 for _ in iter_json_records(output_file))
             
-            for char_id, char_data in raw_data.items():
-                if not char_data.get('Name'):
-                    continue
-                    
-                character = {
-                    'id': int(char_id),
-                    'name': char_data.get('Name', ''),
-                    'dev_name': char_data.get('DevName', ''),
-                    'school': char_data.get('School', ''),
-                    'club': char_data.get('Club', ''),
-                    'rarity': char_data.get('StarGrade', 3),
-                    'squad_type': char_data.get('SquadType', ''),
-                    'position': char_data.get('Position', ''),
-                    'weapon_type': char_data.get('WeaponType', ''),
-                    'armor_type': char_data.get('ArmorType', ''),
-                    'bullet_type': char_data.get('BulletType', ''),
-                    'terrain': char_data.get('Terrain', {}),
-                    'profile': char_data.get('Profile', {}),
-                    'stats': char_data.get('Stat', {}),
-                    'skills': char_data.get('Skills', []),
-                    'weapon': char_data.get('Weapon', {}),
-                    'equipment': char_data.get('Equipment', []),
-                    'is_limited': char_data.get('IsLimited', False)
-                }
-                
-                characters.append(character)
+            # Parse, map and write one character at a time
+            try:
+                with JsonArrayWriter(output_file, variants=True) as characters:
+                    extract = TORIKUSHII_CHARACTER.extract
+                    for char_id, char_data in iter_json_records(spool):
+                        character = extract(char_data, char_id)
+                        if character:
+                            characters.write(character)
+            finally:
+                os.unlink(spool)
+            
+            get_shared_cache().remember(url, response, sha256, records=characters.count)
+            get_shared_cache().save()
+            write_snapshot(output_file)
+            
+            print(f"✅ Saved {characters.count} characters to {output_file}")
+            return characters.count
+            
+        except Exception as e:
+            print(f"❌ Error fetching character data: {e}")
+            return 0
+    
+    def fetch_additional_file(self, filename: str, url: str):
+        """Fetch one additional data file (worker for fetch_additional_data)"""
+        try:
+            output_file = self.data_dir / ADDITIONAL_DATA_DIRS[filename] / filename
+            response, changed = conditional_get(self.session, url, output_file, timeout=30)
+            
+            if not changed:
+                print(f"⏭️  Unchanged {filename}")
+                return
+            
+            response.raise_for_status()
+            data = response.json()
             
-            # Save character data
-            output_file = self.data_dir / 'characters' / 'characters.json'
             output_file.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(characters, f, indent=2, ensure_ascii=False)
+            write_json(data, output_file)
+            write_snapshot(output_file)
             
-            print(f"✅ Saved {len(characters)} characters to {output_file}")
-            return characters
+            get_shared_cache().remember(url, response)
+            print(f"✅ Saved {filename}")
             
         except Exception as e:
-            print(f"❌ Error fetching character data: {e}")
-            return []
+            print(f"❌ Error fetching {filename}: {e}")
     
     def fetch_additional_data(self):
         """Fetch items, equipment, and other game data"""
         print("🔄 Fetching additional game data...")
         
-        data_sources = {
-            'items.json': 'https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/items.json',
-            'equipment.json': 'https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/equipment.json',
-            'events.json': 'https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/events.json'
-        }
+        # The files are independent, so they are fetched concurrently
+        with ThreadPoolExecutor(max_workers=len(ADDITIONAL_DATA_SOURCES)) as executor:
+            for filename, url in ADDITIONAL_DATA_SOURCES.items():
+                executor.submit(self.fetch_additional_file, filename, url)
         
-        for filename, url in data_sources.items():
-            try:
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                if filename == 'items.json' or filename == 'equipment.json':
-                    output_dir = self.data_dir / 'items'
-                else:
-                    output_dir = self.data_dir / 'events'
-                
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_file = output_dir / filename
-                
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                
-                print(f"✅ Saved {filename}")
-                
-            except Exception as e:
-                print(f"❌ Error fetching {filename}: {e}")
+        get_shared_cache().save()
     
     def run(self):
         """Run the complete data fetching process"""
         print("🚀 Blue Archive Data Fetcher")
         print("=" * 40)
         
-        characters = self.fetch_character_data()
+        character_count = self.fetch_character_data()
         self.fetch_additional_data()
         
         print(f"\n🎉 Data extraction complete!")
-        print(f"📊 {len(characters)} characters processed")
+        print(f"📊 {character_count} characters processed")
         print(f"📁 Data saved to {self.data_dir}")
 
 def main():
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Field Mapping
+Declarative source-to-target record mappings, compiled once into plain Python functions
+"""
+
+import hashlib
+import inspect
+import json
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Iterable, Optional, Sequence, Union
+
+CDN_BASE_URL = "https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main"
+
+_EMPTY: Dict[str, Any] = {}
+_LITERAL_TYPES = (str, int, float, bool, type(None))
+
+class Field:
+    """Value at a dotted ``path`` of the source record.
+
+    ``default`` is used when the last key is missing (missing intermediate
+    objects count as empty). ``index`` picks one element of a list value,
+    falling back to ``default`` when the list is empty. ``transform`` is
+    applied to the result. With ``omit_empty`` the target key is only set
+    when the value is truthy.
+    """
+
+    def __init__(self, path: str, default: Any = None, transform: Optional[Callable] = None,
+                 index: Optional[int] = None, omit_empty: bool = False):
+        self.path = path
+        self.default = default
+        self.transform = transform
+        self.index = index
+        self.omit_empty = omit_empty
+
+class Const:
+    """A fixed value (literal lists/dicts are rebuilt per record)"""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+class Key:
+    """The record's key when mapping a ``{key: record}`` object"""
+
+    def __init__(self, transform: Optional[Callable] = None):
+        self.transform = transform
+
+class Computed:
+    """``func(record, key)`` for values no declarative field can express"""
+
+    def __init__(self, func: Callable[[Dict[str, Any], Any], Any]):
+        self.func = func
+
+class Each:
+    """Map every truthy element of the list at ``path`` through a nested mapping"""
+
+    def __init__(self, path: str, mapping: 'Mapping'):
+        self.path = path
+        self.mapping = mapping
+
+Spec = Union[str, Field, Const, Key, Computed, Each, Dict[str, Any]]
+
+def _is_literal(value: Any) -> bool:
+    if isinstance(value, _LITERAL_TYPES):
+        return not (isinstance(value, float) and value != value)
+    if isinstance(value, (list, tuple)):
+        return all(_is_literal(v) for v in value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _is_literal(v) for k, v in value.items())
+    return False
+
+def _describe_callable(func: Callable) -> str:
+    """Source of ``func`` (its name for builtins), so editing it changes a mapping's signature"""
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', repr(func))}"
+
+def _describe(spec: Spec) -> Any:
+    """JSON-able description of a spec, nested mappings and callables included"""
+    if isinstance(spec, str):
+        return spec
+    if isinstance(spec, Field):
+        return ['Field', spec.path, repr(spec.default), spec.index, spec.omit_empty,
+                spec.transform and _describe_callable(spec.transform)]
+    if isinstance(spec, Const):
+        return ['Const', repr(spec.value)]
+    if isinstance(spec, Key):
+        return ['Key', spec.transform and _describe_callable(spec.transform)]
+    if isinstance(spec, Computed):
+        return ['Computed', _describe_callable(spec.func)]
+    if isinstance(spec, Each):
+        return ['Each', spec.path, spec.mapping.signature]
+    if isinstance(spec, dict):
+        return {key: _describe(value) for key, value in spec.items()}
+    raise TypeError(f"unsupported mapping spec: {spec!r}")
+
+class _Compiler:
+    """Generates the source of one extractor function for a mapping"""
+
+    def __init__(self):
+        self.namespace: Dict[str, Any] = {'_EMPTY': _EMPTY}
+        self.prefixes: Dict[str, str] = {}
+        self.prelude: List[str] = []
+        self.body: List[str] = []
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value: Any) -> str:
+        if _is_literal(value):
+            return repr(value)
+        name = self.name('_k')
+        self.namespace[name] = value
+        return name
+
+    def function(self, func: Callable) -> str:
+        name = self.name('_f')
+        self.namespace[name] = func
+        return name
+
+    def parent(self, keys: Sequence[str]) -> str:
+        """Local variable holding the object at ``keys`` (looked up once per record)"""
+        if not keys:
+            return 'r'
+        path = '.'.join(keys)
+        if path not in self.prefixes:
+            outer = self.parent(keys[:-1])
+            var = self.name('_p')
+            self.prelude.append(f"    {var} = {outer}.get({keys[-1]!r}) or _EMPTY")
+            self.prefixes[path] = var
+        return self.prefixes[path]
+
+    def get(self, path: str, default: Any = None) -> str:
+        *parents, last = path.split('.')
+        source = self.parent(parents)
+        if default is None:
+            return f"{source}.get({last!r})"
+        return f"{source}.get({last!r}, {self.constant(default)})"
+
+    def expression(self, spec: Spec) -> str:
+        if isinstance(spec, str):
+            return self.get(spec)
+        if isinstance(spec, Field):
+            if spec.index is None:
+                expr = self.get(spec.path, spec.default)
+            else:
+                var = self.name('_v')
+                self.body.append(f"    {var} = {self.get(spec.path)}")
+                expr = f"({var}[{spec.index}] if {var} else {self.constant(spec.default)})"
+            if spec.transform is not None:
+                expr = f"{self.function(spec.transform)}({expr})"
+            return expr
+        if isinstance(spec, Const):
+            return self.constant(spec.value)
+        if isinstance(spec, Key):
+            return f"{self.function(spec.transform)}(key)" if spec.transform else 'key'
+        if isinstance(spec, Computed):
+            return f"{self.function(spec.func)}(r, key)"
+        if isinstance(spec, Each):
+            mapped = self.function(spec.mapping.extract)
+            return f"[{mapped}(x) for x in ({self.get(spec.path)} or ()) if x]"
+        if isinstance(spec, dict):
+            return self.build(spec)
+        raise TypeError(f"unsupported mapping spec: {spec!r}")
+
+    def build(self, fields: Dict[str, Spec]) -> str:
+        """Emit statements building one output dict; returns the variable holding it"""
+        var = self.name('_d')
+        if not any(isinstance(spec, Field) and spec.omit_empty for spec in fields.values()):
+            items = [f"{key!r}: {self.expression(spec)}" for key, spec in fields.items()]
+            self.body.append(f"    {var} = {{{', '.join(items)}}}")
+            return var
+        # Optional keys: assign one at a time to keep the spec's key order
+        self.body.append(f"    {var} = {{}}")
+        for key, spec in fields.items():
+            expr = self.expression(spec)
+            if isinstance(spec, Field) and spec.omit_empty:
+                value = self.name('_o')
+                self.body.append(f"    {value} = {expr}")
+                self.body.append(f"    if {value}: {var}[{key!r}] = {value}")
+            else:
+                self.body.append(f"    {var}[{key!r}] = {expr}")
+        return var
+
+class Mapping:
+    """A declarative ``{target_key: spec}`` mapping compiled into one function.
+
+    Records missing any ``required`` path (falsy value) map to None.
+    """
+
+    def __init__(self, fields: Dict[str, Spec], required: Sequence[str] = (), name: str = 'mapping'):
+        self.fields = fields
+        self.required = tuple(required)
+        self.name = name
+        self.extract = self._compile()
+        self._signature: Optional[str] = None
+
+    def _compile(self) -> Callable[..., Optional[Dict[str, Any]]]:
+        compiler = _Compiler()
+        checks = [f"    if not {compiler.get(path)}: return None" for path in self.required]
+        result = compiler.build(self.fields)
+        # Prefix lookups come first since the required checks may use them
+        source = "\n".join(
+            ["def extract(r, key=None):"]
+            + compiler.prelude + checks + compiler.body
+            + [f"    return {result}"]
+        )
+        code = compile(source, f"<mapping {self.name}>", 'exec')
+        exec(code, compiler.namespace)
+        extract = compiler.namespace['extract']
+        extract.__doc__ = source
+        return extract
+
+    @property
+    def signature(self) -> str:
+        """Hash of the generated code and the full spec, nested mappings and callables included"""
+        if self._signature is None:
+            description = [self.extract.__doc__, list(self.required), _describe(self.fields)]
+            text = json.dumps(description, sort_keys=True, separators=(',', ':'))
+            self._signature = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return self._signature
+
+    def __call__(self, record: Dict[str, Any], key: Any = None) -> Optional[Dict[str, Any]]:
+        return self.extract(record, key)
+
+    def extend(self, name: Optional[str] = None, **fields: Spec) -> 'Mapping':
+        """A new mapping with extra (or replaced) target fields"""
+        return Mapping({**self.fields, **fields}, self.required, name or self.name)
+
+    def map_all(self, records: Union[Dict[Any, Dict[str, Any]], Iterable]) -> List[Dict[str, Any]]:
+        """Apply to a list of records, ``(key, record)`` pairs or a ``{key: record}`` object"""
+        extract = self.extract
+        if isinstance(records, dict):
+            records = records.items()
+        out = []
+        for record in records:
+            mapped = extract(record[1], record[0]) if isinstance(record, tuple) else extract(record)
+            if mapped is not None:
+                out.append(mapped)
+        return out
+
+# SchaleDB students.json -> Supabase characters (fetch_correct_schaledb)
+SCHALEDB_SKILL = Mapping({
+    "skill_type": "SkillType",
+    "name": "Name",
+    "desc": "Desc",
+    "icon": "Icon",
+    # Only present when set upstream
+    "parameters": Field("Parameters", omit_empty=True),
+    "cost": Field("Cost", omit_empty=True),
+    "duration": Field("Duration", omit_empty=True),
+    "range": Field("Range", omit_empty=True),
+    "radius": Field("Radius", omit_empty=True),
+    "effects": Field("Effects", omit_empty=True)
+}, name='schaledb_skill')
+
+SCHALEDB_TO_SUPABASE = Mapping({
+    "id": "Id",
+    "name": "Name",
+    "dev_name": "DevName",
+    "character_voice": "CharacterVoice",
+    "illustrator": "Illustrator",
+    "designer": "Designer",
+    "collection_bg": "CollectionBG",
+    "school_year": "SchoolYear",
+    "is_limited": Field("IsLimited", False),
+    "source": Const("schaledb"),
+    "profile": {
+        "age": "ProfileAge",
+        "birthday": "ProfileBirthday",
+        "height": "ProfileHeight",
+        "hobby": "ProfileHobby",
+        "school_year": "SchoolYear",
+        "ssr_quote": "CharacterSSRNew"
+    },
+    "stats": {
+        "attack_power_1": "AttackPower1",
+        "attack_power_100": "AttackPower100",
+        "max_hp_1": "MaxHP1",
+        "max_hp_100": "MaxHP100",
+        "def_power_1": "DefensePower1",
+        "def_power_100": "DefensePower100",
+        "heal_power_1": "HealPower1",
+        "heal_power_100": "HealPower100",
+        "stability_point": "StabilityPoint",
+        "dodge_point": "DodgePoint",
+        "accuracy_point": "AccuracyPoint",
+        "critical_point": "CriticalPoint",
+        "critical_damage": "CriticalDamageRate"
+    },
+    "terrain": {
+        "street": "StreetBattleAdaptation",
+        "outdoor": "OutdoorBattleAdaptation",
+        "indoor": "IndoorBattleAdaptation"
+    },
+    "weapon": {
+        "name": "WeaponName",
+        "image": "WeaponImg",
+        "description": "WeaponDesc"
+    },
+    "skills": Each("Skills", SCHALEDB_SKILL),
+    "equipment": Field("Equipment", []),
+    "images": {
+        "collection": "CollectionBG",
+        "portrait": "PortraitImg",
+        "lobby": "LobbyImg"
+    },
+    # Foreign key mappings - resolved by lookup functions later
+    "school_name": "School",
+    "club_name": "Club",
+    "rarity_stars": "StarGrade",
+    "squad_type": "SquadType",
+    "position": "Position",
+    "weapon_type": "WeaponType",
+    "armor_type": "ArmorType",
+    "bullet_type": "BulletType",
+    "tactic_role": "TacticRole"
+}, required=("Id",), name='schaledb_to_supabase')
+
+# torikushii characters.json ({id: character}) -> data/characters/characters.json
+TORIKUSHII_CHARACTER = Mapping({
+    'id': Key(int),
+    'name': Field('Name', ''),
+    'dev_name': Field('DevName', ''),
+    'school': Field('School', ''),
+    'club': Field('Club', ''),
+    'rarity': Field('StarGrade', 3),
+    'squad_type': Field('SquadType', ''),
+    'position': Field('Position', ''),
+    'weapon_type': Field('WeaponType', ''),
+    'armor_type': Field('ArmorType', ''),
+    'bullet_type': Field('BulletType', ''),
+    'terrain': Field('Terrain', {}),
+    'profile': Field('Profile', {}),
+    'stats': Field('Stat', {}),
+    'skills': Field('Skills', []),
+    'weapon': Field('Weapon', {}),
+    'equipment': Field('Equipment', []),
+    'is_limited': Field('IsLimited', False)
+}, required=('Name',), name='torikushii_character')
+
+def _level1(stat: str) -> Field:
+    """Level 1 value of a torikushii per-level stat list"""
+    return Field(f'Stat.{stat}', 0, index=0)
+
+# torikushii characters.json -> SchaleDB-style students.json (ba_schaledb_clone)
+TORIKUSHII_TO_SCHALEDB = Mapping({
+    "Id": Key(int),
+    "Name": Field('Name', ''),
+    "DevName": Field('DevName', ''),
+    "School": Field('School', ''),
+    "Club": Field('Club', ''),
+    "StarGrade": Field('StarGrade', 3),
+    "SquadType": Field('SquadType', ''),
+    "TacticRole": Field('TacticRole', ''),
+    "Position": Field('Position', ''),
+    "BulletType": Field('BulletType', ''),
+    "ArmorType": Field('ArmorType', ''),
+    "WeaponType": Field('WeaponType', ''),
+    "Equipment": Field('Equipment', []),
+    "Terrain": {
+        "Street": Field('Terrain.Street', 'D'),
+        "Outdoor": Field('Terrain.Outdoor', 'D'),
+        "Indoor": Field('Terrain.Indoor', 'D')
+    },
+    "Profile": {
+        "Age": Field('Profile.Age', ''),
+        "Birthday": Field('Profile.Birthday', ''),
+        "Height": Field('Profile.Height', ''),
+        "Hobby": Field('Profile.Hobby', ''),
+        "Designer": Field('Profile.Designer', ''),
+        "Illustrator": Field('Profile.Illustrator', ''),
+        "CV": Field('Profile.CV', '')
+    },
+    "Stat": {
+        "AttackPower1": _level1('AttackPower'),
+        "MaxHP1": _level1('MaxHP'),
+        "DefensePower1": _level1('DefensePower'),
+        "HealPower1": _level1('HealPower'),
+        "AccuracyPoint1": _level1('AccuracyPoint'),
+        "DodgePoint1": _level1('DodgePoint'),
+        "CriticalPoint1": _level1('CriticalPoint'),
+        "StabilityPoint1": _level1('StabilityPoint'),
+        "Range1": _level1('Range'),
+        "AmmoCount1": _level1('AmmoCount'),
+        "AmmoCost1": _level1('AmmoCost')
+    },
+    "Skills": Field('Skills', []),
+    "Weapon": Field('Weapon', {}),
+    "Released": Const([True, True]),  # Global, Japan
+    "IsLimited": Field('IsLimited', False)
+}, required=('Name',), name='torikushii_to_schaledb')
+
+def _ennead_dev_name(char: Dict[str, Any], key=None) -> str:
+    return char.get('devname', char.get('name', '').lower())
+
+# ennead / BlueArchiveData API characters (auto-update workflow) -> data/characters.json
+ENNEAD_CHARACTER = Mapping({
+    'id': 'id',
+    'name': 'name',
+    'dev_name': Computed(_ennead_dev_name),
+    'rarity': 'rarity',
+    'school': 'school',
+    'club': 'club',
+    'type': 'role',
+    'weapon_type': 'weaponType',
+    'armor_type': 'armorType',
+    'bullet_type': 'bulletType',
+    'range': 'range',
+    'equipment': Field('equipment', []),
+    'image_url': Computed(lambda char, key: f"{CDN_BASE_URL}/images/characters/{_ennead_dev_name(char)}.png"),
+    'school_icon_url': Computed(lambda char, key: f"{CDN_BASE_URL}/images/schools/{char.get('school', '').lower()}.png"),
+    'updated_at': Computed(lambda char, key: datetime.now().isoformat())
+}, required=('name', 'school'), name='ennead_character')
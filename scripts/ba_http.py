@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Blue Archive HTTP Transport
+One pooled, keep-alive, rate-limited requests session shared by every script
+"""
+
+import importlib.util
+import threading
+from typing import Optional
+
+import requests
+from urllib3.util.retry import Retry
+
+from ba_rate_limiter import HostRateLimiter, mount_rate_limiter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+# (connect, read) seconds; used whenever a caller does not pass a timeout
+DEFAULT_TIMEOUT = (5, 30)
+# Per-host pools; large enough for the download engine's worker count
+DEFAULT_POOL_CONNECTIONS = 16
+DEFAULT_POOL_MAXSIZE = 32
+
+def supports_brotli() -> bool:
+    """urllib3 only decodes br when a brotli package is installed"""
+    return any(importlib.util.find_spec(name) for name in ('brotli', 'brotlicffi'))
+
+def accept_encoding() -> str:
+    return 'gzip, deflate, br' if supports_brotli() else 'gzip, deflate'
+
+class TransportSession(requests.Session):
+    """requests.Session with a default timeout"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+def create_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                   pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                   timeout=DEFAULT_TIMEOUT,
+                   limiter: Optional[HostRateLimiter] = None) -> TransportSession:
+    """Build a keep-alive session with sized pools, compression and rate limiting.
+
+    Connection errors are retried at the urllib3 level; HTTP status handling
+    (429/503 backoff, 404s) stays with the rate limiter and the callers.
+    """
+    session = TransportSession(timeout)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': accept_encoding(),
+        'Connection': 'keep-alive'
+    })
+    retries = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5)
+    mount_rate_limiter(session, limiter, pool_connections=pool_connections,
+                       pool_maxsize=pool_maxsize, max_retries=retries)
+    return session
+
+_shared_session: Optional[TransportSession] = None
+_shared_lock = threading.Lock()
+
+def get_session() -> TransportSession:
+    """Process-wide session so every script reuses the same connection pools"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Blue Archive HTTP Cache
+Persistent ETag/Last-Modified validator cache for conditional requests
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import requests
+
+from ba_asset_index import atomic_write_json
+
+DEFAULT_CACHE_PATH = Path('.cache') / 'http_validators.json'
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ValidatorCache:
+    """URL -> {etag, last_modified, sha256} stored as JSON on disk"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def get(self, url: str) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.entries.get(url, {}))
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.get(url)
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def remember(self, url: str, response: requests.Response, digest: Optional[str] = None,
+                 records: Optional[int] = None):
+        """Record the validators of a successfully processed 200 response.
+
+        ``records`` is the number of records written from it, so an unchanged
+        run can report the count without re-reading its output.
+        """
+        entry = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': digest or sha256_bytes(response.content)
+        }
+        if records is not None:
+            entry['records'] = records
+        with self.lock:
+            self.entries[url] = entry
+            self.dirty = True
+
+    def forget(self, url: str):
+        with self.lock:
+            if self.entries.pop(url, None) is not None:
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            atomic_write_json(self.path, self.entries, ensure_ascii=False, sort_keys=True)
+            self.dirty = False
+
+_shared_cache: Optional[ValidatorCache] = None
+_shared_cache_lock = threading.Lock()
+
+def get_shared_cache() -> ValidatorCache:
+    """Process-wide validator cache, loaded on first use"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ValidatorCache()
+        return _shared_cache
+
+def conditional_get(session: requests.Session, url: str, output=None,
+                    cache: Optional[ValidatorCache] = None,
+                    **kwargs) -> Tuple[requests.Response, bool]:
+    """GET with If-None-Match/If-Modified-Since and report whether upstream changed.
+
+    Validators are only sent when ``output`` (the file built from this URL)
+    still exists, so a deleted output always triggers a full download. A 200
+    whose body hashes to the cached value also counts as unchanged.
+    """
+    cache = cache or get_shared_cache()
+    headers = dict(kwargs.pop('headers', None) or {})
+    have_output = output is None or Path(output).exists()
+    if have_output:
+        headers.update(cache.conditional_headers(url))
+
+    response = session.get(url, headers=headers, **kwargs)
+    if response.status_code == 304:
+        return response, False
+    if have_output and response.status_code == 200:
+        cached_hash = cache.get(url).get('sha256')
+        if cached_hash and cached_hash == sha256_bytes(response.content):
+            return response, False
+    return response, True
+
+DEFAULT_NEGATIVE_PATH = Path('.cache') / 'missing_urls.json'
+MISSING_STATUSES = (404, 410)
+
+class NegativeCache:
+    """URLs known to return 404/410, remembered until their TTL expires"""
+
+    def __init__(self, path=DEFAULT_NEGATIVE_PATH, ttl: float = 7 * 24 * 3600):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.expires: Dict[str, float] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.expires = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def is_missing(self, url: str) -> bool:
+        with self.lock:
+            expiry = self.expires.get(url)
+            if expiry is None:
+                return False
+            if expiry < time.time():
+                del self.expires[url]
+                self.dirty = True
+                return False
+            return True
+
+    def record(self, url: str):
+        with self.lock:
+            self.expires[url] = time.time() + self.ttl
+            self.dirty = True
+
+    def forget(self, url: str):
+        with self.lock:
+            if self.expires.pop(url, None) is not None:
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            now = time.time()
+            self.expires = {url: exp for url, exp in self.expires.items() if exp >= now}
+            atomic_write_json(self.path, self.expires, sort_keys=True)
+            self.dirty = False
+
+_shared_negative_cache: Optional[NegativeCache] = None
+_shared_negative_lock = threading.Lock()
+
+def get_shared_negative_cache() -> NegativeCache:
+    """Process-wide negative cache, loaded on first use"""
+    global _shared_negative_cache
+    with _shared_negative_lock:
+        if _shared_negative_cache is None:
+            _shared_negative_cache = NegativeCache()
+        return _shared_negative_cache
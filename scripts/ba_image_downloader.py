@@ -4,36 +4,80 @@ Blue Archive Image Downloader
 Downloads all images from SchaleDB structure and uploads to GitHub
 """
 
-import os
 import json
-import requests
+import argparse
 from pathlib import Path
-import time
 from typing import Dict, List, Any
+from ba_http import get_session
+from ba_asset_discovery import (
+    discover_equipment_ids, discover_item_ids, discover_school_ids, discover_student_ids
+)
+from ba_asset_index import DEFAULT_INDEX_PATH, LocalAssetIndex, get_shared_index
+from ba_asset_manifest import DEFAULT_METADATA_PATH, AssetManifestBuilder, content_version, with_urls
+from ba_asset_store import AssetStore
+from ba_delta_sync import DEFAULT_STATE_PATH as DELTA_STATE_PATH, DeltaPlanner, fetch_listing, load_listing
+from ba_download_engine import AsyncDownloadEngine, DownloadJob
+from ba_http_cache import DEFAULT_CACHE_PATH, DEFAULT_NEGATIVE_PATH, NegativeCache, ValidatorCache
+from ba_image_variants import (
+    DEFAULT_STATE_PATH as VARIANTS_STATE_PATH, VARIANTS_DIR, VariantPipeline, variant_manifest_section
+)
+from ba_job_journal import DEFAULT_JOURNAL_PATH, DONE, MISSING, JobJournal
+from ba_json_output import write_json
+from ba_mirrors import DEFAULT_STATS_PATH, MirrorSelector
+from ba_sharding import (
+    merge_partial_manifests, parse_shard, select_shard, shard_state_dir, write_partial_manifest
+)
+
+BASE_CDN_URL = "https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main"
+
+# Student image types in download priority order (icons are used everywhere)
+STUDENT_IMAGE_PRIORITY = {'icon': 3, 'portrait': 2, 'collection': 1, 'lobby': 0}
 
 class BlueArchiveImageDownloader:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    def __init__(self, time_budget=None, new_cycle=False, shard=None, delta=False, listing=None):
+        self.shard = shard
+        # Diff against the upstream tree listing instead of requesting every URL
+        self.delta = delta or listing is not None
+        self.listing = listing
+        self.planner = None
+        self.session = get_session()
         self.base_url = "https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/images"
         self.images_dir = Path('images')
         
+        # Shards may run from one checkout, so each keeps its own journal, caches and indexes
+        self.state_dir = shard_state_dir(shard) if shard else None
+        if self.state_dir:
+            self.index = LocalAssetIndex(path=self.state_path(DEFAULT_INDEX_PATH)).load()
+            state = {
+                'cache': ValidatorCache(self.state_path(DEFAULT_CACHE_PATH)),
+                'negative_cache': NegativeCache(self.state_path(DEFAULT_NEGATIVE_PATH)),
+                'store': AssetStore(index_path=self.state_dir / 'store_index.json'),
+                'selector': MirrorSelector(path=self.state_path(DEFAULT_STATS_PATH)),
+            }
+        else:
+            self.index = get_shared_index()
+            state = {}
+        
+        # The journal lets a run stop at its time budget and the next one continue
+        self.journal = JobJournal(self.state_path(DEFAULT_JOURNAL_PATH))
+        if new_cycle or self.journal.is_complete():
+            self.journal.start_cycle()
+        self.engine = AsyncDownloadEngine(self.session, journal=self.journal, time_budget=time_budget,
+                                          index=self.index, **state)
+    
+    def state_path(self, default: Path) -> Path:
+        """``default`` (a file in .cache/), or the same file in this shard's state directory"""
+        return self.state_dir / default.name if self.state_dir else default
+        
     def get_character_ids(self):
         """Get character IDs from our data"""
-        try:
-            with open('data/characters/characters.json', 'r', encoding='utf-8') as f:
-                characters = json.load(f)
-            return [char['id'] for char in characters]
-        except:
-            # Fallback character IDs
-            return list(range(10000, 10100))  # Common character ID range
+        char_ids = discover_student_ids()
+        if char_ids:
+            return char_ids
+        # Fallback character IDs; misses are remembered by the negative cache
+        return list(range(10000, 10100))  # Common character ID range
     
-    def download_student_images(self):
-        """Download student images from SchaleDB"""
-        print("🔄 Downloading student images...")
-        
+    def plan_student_jobs(self) -> List[DownloadJob]:
         char_ids = self.get_character_ids()
         image_types = {
             'icon': 'images/student/icon',
@@ -42,193 +86,243 @@ class BlueArchiveImageDownloader:
             'lobby': 'images/student/lobby'
         }
         
-        downloaded = 0
-        
+        jobs = []
         for char_id in char_ids:
-            print(f"🔄 Processing character {char_id}")
-            
             for img_type, local_path in image_types.items():
-                # Create local directory
-                local_dir = Path(local_path)
-                local_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Download image
-                img_file = local_dir / f"{char_id}.webp"
-                
-                if img_file.exists():
-                    continue
-                
-                url = f"{self.base_url}/student/{img_type}/{char_id}.webp"
-                
-                try:
-                    response = self.session.get(url, timeout=30)
-                    if response.status_code == 200:
-                        with open(img_file, 'wb') as f:
-                            f.write(response.content)
-                        print(f"✅ Downloaded {img_type}: {char_id}")
-                        downloaded += 1
-                    else:
-                        print(f"❌ Not found {img_type}: {char_id}")
-                except Exception as e:
-                    print(f"❌ Error downloading {img_type} {char_id}: {e}")
-                
-                time.sleep(0.2)  # Rate limiting
-        
-        print(f"📈 Downloaded {downloaded} student images")
+                jobs.append(DownloadJob(
+                    f"{self.base_url}/student/{img_type}/{char_id}.webp",
+                    Path(local_path) / f"{char_id}.webp",
+                    label=f"{img_type}: {char_id}",
+                    priority=STUDENT_IMAGE_PRIORITY[img_type]
+                ))
+        return jobs
+    
+    def plan_weapon_jobs(self) -> List[DownloadJob]:
+        # Common weapon IDs (based on character IDs)
+        weapon_dir = Path('images/weapon')
+        return [
+            DownloadJob(
+                f"{self.base_url}/weapon/{weapon_id}.webp",
+                weapon_dir / f"{weapon_id}.webp",
+                label=f"weapon: {weapon_id}",
+                priority=1
+            )
+            for weapon_id in self.get_character_ids()
+        ]
+    
+    def plan_equipment_jobs(self) -> List[DownloadJob]:
+        # Equipment icons from data/items/equipment.json
+        equipment_ids = discover_equipment_ids()
+        if not equipment_ids:
+            print("⚠️  No equipment data found, run ba_enhanced_fetcher.py first")
+        equipment_dir = Path('images/equipment')
+        return [
+            DownloadJob(
+                f"{self.base_url}/equipment/{eq_id}.webp",
+                equipment_dir / f"{eq_id}.webp",
+                label=f"equipment: {eq_id}"
+            )
+            for eq_id in equipment_ids
+        ]
+    
+    def plan_ui_jobs(self) -> List[DownloadJob]:
+        ui_categories = {
+            'schoolicon': discover_school_ids(),         # School icons
+            'currency': discover_item_ids('Currency'),   # Currency icons
+            'item': discover_item_ids()                  # Item icons
+        }
+        
+        jobs = []
+        for category, ids in ui_categories.items():
+            category_dir = Path(f'images/{category}')
+            for item_id in ids:
+                jobs.append(DownloadJob(
+                    f"{self.base_url}/{category}/{item_id}.webp",
+                    category_dir / f"{item_id}.webp",
+                    label=f"{category}: {item_id}"
+                ))
+        return jobs
+    
+    def plan_all_jobs(self) -> List[DownloadJob]:
+        """Every category's jobs, limited to this run's shard"""
+        jobs = (self.plan_student_jobs() + self.plan_weapon_jobs()
+                + self.plan_equipment_jobs() + self.plan_ui_jobs())
+        return select_shard(jobs, self.shard)
+    
+    def _download(self, jobs: List[DownloadJob], what: str) -> int:
+        stats = self.engine.run(select_shard(jobs, self.shard))
+        print(f"📈 Downloaded {stats['downloaded']} {what} images")
+        return stats['downloaded']
+    
+    def download_student_images(self):
+        """Download student images from SchaleDB"""
+        print("🔄 Downloading student images...")
+        return self._download(self.plan_student_jobs(), 'student')
     
     def download_weapon_images(self):
         """Download weapon images"""
         print("🔄 Downloading weapon images...")
-        
-        # Create directory
-        weapon_dir = Path('images/weapon')
-        weapon_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Common weapon IDs (based on character IDs)
-        char_ids = self.get_character_ids()
-        downloaded = 0
-        
-        for weapon_id in char_ids:
-            img_file = weapon_dir / f"{weapon_id}.webp"
-            
-            if img_file.exists():
-                continue
-            
-            url = f"{self.base_url}/weapon/{weapon_id}.webp"
-            
-            try:
-                response = self.session.get(url, timeout=30)
-                if response.status_code == 200:
-                    with open(img_file, 'wb') as f:
-                        f.write(response.content)
-                    print(f"✅ Downloaded weapon: {weapon_id}")
-                    downloaded += 1
-            except Exception as e:
-                print(f"❌ Error downloading weapon {weapon_id}: {e}")
-            
-            time.sleep(0.2)
-        
-        print(f"📈 Downloaded {downloaded} weapon images")
+        return self._download(self.plan_weapon_jobs(), 'weapon')
     
     def download_equipment_images(self):
         """Download equipment images"""
         print("🔄 Downloading equipment images...")
-        
-        # Create directory
-        equipment_dir = Path('images/equipment')
-        equipment_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Common equipment IDs
-        equipment_ids = list(range(1, 100))  # Equipment typically 1-99
-        downloaded = 0
-        
-        for eq_id in equipment_ids:
-            img_file = equipment_dir / f"{eq_id}.webp"
-            
-            if img_file.exists():
-                continue
-            
-            url = f"{self.base_url}/equipment/{eq_id}.webp"
-            
-            try:
-                response = self.session.get(url, timeout=30)
-                if response.status_code == 200:
-                    with open(img_file, 'wb') as f:
-                        f.write(response.content)
-                    print(f"✅ Downloaded equipment: {eq_id}")
-                    downloaded += 1
-            except Exception as e:
-                continue  # Skip missing equipment
-            
-            time.sleep(0.1)
-        
-        print(f"📈 Downloaded {downloaded} equipment images")
+        return self._download(self.plan_equipment_jobs(), 'equipment')
     
     def download_ui_images(self):
         """Download UI and misc images"""
         print("🔄 Downloading UI images...")
-        
-        ui_categories = {
-            'schoolicon': list(range(1, 20)),  # School icons
-            'currency': list(range(1, 10)),    # Currency icons
-            'item': list(range(1, 50))         # Item icons
+        return self._download(self.plan_ui_jobs(), 'UI')
+    
+    @staticmethod
+    def _manifest_categories(counts: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+        return {
+            category: {
+                "count": count,
+                "url_pattern": f"{BASE_CDN_URL}/images/{category}/{{id}}.webp"
+            }
+            for category, count in counts.items()
+            if count and not category.startswith(f"{VARIANTS_DIR}/")
         }
+    
+    @staticmethod
+    def _write_manifest(manifest: Dict[str, Any], assets: Dict[str, Dict[str, Any]]):
+        manifest["categories"] = dict(sorted(manifest["categories"].items()))
+        manifest["total_images"] = sum(c["count"] for c in manifest["categories"].values())
+        # Per-file hash/size/dimensions and versioned URLs for precise cache-busting
+        manifest["version"] = content_version(assets)
+        manifest["assets"] = with_urls(BASE_CDN_URL, assets)
         
-        total_downloaded = 0
+        write_json(manifest, 'image_manifest.json')
         
-        for category, ids in ui_categories.items():
-            # Create directory
-            category_dir = Path(f'images/{category}')
-            category_dir.mkdir(parents=True, exist_ok=True)
-            
-            downloaded = 0
-            
-            for item_id in ids:
-                img_file = category_dir / f"{item_id}.webp"
-                
-                if img_file.exists():
-                    continue
-                
-                url = f"{self.base_url}/{category}/{item_id}.webp"
-                
-                try:
-                    response = self.session.get(url, timeout=30)
-                    if response.status_code == 200:
-                        with open(img_file, 'wb') as f:
-                            f.write(response.content)
-                        print(f"✅ Downloaded {category}: {item_id}")
-                        downloaded += 1
-                except:
-                    continue
-                
-                time.sleep(0.1)
-            
-            print(f"📈 Downloaded {downloaded} {category} images")
-            total_downloaded += downloaded
-        
-        return total_downloaded
+        print(f"✅ Created manifest: {manifest['total_images']} total images")
     
     def create_image_manifest(self):
         """Create manifest of all downloaded images"""
         print("🔄 Creating image manifest...")
         
+        index = self.index
+        changed = index.take_pending()
+        
+        # Only categories touched since the last manifest are recounted
+        try:
+            with open('image_manifest.json', 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            manifest = None
+        if manifest is None or '*' in changed:
+            manifest = {"base_url": BASE_CDN_URL, "categories": {}, "total_images": 0}
+            counts = index.category_counts()
+        else:
+            counts = index.category_counts(categories=changed)
+            for category in changed:
+                manifest["categories"].pop(category, None)
+        
+        manifest["categories"].update(self._manifest_categories(counts))
+        manifest["variants"] = VariantPipeline(index=index).manifest_section(BASE_CDN_URL)
+        
+        # Hashes are reused for files whose size/mtime did not change
+        builder = AssetManifestBuilder(index=index, path=self.state_path(DEFAULT_METADATA_PATH))
+        self._write_manifest(manifest, builder.describe())
+        builder.save()
+        index.save()
+    
+    def write_shard_manifest(self, jobs: List[DownloadJob], variants: VariantPipeline):
+        """Write this shard's partial manifest (its files and their variants)"""
+        index = self.index
+        relpaths = []
+        for job in jobs:
+            rel = index.relative(job.dest)
+            if rel and index.exists(job.dest):
+                relpaths.append(rel)
+                relpaths.extend(
+                    variant for variant in variants.outputs_for(rel)
+                    if index.exists(self.images_dir / variant)
+                )
+        builder = AssetManifestBuilder(index=index, path=self.state_path(DEFAULT_METADATA_PATH))
+        path = write_partial_manifest(self.shard, relpaths, assets=builder.describe(relpaths=relpaths))
+        builder.save()
+        index.save()
+        print(f"✅ Wrote partial manifest {path} ({len(relpaths)} files)")
+    
+    @classmethod
+    def merge_shard_manifests(cls, directory='.'):
+        """Combine every shard's partial manifest into image_manifest.json"""
+        print("🔄 Merging shard manifests...")
+        
+        files, assets, shards, total = merge_partial_manifests(directory)
+        if total is None:
+            print("❌ No partial manifests found")
+            return
+        missing = sorted(set(range(1, total + 1)) - set(shards))
+        if missing:
+            print(f"⚠️  Missing shards {missing} of {total}; manifest will be incomplete")
+        
+        def count(category, suffix):
+            return sum(1 for name in files.get(category, ()) if name.endswith(suffix))
+        
+        counts = {category: count(category, '.webp') for category in files}
         manifest = {
-            "base_url": "https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main",
-            "categories": {},
-            "total_images": 0
+            "base_url": BASE_CDN_URL,
+            "categories": cls._manifest_categories(counts),
+            "variants": variant_manifest_section(BASE_CDN_URL, count)
         }
+        cls._write_manifest(manifest, assets)
+    
+    def plan_delta(self, jobs: List[DownloadJob]) -> List[DownloadJob]:
+        """Jobs whose upstream blob is new or changed; falls back to all jobs without a listing"""
+        listing = load_listing(self.listing) if self.listing else fetch_listing(self.session)
+        if listing is None:
+            self.planner = None
+            return jobs
         
-        # Count images in each category
-        for category_path in self.images_dir.rglob('*'):
-            if category_path.is_dir():
-                images = list(category_path.glob('*.webp'))
-                if images:
-                    relative_path = category_path.relative_to(self.images_dir)
-                    manifest["categories"][str(relative_path)] = {
-                        "count": len(images),
-                        "url_pattern": f"{manifest['base_url']}/images/{relative_path}/{{id}}.webp"
-                    }
-                    manifest["total_images"] += len(images)
-        
-        # Save manifest
-        with open('image_manifest.json', 'w', encoding='utf-8') as f:
-            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        self.planner = DeltaPlanner(listing, path=self.state_path(DELTA_STATE_PATH))
+        plan = self.planner.plan(jobs)
+        print(f"📋 Remote listing: {plan.summary()}")
+        for key in plan.deleted:
+            print(f"🗑️  Deleted upstream: {key}")
+        self.planner.forget(plan.deleted)
         
-        print(f"✅ Created manifest: {manifest['total_images']} total images")
+        # Settle skipped jobs in the journal so the cycle can complete
+        for skipped, state in ((plan.unchanged, DONE), (plan.absent, MISSING)):
+            self.journal.plan(skipped)
+            self.journal.mark(skipped, state)
+        return plan.queued
     
     def run(self):
         """Run complete image download process"""
         print("🚀 Blue Archive Image Downloader")
+        if self.shard:
+            print(f"🧩 Shard {self.shard[0]}/{self.shard[1]}")
         print("=" * 50)
         
-        # Download all image categories
-        self.download_student_images()
-        self.download_weapon_images()
-        self.download_equipment_images()
-        ui_count = self.download_ui_images()
+        # All categories go through one engine run so they download concurrently
+        jobs = self.plan_all_jobs()
+        queued = self.plan_delta(jobs) if self.delta else jobs
+        print(f"🔄 Downloading {len(queued)} images...")
+        stats = self.engine.run(queued)
+        print(f"📈 Downloaded {stats['downloaded']} images")
+        if self.delta and self.planner:
+            self.planner.commit(queued)
+            self.planner.save()
+        
+        # Resized WebP/AVIF variants for the CDN
+        sources = {self.index.relative(job.dest) for job in jobs} if self.shard else None
+        variants = VariantPipeline(index=self.index, state_path=self.state_path(VARIANTS_STATE_PATH),
+                                   sources=sources)
+        variants.run()
         
-        # Create manifest
-        self.create_image_manifest()
+        # Create manifest (a partial one per shard; merge with --merge-manifests)
+        if self.shard:
+            self.write_shard_manifest(jobs, variants)
+        else:
+            self.create_image_manifest()
+        
+        counts = self.journal.counts()
+        self.journal.close()
+        if counts.get('pending') or self.engine.out_of_time():
+            print(f"\n⏸️  Time budget reached, {counts.get('pending', 0)} images left for the next run")
+            return
         
         print("\n🎉 Image download complete!")
         print("📁 All images organized by category")
@@ -236,7 +330,27 @@ class BlueArchiveImageDownloader:
         print("\nNext: Upload to GitHub repository")
 
 def main():
-    downloader = BlueArchiveImageDownloader()
+    parser = argparse.ArgumentParser(description="Download Blue Archive images from SchaleDB")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="stop starting new downloads after this many seconds; rerun to resume")
+    parser.add_argument('--new-cycle', action='store_true',
+                        help="requeue every image instead of resuming the previous run")
+    parser.add_argument('--shard', type=parse_shard, default=None, metavar='K/N',
+                        help="only handle shard K of N (1-based) and write a partial manifest")
+    parser.add_argument('--delta', action='store_true',
+                        help="only fetch images that are new or changed in the upstream git tree listing")
+    parser.add_argument('--listing', default=None, metavar='FILE',
+                        help="diff against a saved git/trees listing instead of fetching it (implies --delta)")
+    parser.add_argument('--merge-manifests', nargs='?', const='.', default=None, metavar='DIR',
+                        help="merge the partial shard manifests in DIR into image_manifest.json")
+    args = parser.parse_args()
+    
+    if args.merge_manifests is not None:
+        BlueArchiveImageDownloader.merge_shard_manifests(args.merge_manifests)
+        return
+    
+    downloader = BlueArchiveImageDownloader(time_budget=args.time_budget, new_cycle=args.new_cycle,
+                                            shard=args.shard, delta=args.delta, listing=args.listing)
     downloader.run()
 
 if __name__ == "__main__":
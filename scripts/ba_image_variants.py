@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Image Variants
+Renders resized WebP/AVIF variants of downloaded images across a process pool
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from ba_asset_index import LocalAssetIndex, atomic_write_json, get_shared_index
+
+VARIANTS_DIR = 'variants'
+DEFAULT_STATE_PATH = Path('.cache') / 'variants_state.json'
+
+DEFAULT_VARIANTS = [
+    {'name': '64', 'size': 64, 'format': 'webp', 'quality': 80},
+    {'name': '128', 'size': 128, 'format': 'webp', 'quality': 80},
+    {'name': '256', 'size': 256, 'format': 'webp', 'quality': 80},
+    {'name': '256', 'size': 256, 'format': 'avif', 'quality': 55},
+]
+
+# Layouts served through the CDN URLs in create_cdn_manifest / ba_sync_complete
+DEFAULT_CATEGORIES = [
+    'characters/icons',
+    'characters/portraits',
+    'characters/collection',
+    'student/icon',
+    'student/portrait',
+    'student/collection',
+]
+
+PIL_FORMATS = {'webp': 'WEBP', 'avif': 'AVIF', 'png': 'PNG'}
+
+def variant_key(spec: Dict[str, Any]) -> str:
+    return f"{spec['name']}_{spec['format']}"
+
+def variant_category(category: str, spec: Dict[str, Any]) -> str:
+    return f"{VARIANTS_DIR}/{category}/{spec['name']}"
+
+def variant_relpath(category: str, spec: Dict[str, Any], image_id) -> str:
+    return f"{variant_category(category, spec)}/{image_id}.{spec['format']}"
+
+def variant_url(base_url: str, category: str, spec: Dict[str, Any], image_id='{id}') -> str:
+    return f"{base_url}/images/{variant_relpath(category, spec, image_id)}"
+
+def supported_formats() -> Optional[set]:
+    """Formats Pillow can write here, or None when Pillow is not installed"""
+    try:
+        from PIL import features
+    except ImportError:
+        return None
+    formats = {'png'}
+    if features.check('webp'):
+        formats.add('webp')
+    try:
+        import pillow_avif  # noqa: F401  (registers the AVIF plugin on older Pillow)
+        formats.add('avif')
+    except ImportError:
+        if features.check('avif'):
+            formats.add('avif')
+    return formats
+
+def _render(src: str, targets: List[Tuple[str, int, str, int]]) -> str:
+    """Worker: render every target variant of one source image"""
+    from PIL import Image
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+
+    with Image.open(src) as image:
+        image.load()
+        for path, size, fmt, quality in targets:
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            # Dot-prefixed so the asset index and globs never pick up a partial file
+            tmp_path = Path(path).with_name('.' + Path(path).name + '.tmp')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            variant.save(tmp_path, PIL_FORMATS[fmt], quality=quality)
+            os.replace(tmp_path, path)
+    return src
+
+class VariantPipeline:
+    def __init__(self, images_dir='images', specs: Optional[List[Dict[str, Any]]] = None,
+                 categories: Optional[List[str]] = None, workers: Optional[int] = None,
+                 index: Optional[LocalAssetIndex] = None, state_path=DEFAULT_STATE_PATH,
+                 sources: Optional[set] = None):
+        self.images_dir = Path(images_dir)
+        # Optional subset of source paths (relative to images/), e.g. one shard's files
+        self.sources = sources
+        self.specs = specs or DEFAULT_VARIANTS
+        self.categories = categories or DEFAULT_CATEGORIES
+        self.workers = workers
+        self.index = index or get_shared_index()
+        self.state_path = Path(state_path)
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+
+    def _source_entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        categories = set(self.categories)
+        return [
+            (rel, entry) for rel, entry in list(self.index.entries.items())
+            if entry['category'] in categories and (self.sources is None or rel in self.sources)
+        ]
+
+    def _signature(self, specs) -> str:
+        return json.dumps(specs, sort_keys=True)
+
+    def plan(self, specs) -> List[Tuple[str, Dict[str, Any], List[Tuple[str, int, str, int]]]]:
+        """Sources whose size/mtime or variant specs changed, or whose outputs are missing"""
+        signature = self._signature(specs)
+        work = []
+        for rel, entry in self._source_entries():
+            targets = [
+                (str(self.images_dir / variant_relpath(entry['category'], spec, entry['id'])),
+                 spec['size'], spec['format'], spec['quality'])
+                for spec in specs
+            ]
+            previous = self.state.get(rel)
+            unchanged = (
+                previous is not None
+                and previous['size'] == entry['size']
+                and previous['mtime'] == entry['mtime']
+                and previous['signature'] == signature
+                and all(self.index.exists(path) for path, _, _, _ in targets)
+            )
+            if not unchanged:
+                work.append((rel, entry, targets))
+        return work
+
+    def run(self) -> Dict[str, int]:
+        stats = {'rendered': 0, 'unchanged': 0, 'failed': 0}
+        formats = supported_formats()
+        if formats is None:
+            print("⚠️  Pillow is not installed, skipping image variants")
+            return stats
+        specs = [spec for spec in self.specs if spec['format'] in formats]
+        for spec in self.specs:
+            if spec['format'] not in formats:
+                print(f"⚠️  {spec['format']} is not supported by this Pillow build, skipping {variant_key(spec)}")
+
+        work = self.plan(specs)
+        stats['unchanged'] = len(self._source_entries()) - len(work)
+        if not work:
+            return stats
+
+        print(f"🔄 Rendering variants for {len(work)} images...")
+        signature = self._signature(specs)
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(_render, str(self.images_dir / rel), targets): (rel, entry, targets)
+                for rel, entry, targets in work
+            }
+            for future in as_completed(futures):
+                rel, entry, targets = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"❌ Error rendering variants of {rel}: {e}")
+                    stats['failed'] += 1
+                    continue
+                for path, _, _, _ in targets:
+                    self.index.add(path)
+                self.state[rel] = {'size': entry['size'], 'mtime': entry['mtime'], 'signature': signature}
+                stats['rendered'] += 1
+
+        self.save()
+        self.index.save()
+        print(f"📈 Rendered variants for {stats['rendered']} images")
+        return stats
+
+    def outputs_for(self, rel: str) -> List[str]:
+        """Variant paths (relative to images/) rendered from one source"""
+        category, _, name = rel.rpartition('/')
+        image_id = name.split('.', 1)[0]
+        return [variant_relpath(category, spec, image_id) for spec in self.specs]
+
+    def manifest_section(self, base_url: str) -> Dict[str, Dict[str, Any]]:
+        """{category: {variant: {count, url_pattern}}} for the image manifest"""
+        def count(category, suffix):
+            return sum(self.index.category_counts(suffix=suffix, categories={category}).values())
+        return variant_manifest_section(base_url, count, self.specs, self.categories)
+
+    def save(self):
+        atomic_write_json(self.state_path, self.state, sort_keys=True)
+
+def variant_manifest_section(base_url: str, count: Callable[[str, str], int],
+                             specs: Optional[List[Dict[str, Any]]] = None,
+                             categories: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Build the manifest's variants section; ``count(category, suffix)`` counts files"""
+    section: Dict[str, Dict[str, Any]] = {}
+    for category in categories or DEFAULT_CATEGORIES:
+        for spec in specs or DEFAULT_VARIANTS:
+            total = count(variant_category(category, spec), f".{spec['format']}")
+            if total:
+                section.setdefault(category, {})[variant_key(spec)] = {
+                    "count": total,
+                    "size": spec['size'],
+                    "format": spec['format'],
+                    "url_pattern": variant_url(base_url, category, spec)
+                }
+    return section
+
+def character_variant_urls(base_url: str, char_id,
+                           index: Optional[LocalAssetIndex] = None) -> Dict[str, Dict[str, str]]:
+    """Per image type URLs of the variants rendered for a character row (``images.variants``)"""
+    index = index or get_shared_index()
+    types = {'icon': 'characters/icons', 'portrait': 'characters/portraits', 'collection': 'characters/collection'}
+    urls = {}
+    for img_type, category in types.items():
+        rendered = {
+            variant_key(spec): variant_url(base_url, category, spec, char_id)
+            for spec in DEFAULT_VARIANTS
+            if index.exists(index.images_dir / variant_relpath(category, spec, char_id))
+        }
+        if rendered:
+            urls[img_type] = rendered
+    return urls
+
+def cdn_url_formats(base_url: str = '{base_url}', index: Optional[LocalAssetIndex] = None) -> Dict[str, str]:
+    """url_format entries for the CDN manifests, for the variants that have been rendered"""
+    index = index or get_shared_index()
+    return {
+        f"character_icon_{variant_key(spec)}": variant_url(base_url, 'characters/icons', spec)
+        for spec in DEFAULT_VARIANTS
+        if index.category_counts(suffix=f".{spec['format']}",
+                                 categories={variant_category('characters/icons', spec)})
+    }
+
+def parse_variants(sizes: str, formats: str) -> List[Dict[str, Any]]:
+    specs = []
+    for size in sizes.split(','):
+        for fmt in formats.split(','):
+            specs.append({
+                'name': size.strip(),
+                'size': int(size),
+                'format': fmt.strip(),
+                'quality': 55 if fmt.strip() == 'avif' else 80
+            })
+    return specs
+
+def main():
+    parser = argparse.ArgumentParser(description="Render resized image variants for the CDN")
+    parser.add_argument('--sizes', help="comma-separated max edge sizes, e.g. 64,128,256")
+    parser.add_argument('--formats', default='webp,avif', help="comma-separated output formats")
+    parser.add_argument('--workers', type=int, default=None, help="process pool size")
+    args = parser.parse_args()
+
+    specs = parse_variants(args.sizes, args.formats) if args.sizes else None
+    VariantPipeline(specs=specs, workers=args.workers).run()
+
+if __name__ == "__main__":
+    main()
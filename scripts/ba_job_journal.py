@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Job Journal
+Durable SQLite record of planned downloads so interrupted runs resume where they stopped
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Iterable
+
+from ba_asset_index import ensure_dir
+
+DEFAULT_JOURNAL_PATH = Path('.cache') / 'download_journal.sqlite3'
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+MISSING = 'missing'
+STATES = (PENDING, IN_FLIGHT, DONE, FAILED, MISSING)
+
+# Engine outcome -> journal state
+OUTCOME_STATES = {
+    'downloaded': DONE,
+    'linked': DONE,
+    'skipped': DONE,
+    'missing': MISSING,
+    'known_missing': MISSING,
+    'failed': FAILED
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    dest TEXT PRIMARY KEY,
+    urls TEXT NOT NULL,
+    label TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, priority);
+"""
+
+class JobJournal:
+    """One row per destination file; a cycle ends when nothing is pending or failed"""
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, max_attempts: int = 5):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        ensure_dir(self.path.parent)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        # Anything in flight when the last run died is retried
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET state = ? WHERE state = ?", (PENDING, IN_FLIGHT))
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {state: count for state, count in rows}
+
+    def is_complete(self) -> bool:
+        counts = self.counts()
+        return bool(counts) and not counts.get(PENDING) and not self._retryable()
+
+    def _retryable(self) -> int:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = ? AND attempts < ?",
+                (FAILED, self.max_attempts)
+            ).fetchone()
+        return row[0]
+
+    def start_cycle(self):
+        """Queue every known job again (e.g. for a new game version)"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE jobs SET state = ?, attempts = 0, last_error = NULL", (PENDING,))
+
+    def plan(self, jobs: Iterable):
+        """Add jobs not seen before; existing rows keep their state"""
+        now = time.time()
+        rows = [
+            (str(job.dest), json.dumps(job.urls), job.label, job.priority, now)
+            for job in jobs
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO jobs (dest, urls, label, priority, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(dest) DO UPDATE SET urls = excluded.urls, priority = excluded.priority",
+                rows
+            )
+
+    def runnable(self, jobs: Iterable) -> List:
+        """Subset of ``jobs`` still to do: pending first, then failed by fewest attempts"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT dest, state, attempts FROM jobs WHERE state = ? OR (state = ? AND attempts < ?)",
+                (PENDING, FAILED, self.max_attempts)
+            ).fetchall()
+        todo = {dest: (state != PENDING, attempts) for dest, state, attempts in rows}
+        selected = [job for job in jobs if str(job.dest) in todo]
+        selected.sort(key=lambda job: (todo[str(job.dest)], -job.priority))
+        return selected
+
+    def mark(self, jobs: Iterable, state: str, error: str = None):
+        now = time.time()
+        params = [(state, 1 if state == FAILED else 0, error, now, str(job.dest)) for job in jobs]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE jobs SET state = ?, attempts = attempts + ?, last_error = ?, updated = ? WHERE dest = ?",
+                params
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Blue Archive JSON Output
+Fast JSON serialization (orjson when installed) and minified/precompressed variants for the CDN
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional
+
+from ba_asset_index import ensure_dir
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Served next to every published output: minified, gzip and brotli
+MIN_SUFFIX = '.min.json'
+GZIP_SUFFIX = '.json.gz'
+BROTLI_SUFFIX = '.json.br'
+GZIP_LEVEL = 9
+# Quality 11 is ~100x slower for ~5% smaller files
+BROTLI_QUALITY = 9
+
+_brotli_warned = False
+
+def dumps(data: Any, indent: Optional[int] = 2, ensure_ascii: bool = False) -> bytes:
+    """UTF-8 bytes of ``json.dumps(data, indent=indent, ensure_ascii=ensure_ascii)``.
+
+    orjson produces the same text for the default 2-space, non-ASCII form;
+    only floats written in exponent form are spelled differently (``1e16``).
+    """
+    if orjson is not None and indent == 2 and not ensure_ascii:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # values orjson rejects (e.g. integers over 64 bits)
+    return json.dumps(data, indent=indent, ensure_ascii=ensure_ascii).encode('utf-8')
+
+def dumps_min(data: Any) -> bytes:
+    """Minified UTF-8 JSON"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def variant_paths(path) -> List[Path]:
+    """The ``.min.json``, ``.json.gz`` and ``.json.br`` files published next to ``path``"""
+    path = Path(path)
+    stem = path.name[:-len('.json')] if path.name.endswith('.json') else path.name
+    return [path.with_name(stem + suffix) for suffix in (MIN_SUFFIX, GZIP_SUFFIX, BROTLI_SUFFIX)]
+
+class _AtomicFile:
+    """Binary file written under a temp name and moved into place by ``commit``"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        ensure_dir(path.parent)
+        fd, self.tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        self.file = os.fdopen(fd, 'wb')
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_name, self.path)
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.tmp_name):
+            os.unlink(self.tmp_name)
+
+class VariantWriter:
+    """Streams minified JSON into the ``.min.json``, ``.json.gz`` and ``.json.br`` variants at once.
+
+    Compressed files are reproducible (no gzip timestamp), so unchanged data
+    leaves them byte-identical. Brotli is skipped when the module is missing.
+    """
+
+    def __init__(self, path):
+        global _brotli_warned
+        min_path, gzip_path, brotli_path = variant_paths(path)
+        self.files = [_AtomicFile(min_path), _AtomicFile(gzip_path)]
+        self.gzip = gzip.GzipFile(filename='', mode='wb', fileobj=self.files[1].file,
+                                  compresslevel=GZIP_LEVEL, mtime=0)
+        self.brotli = None
+        if brotli is not None:
+            self.files.append(_AtomicFile(brotli_path))
+            self.brotli = brotli.Compressor(mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+        elif not _brotli_warned:
+            _brotli_warned = True
+            print(f"⚠️  brotli is not installed, skipping {BROTLI_SUFFIX} variants")
+
+    def write(self, data: bytes):
+        self.files[0].file.write(data)
+        self.gzip.write(data)
+        if self.brotli is not None:
+            self.files[2].file.write(self.brotli.process(data))
+
+    def close(self):
+        self.gzip.close()
+        if self.brotli is not None:
+            self.files[2].file.write(self.brotli.finish())
+        for f in self.files:
+            f.commit()
+
+    def discard(self):
+        for f in self.files:
+            f.discard()
+
+def write_json(data: Any, path, variants: bool = True, indent: Optional[int] = 2):
+    """Write ``data`` as pretty JSON (for git diffs) and, by default, its CDN variants"""
+    pretty = _AtomicFile(Path(path))
+    try:
+        pretty.file.write(dumps(data, indent=indent))
+        pretty.commit()
+    except BaseException:
+        pretty.discard()
+        raise
+    if variants:
+        write_variants(data, path)
+
+def write_variants(data: Any, path):
+    """Write only the minified and precompressed variants of ``path``"""
+    writer = VariantWriter(path)
+    try:
+        writer.write(dumps_min(data))
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
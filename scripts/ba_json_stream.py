@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Blue Archive JSON Streaming
+Record-at-a-time parsing of large upstream JSON files and incremental JSON writing
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+import requests
+
+from ba_asset_index import ensure_dir
+from ba_download_engine import stream_to_temp
+from ba_http_cache import ValidatorCache, get_shared_cache
+from ba_json_output import VariantWriter, dumps, dumps_min
+
+SPOOL_DIR = Path('.cache') / 'spool'
+READ_SIZE = 64 * 1024
+
+try:
+    import ijson  # C-accelerated incremental parser when installed
+except ImportError:
+    ijson = None
+
+# Raised by iter_json_records for malformed input, whichever parser is in use
+JSON_ERRORS = (ValueError, ijson.JSONError) if ijson is not None else (ValueError,)
+
+class _Reader:
+    """Incremental ``raw_decode`` over a text file; memory is bounded by the largest record"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.buffer = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.fp.read(READ_SIZE)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"expected one of {chars!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+def _iter_array(fp) -> Iterator[Any]:
+    reader = _Reader(fp)
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
+
+def _iter_object(fp) -> Iterator[Tuple[str, Any]]:
+    reader = _Reader(fp)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        yield key, reader.value()
+        if reader.expect(',}') == '}':
+            return
+
+def is_json_object(path) -> bool:
+    """True when the file's top-level value is an object rather than an array"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return _Reader(f).peek() == '{'
+
+def iter_json_records(path) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array, or ``(key, value)`` pairs of an object"""
+    is_object = is_json_object(path)
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            if is_object:
+                yield from ijson.kvitems(f, '', use_float=True)
+            else:
+                yield from ijson.items(f, 'item', use_float=True)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from (_iter_object(f) if is_object else _iter_array(f))
+
+class JsonArrayWriter:
+    """Writes a JSON array one element at a time, byte-identical to ``json.dump(items, indent=indent)``.
+
+    The output is built in a temp file and moved into place on a clean exit.
+    With ``variants`` the minified and precompressed copies (see
+    ba_json_output) are streamed alongside.
+    """
+
+    def __init__(self, path, indent: Optional[int] = 2, ensure_ascii: bool = False, variants: bool = False):
+        self.path = Path(path)
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.variants = variants
+        self.count = 0
+
+    def __enter__(self) -> 'JsonArrayWriter':
+        ensure_dir(self.path.parent)
+        fd, self.tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix='.tmp')
+        self.file = os.fdopen(fd, 'wb')
+        self.file.write(b'[')
+        self.variant_writer = VariantWriter(self.path) if self.variants else None
+        if self.variant_writer:
+            self.variant_writer.write(b'[')
+        return self
+
+    def write(self, item: Any):
+        text = dumps(item, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        if self.indent is None:
+            self.file.write((b', ' if self.count else b'') + text)
+        else:
+            pad = b' ' * self.indent
+            self.file.write((b',\n' if self.count else b'\n') + pad + text.replace(b'\n', b'\n' + pad))
+        if self.variant_writer:
+            self.variant_writer.write((b',' if self.count else b'') + dumps_min(item))
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.file.write(b'\n]' if self.count and self.indent is not None else b']')
+            self.file.close()
+            if exc_type is None:
+                os.replace(self.tmp_name, self.path)
+                if self.variant_writer:
+                    self.variant_writer.write(b']')
+                    self.variant_writer.close()
+            elif self.variant_writer:
+                self.variant_writer.discard()
+        finally:
+            if os.path.exists(self.tmp_name):
+                os.unlink(self.tmp_name)
+        return False
+
+def fetch_to_spool(session: requests.Session, url: str, output=None,
+                   cache: Optional[ValidatorCache] = None, conditional: bool = True, **kwargs) -> Tuple[Optional[str], Optional[requests.Response], Optional[str]]:
+    """Conditional GET that streams the body to a spool file instead of memory.
+
+    Returns ``(spool_path, response, sha256)``; ``spool_path`` is None when
+    upstream is unchanged (304, or the same body hash as last time while
+    ``output`` exists); ``conditional=False`` always downloads. The caller removes the spool file and, once its
+    output is written, calls ``cache.remember(url, response, sha256)``.
+    """
+    cache = cache or get_shared_cache()
+    headers = dict(kwargs.pop('headers', None) or {})
+    have_output = conditional and (output is None or Path(output).exists())
+    if have_output:
+        headers.update(cache.conditional_headers(url))
+
+    response = session.get(url, headers=headers, stream=True, **kwargs)
+    if response.status_code == 304:
+        response.close()
+        return None, response, None
+    response.raise_for_status()
+    spool, sha256 = stream_to_temp(response, SPOOL_DIR, Path(url).name)
+    if have_output and cache.get(url).get('sha256') == sha256:
+        os.unlink(spool)
+        return None, response, sha256
+    return spool, response, sha256
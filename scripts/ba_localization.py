@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Localization
+Fetches every SchaleDB locale concurrently and merges them by student Id
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import requests
+
+from ba_download_engine import IncompleteDownloadError
+from ba_http import get_session
+from ba_http_cache import get_shared_cache
+from ba_json_output import write_json
+from ba_json_stream import JSON_ERRORS, fetch_to_spool, iter_json_records
+from ba_snapshot import write_snapshot
+
+SCHALEDB_LOCALES = ['en', 'jp', 'kr', 'tw', 'cn', 'zh', 'th', 'vi']
+SCHALEDB_LOCALE_URL = "https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/data/{locale}/students.json"
+LOCALIZATION_DIR = Path('data') / 'localization'
+MERGED_FILE = 'students.json'
+# Locale whose values fill locale-independent fields first
+BASE_LOCALE = 'en'
+# Student fields whose text differs by locale, dotted and without list indices
+LOCALIZED_FIELDS = frozenset({
+    'Name', 'FamilyName', 'FamilyNameRuby', 'PersonalName', 'SchoolYear', 'CharacterAge', 'Birthday',
+    'CharacterSSRNew', 'ProfileIntroduction', 'Hobby', 'CharacterVoice', 'Illustrator', 'Designer',
+    'CharHeightMetric', 'CharHeightImperial', 'WeaponName', 'WeaponDesc',
+    'Weapon.Name', 'Weapon.Desc', 'Gear.Name', 'Gear.Desc', 'Skills.Name', 'Skills.Desc',
+})
+
+_MISSING = object()
+# A locale failing with one of these is left out of the merge instead of aborting it
+LOCALE_ERRORS = (requests.RequestException, IncompleteDownloadError) + JSON_ERRORS
+
+def locale_url(locale: str) -> str:
+    return SCHALEDB_LOCALE_URL.format(locale=locale)
+
+def merge_values(values: Dict[str, Any], field: str = '') -> Any:
+    """Merge one field across locales.
+
+    Values equal in every locale are stored once. A ``LOCALIZED_FIELDS``
+    value that differs becomes a ``{locale: value}`` map; objects and
+    equal-length lists are merged member by member. Any other field that
+    differs (e.g. a locale lagging behind an update) keeps the base locale's
+    value.
+    """
+    present = [value for value in values.values() if value is not _MISSING]
+    first = present[0]
+    # A locale that lacks the field entirely does not make it locale-specific
+    if all(value == first for value in present):
+        return first
+    if field in LOCALIZED_FIELDS:
+        return {locale: value for locale, value in values.items() if value is not _MISSING}
+    if all(isinstance(value, dict) for value in present):
+        keys = list(dict.fromkeys(key for value in present for key in value))
+        return {
+            key: merge_values({
+                locale: value.get(key, _MISSING) if value is not _MISSING else _MISSING
+                for locale, value in values.items()
+            }, f"{field}.{key}" if field else key)
+            for key in keys
+        }
+    if all(isinstance(value, list) for value in present) and len({len(value) for value in present}) == 1:
+        return [
+            merge_values({
+                locale: value[i] if value is not _MISSING else _MISSING
+                for locale, value in values.items()
+            }, field)
+            for i in range(len(first))
+        ]
+    return first
+
+def _localized_paths(merged: Any, field: str = '', path: str = '') -> List[Tuple[str, Dict[str, Any]]]:
+    """(dotted path, {locale: value}) for every per-locale map in a merged record.
+
+    ``field`` is the ``LOCALIZED_FIELDS`` spelling of the node (no list
+    indices); ``path`` includes them.
+    """
+    if field in LOCALIZED_FIELDS:
+        return [(path, merged)] if isinstance(merged, dict) else []
+    if isinstance(merged, dict):
+        children = ((f"{field}.{key}" if field else key, f"{path}.{key}" if path else key, value)
+                    for key, value in merged.items())
+    elif isinstance(merged, list):
+        children = ((field, f"{path}.{i}", value) for i, value in enumerate(merged))
+    else:
+        return []
+    found = []
+    for child_field, child_path, value in children:
+        found.extend(_localized_paths(value, child_field, child_path))
+    return found
+
+def merge_locales(students_by_locale: Dict[str, Dict[Any, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """One record per student Id, ordered by first appearance in the base locale"""
+    locales = list(students_by_locale)
+    ordered = sorted(locales, key=lambda locale: locale != BASE_LOCALE)
+    ids = list(dict.fromkeys(
+        student_id for locale in ordered for student_id in students_by_locale[locale]
+    ))
+    merged = []
+    for student_id in ids:
+        values = {locale: students_by_locale[locale].get(student_id, _MISSING) for locale in ordered}
+        record = merge_values(values)
+        record['Id'] = student_id
+        record['Locales'] = [locale for locale in locales if values[locale] is not _MISSING]
+        merged.append(record)
+    return merged
+
+def locale_strings(merged: List[Dict[str, Any]], locales: Sequence[str]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """{locale: {Id: {dotted path: value}}} for the per-locale files
+
+    Only values that differ between locales are listed; a student released
+    in a single locale keeps all of its strings in the merged file.
+    """
+    per_locale: Dict[str, Dict[str, Dict[str, Any]]] = {locale: {} for locale in locales}
+    for record in merged:
+        for path, by_locale in _localized_paths(record):
+            for locale, value in by_locale.items():
+                per_locale[locale].setdefault(str(record['Id']), {})[path] = value
+    return per_locale
+
+def _load_locale(session: requests.Session, locale: str, output: Path, conditional: bool):
+    """Worker: fetch and parse one locale; returns (students, response, sha256) with students None when unchanged"""
+    spool, response, sha256 = fetch_to_spool(session, locale_url(locale), output,
+                                             conditional=conditional, timeout=60)
+    if spool is None:
+        return None, response, sha256
+    try:
+        return _read_students(spool), response, sha256
+    finally:
+        os.unlink(spool)
+
+def _read_students(spool) -> Dict[Any, Dict[str, Any]]:
+    students = {}
+    for record in iter_json_records(spool):
+        student = record[1] if isinstance(record, tuple) else record
+        if isinstance(student, dict) and student.get('Id') is not None:
+            students[student['Id']] = student
+    return students
+
+def _forget_failed(cache, failed: Sequence[str]):
+    """Drop the validators of failed locales so the next run fetches them in full and re-merges"""
+    if failed:
+        print(f"⚠️  Failed locales: {', '.join(failed)}")
+    for locale in failed:
+        cache.forget(locale_url(locale))
+    cache.save()
+
+def fetch_localized_students(locales: Optional[Sequence[str]] = None,
+                             output_dir=LOCALIZATION_DIR) -> Optional[List[Dict[str, Any]]]:
+    """Fetch all locales concurrently, merge by Id and write the localization files.
+
+    Returns the merged records, or None when no locale changed upstream.
+    """
+    locales = list(locales or SCHALEDB_LOCALES)
+    output_dir = Path(output_dir)
+    merged_path = output_dir / MERGED_FILE
+    session = get_session()
+
+    failed: List[str] = []
+
+    def fetch_all(pending: Sequence[str], conditional: bool):
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {
+                locale: executor.submit(_load_locale, session, locale, output_dir / f"{locale}.json", conditional)
+                for locale in pending
+            }
+            results = {}
+            for locale, future in futures.items():
+                try:
+                    results[locale] = future.result()
+                except LOCALE_ERRORS as e:
+                    print(f"⚠️  Skipping locale {locale}: {e}")
+                    failed.append(locale)
+            return results
+
+    cache = get_shared_cache()
+    results = fetch_all(locales, conditional=merged_path.exists())
+    if all(students is None for students, _, _ in results.values()):
+        _forget_failed(cache, failed)
+        if not results:
+            print("❌ No locale could be fetched")
+        else:
+            print("⏭️  Localized data unchanged upstream")
+        return None
+    # Something changed: unchanged locales are needed again for the merge
+    unchanged = [locale for locale, (students, _, _) in results.items() if students is None]
+    if unchanged:
+        results.update(fetch_all(unchanged, conditional=False))
+    for locale in failed:
+        results.pop(locale, None)
+
+    students_by_locale = {}
+    for locale in locales:
+        if locale in results and results[locale][0] is not None:
+            students_by_locale[locale] = results[locale][0]
+            print(f"📥 {locale}: {len(students_by_locale[locale])} students")
+
+    merged = merge_locales(students_by_locale)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_json(merged, merged_path)
+    write_snapshot(merged_path)
+    for locale, strings in locale_strings(merged, list(students_by_locale)).items():
+        write_json(strings, output_dir / f"{locale}.json")
+
+    for locale, (_, response, sha256) in results.items():
+        if response is not None and sha256:
+            cache.remember(locale_url(locale), response, sha256)
+    _forget_failed(cache, failed)
+
+    print(f"✅ Merged {len(merged)} students across {len(students_by_locale)} locales into {output_dir}")
+    return merged
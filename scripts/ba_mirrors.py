@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Mirrors
+Latency-aware mirror selection and racing for sources that host the same files
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from ba_asset_index import atomic_write_json
+
+DEFAULT_STATS_PATH = Path('.cache') / 'mirror_stats.json'
+# Hosts that serve many unrelated repositories; a source there is host/owner/repo
+MULTI_REPO_HOSTS = ('raw.githubusercontent.com', 'cdn.jsdelivr.net')
+
+def source_of(url: str) -> str:
+    parsed = urlparse(url)
+    if parsed.netloc in MULTI_REPO_HOSTS:
+        parts = [p for p in parsed.path.split('/') if p][:2]
+        return '/'.join([parsed.netloc] + parts)
+    return parsed.netloc
+
+class MirrorSelector:
+    """Rolling (EWMA) latency and error rate per source, used to order candidate URLs"""
+
+    def __init__(self, alpha: float = 0.3, error_penalty: float = 10.0, path=DEFAULT_STATS_PATH):
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.stats: Dict[str, Dict[str, float]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.stats = json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def record(self, url: str, latency: float, ok: bool):
+        source = source_of(url)
+        with self.lock:
+            entry = self.stats.get(source)
+            if entry is None:
+                entry = {'latency': latency, 'errors': 0.0 if ok else 1.0}
+            else:
+                entry['latency'] += self.alpha * (latency - entry['latency'])
+                entry['errors'] += self.alpha * ((0.0 if ok else 1.0) - entry['errors'])
+            self.stats[source] = entry
+            self.dirty = True
+
+    def score(self, url: str) -> float:
+        """Expected cost of a request; unseen sources score 0 so they get tried"""
+        with self.lock:
+            entry = self.stats.get(source_of(url))
+        if entry is None:
+            return 0.0
+        return entry['latency'] * (1 + self.error_penalty * entry['errors'])
+
+    def order(self, urls: List[str]) -> List[str]:
+        # sorted() is stable, so ties keep the caller's preference order
+        return sorted(urls, key=self.score)
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            atomic_write_json(self.path, self.stats, sort_keys=True)
+            self.dirty = False
+
+_shared_selector: Optional[MirrorSelector] = None
+_shared_lock = threading.Lock()
+
+def get_shared_selector() -> MirrorSelector:
+    """Process-wide mirror selector, loaded on first use"""
+    global _shared_selector
+    with _shared_lock:
+        if _shared_selector is None:
+            _shared_selector = MirrorSelector()
+        return _shared_selector
+
+def timed_get(session, url: str, selector: Optional[MirrorSelector] = None, **kwargs) -> requests.Response:
+    """session.get that feeds latency and health into the selector.
+
+    Error statuses (4xx/5xx) count as failures: a mirror that answers 404
+    quickly no longer has the file and must not win on latency.
+    """
+    selector = selector or get_shared_selector()
+    started = time.monotonic()
+    try:
+        response = session.get(url, **kwargs)
+    except requests.RequestException:
+        selector.record(url, time.monotonic() - started, ok=False)
+        raise
+    selector.record(url, time.monotonic() - started, ok=response.status_code < 400)
+    return response
+
+def _try_json(session, url: str, validate, selector, timeout) -> Tuple[str, Any]:
+    # Timed here rather than in timed_get so an unparsable or invalid payload
+    # also counts against the mirror
+    started = time.monotonic()
+    try:
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        if validate and not validate(data):
+            raise ValueError(f"invalid payload from {url}")
+    except Exception:
+        selector.record(url, time.monotonic() - started, ok=False)
+        raise
+    selector.record(url, time.monotonic() - started, ok=True)
+    return url, data
+
+def fetch_json(session, urls: List[str], validate: Optional[Callable[[Any], bool]] = None,
+               race: bool = False, timeout: int = 30,
+               selector: Optional[MirrorSelector] = None) -> Tuple[Optional[str], Any]:
+    """Fetch JSON from the healthiest mirror, falling back through the rest.
+
+    With ``race`` the two best mirrors are requested at once and the first
+    valid payload wins. Returns ``(url, data)`` or ``(None, None)``.
+    """
+    selector = selector or get_shared_selector()
+    candidates = selector.order(urls)
+
+    if race and len(candidates) > 1:
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            futures = {
+                executor.submit(_try_json, session, url, validate, selector, timeout): url
+                for url in candidates[:2]
+            }
+            for future in as_completed(futures):
+                try:
+                    return future.result()
+                except Exception as e:
+                    print(f"❌ Failed to fetch from {futures[future]}: {e}")
+        finally:
+            # The losing request finishes in the background and is discarded
+            executor.shutdown(wait=False)
+        candidates = candidates[2:]
+
+    for url in candidates:
+        try:
+            return _try_json(session, url, validate, selector, timeout)
+        except Exception as e:
+            print(f"❌ Failed to fetch from {url}: {e}")
+    return None, None
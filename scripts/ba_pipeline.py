@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Pipeline
+Runs the fetch/process/publish scripts as one stage DAG: independent stages run concurrently, unchanged ones are skipped
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Iterable, Optional, Sequence, Set
+
+from ba_asset_discovery import EQUIPMENT_FILE, ITEMS_FILE, STUDENT_SOURCES
+from ba_asset_index import atomic_write_json
+from ba_dataset_diff import DATASETS as DIFF_DATASETS, VERSION_FILE
+from ba_schema import DEFAULT_FILES
+from ba_snapshot import DEFAULT_OUTPUTS
+from fetch_correct_schaledb import OUTPUT_FILE as CORRECTED_FILE, PENDING_CHANGES_FILE
+
+STATE_PATH = Path('.cache') / 'pipeline_state.json'
+DEFAULT_WORKERS = 4
+
+# Stage outcomes
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+BLOCKED = 'blocked'
+
+class Stage:
+    """One pipeline step and the files it reads and writes.
+
+    Dependencies follow from the files: a stage runs after every stage that
+    writes one of its inputs (plus any named in ``after``). A stage with
+    inputs is skipped when they and its outputs are unchanged since its last
+    successful run; a stage without inputs (an upstream fetch) always runs
+    and relies on its own conditional requests.
+    """
+
+    def __init__(self, name: str, run: Callable[[], Any], inputs: Sequence[str] = (),
+                 outputs: Sequence[str] = (), after: Sequence[str] = (), optional: bool = False,
+                 description: str = ''):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+        # Optional stages (side effects outside the repo) only run when named
+        self.optional = optional
+        self.description = description
+
+def _file_digest(path) -> Optional[str]:
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except (FileNotFoundError, IsADirectoryError):
+        return None
+    return digest.hexdigest()
+
+def fingerprint(paths: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Content hash per file (None when missing)"""
+    return {path: _file_digest(path) for path in paths}
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], state_path=STATE_PATH, workers: int = DEFAULT_WORKERS):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = Path(state_path)
+        self.workers = workers
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state: Dict[str, Dict[str, Any]] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+        self.dependencies = self._dependencies()
+        self.order = self._topological_order()
+
+    def _dependencies(self) -> Dict[str, Set[str]]:
+        writers: Dict[str, str] = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in writers:
+                    raise ValueError(f"{output} is written by both {writers[output]} and {stage.name}")
+                writers[output] = stage.name
+        dependencies = {}
+        for stage in self.stages.values():
+            unknown = [name for name in stage.after if name not in self.stages]
+            if unknown:
+                raise ValueError(f"{stage.name} runs after unknown stages: {', '.join(unknown)}")
+            found = {writers[path] for path in stage.inputs if path in writers} | set(stage.after)
+            found.discard(stage.name)
+            dependencies[stage.name] = found
+        return dependencies
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        while remaining:
+            ready = [name for name in self.stages if name in remaining and not remaining[name]]
+            if not ready:
+                raise ValueError(f"Stage dependencies form a cycle: {', '.join(sorted(remaining))}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def select(self, targets: Optional[Sequence[str]] = None, upstream: bool = True) -> List[str]:
+        """Stages to run for ``targets`` (default: every non-optional stage), in dependency order"""
+        if not targets:
+            targets = [name for name, stage in self.stages.items() if not stage.optional]
+        unknown = [name for name in targets if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+        selected = set(targets)
+        if upstream:
+            pending = list(targets)
+            while pending:
+                for dep in self.dependencies[pending.pop()]:
+                    # Optional stages are never pulled in as a dependency
+                    if dep not in selected and not self.stages[dep].optional:
+                        selected.add(dep)
+                        pending.append(dep)
+        return [name for name in self.order if name in selected]
+
+    def is_current(self, name: str) -> bool:
+        """True when the stage's inputs and outputs match its last successful run"""
+        stage = self.stages[name]
+        saved = self.state.get(name)
+        if not stage.inputs or not saved:
+            return False
+        return (saved.get('inputs') == fingerprint(stage.inputs)
+                and saved.get('outputs') == fingerprint(stage.outputs)
+                and all(digest is not None for digest in saved['outputs'].values()))
+
+    def _run_stage(self, name: str) -> float:
+        started = time.monotonic()
+        print(f"▶️  {name}")
+        self.stages[name].run()
+        return time.monotonic() - started
+
+    def _record(self, name: str):
+        stage = self.stages[name]
+        # Taken after the run, so a stage that rewrites its own input stays current
+        self.state[name] = {'inputs': fingerprint(stage.inputs), 'outputs': fingerprint(stage.outputs)}
+
+    def save(self):
+        atomic_write_json(self.state_path, self.state, sort_keys=True)
+
+    def run(self, names: Sequence[str], force: bool = False) -> Dict[str, str]:
+        """Run the given stages, each as soon as its dependencies are done"""
+        selected = set(names)
+        status: Dict[str, str] = {}
+        durations: Dict[str, float] = {}
+        pending = [name for name in self.order if name in selected]
+        running = {}
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.dependencies[name] & selected
+                    if any(status.get(dep) in (FAILED, BLOCKED) for dep in deps):
+                        status[name] = BLOCKED
+                        pending.remove(name)
+                        print(f"⛔ {name}: blocked by a failed dependency")
+                    elif all(dep in status for dep in deps):
+                        pending.remove(name)
+                        if not force and self.is_current(name):
+                            status[name] = SKIPPED
+                            print(f"⏭️  {name}: inputs unchanged")
+                        else:
+                            running[executor.submit(self._run_stage, name)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        durations[name] = future.result()
+                    except Exception as e:
+                        status[name] = FAILED
+                        print(f"❌ {name} failed: {e}")
+                        continue
+                    status[name] = DONE
+                    self._record(name)
+                    self.save()
+                    print(f"✅ {name} ({durations[name]:.1f}s)")
+
+        elapsed = time.monotonic() - started
+        print(f"\n📊 {len(names)} stages in {elapsed:.1f}s "
+              f"({sum(durations.values()):.1f}s of stage time): "
+              + ', '.join(f"{name} {status[name]}" for name in names))
+        return status
+
+# Stage bodies import their modules lazily, so e.g. a missing supabase
+# package only fails the stage that needs it
+
+def _fetch_schaledb():
+    from fetch_correct_schaledb import process_and_save_data
+    process_and_save_data()
+
+def _fetch_localization():
+    from ba_localization import fetch_localized_students
+    fetch_localized_students()
+
+def _fetch_characters():
+    from ba_enhanced_fetcher import BlueArchiveDataFetcher
+    BlueArchiveDataFetcher().fetch_character_data()
+
+def _fetch_additional():
+    from ba_enhanced_fetcher import BlueArchiveDataFetcher
+    BlueArchiveDataFetcher().fetch_additional_data()
+
+def _clone_students():
+    from ba_schaledb_clone import SchaleDBClone
+    SchaleDBClone().run()
+
+def _normalize():
+    import ba_columnar
+    ba_columnar.main([])
+
+def _download_images():
+    from ba_image_downloader import BlueArchiveImageDownloader
+    BlueArchiveImageDownloader().run()
+
+def _manage_assets():
+    from ba_asset_manager import BlueArchiveAssetManager
+    BlueArchiveAssetManager().run()
+
+def _write_snapshots():
+    import ba_snapshot
+    ba_snapshot.main([])
+
+def _validate():
+    from ba_schema import validate_files
+    reports = validate_files()
+    invalid = [path for path, report in reports.items() if not report.ok]
+    for path in invalid:
+        print(reports[path].summary())
+    if invalid:
+        raise ValueError(f"schema validation failed for {', '.join(invalid)}")
+
+def _write_changes():
+    from ba_dataset_diff import write_changes
+    write_changes()
+
+def _sync_supabase():
+    import sync_corrected_data
+    sync_corrected_data.main([])
+
+STAGES = [
+    Stage('schaledb', _fetch_schaledb, outputs=[CORRECTED_FILE],
+          description="SchaleDB students mapped to the Supabase format"),
+    Stage('localization', _fetch_localization, outputs=['data/localization/students.json'],
+          description="all SchaleDB locales merged by student Id"),
+    Stage('characters', _fetch_characters, outputs=['data/characters/characters.json'],
+          description="torikushii characters"),
+    Stage('additional', _fetch_additional,
+          outputs=['data/items/items.json', 'data/items/equipment.json', 'data/events/events.json'],
+          description="items, equipment and events"),
+    Stage('students', _clone_students, outputs=['data/students.json'],
+          description="SchaleDB-style students.json"),
+    Stage('normalize', _normalize, inputs=['data/characters.json'],
+          outputs=['data/characters_normalized.json', 'data/character_statistics.json'],
+          description="typed columns and statistics"),
+    Stage('images', _download_images,
+          inputs=[path for path, _ in STUDENT_SOURCES] + [EQUIPMENT_FILE, ITEMS_FILE],
+          outputs=['image_manifest.json'],
+          description="images, variants and image_manifest.json"),
+    # Shares images/ and the variant state with the image downloader
+    Stage('assets', _manage_assets, inputs=['data/characters/characters.json'],
+          outputs=['cdn_manifest.json'], after=['images'],
+          description="character images and cdn_manifest.json"),
+    Stage('snapshots', _write_snapshots, inputs=DEFAULT_OUTPUTS,
+          description="MessagePack/Parquet snapshots of the JSON outputs"),
+    Stage('validate', _validate, inputs=list(DEFAULT_FILES),
+          description="record schemas of characters, skills, weapons and equipment"),
+    Stage('changes', _write_changes, inputs=list(DIFF_DATASETS) + [VERSION_FILE],
+          description="patch set and changelog against the previous game version"),
+    Stage('supabase', _sync_supabase, inputs=[CORRECTED_FILE, str(PENDING_CHANGES_FILE)], optional=True,
+          description="push changed characters to Supabase"),
+]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Blue Archive data pipeline")
+    parser.add_argument('stages', nargs='*',
+                        help="stages to run, with their dependencies (default: all but optional ones)")
+    parser.add_argument('--only', action='store_true', help="do not add upstream dependencies")
+    parser.add_argument('--force', action='store_true', help="run stages even when their inputs are unchanged")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="stages run at once")
+    parser.add_argument('--list', action='store_true', help="show the stage graph and exit")
+    parser.add_argument('--dry-run', action='store_true', help="show which stages would run or be skipped")
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(STAGES, workers=args.workers)
+    if args.list:
+        for name in pipeline.order:
+            stage = pipeline.stages[name]
+            deps = ', '.join(sorted(pipeline.dependencies[name])) or '-'
+            flag = ' (optional)' if stage.optional else ''
+            print(f"{name:<13} after: {deps:<40} {stage.description}{flag}")
+        return
+
+    names = pipeline.select(args.stages, upstream=not args.only)
+    if args.dry_run:
+        for name in names:
+            print(f"{name:<13} {'skip (inputs unchanged)' if not args.force and pipeline.is_current(name) else 'run'}")
+        return
+
+    status = pipeline.run(names, force=args.force)
+    if any(result in (FAILED, BLOCKED) for result in status.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Rate Limiter
+Adaptive per-host token buckets shared by every fetcher
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+THROTTLE_STATUSES = (429, 503)
+
+class TokenBucket:
+    """Token bucket whose rate grows additively on success and halves when throttled"""
+
+    def __init__(self, rate: float = 4.0, min_rate: float = 0.5, max_rate: float = 50.0,
+                 increase: float = 0.5, decrease: float = 0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def grow(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.capacity = max(1.0, self.rate)
+
+    def shrink(self, retry_after: Optional[float] = None):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HostRateLimiter:
+    """Hands out one adaptive token bucket per host"""
+
+    def __init__(self, **bucket_options):
+        self.bucket_options = bucket_options
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc or url
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(**self.bucket_options)
+            return self.buckets[host]
+
+    def acquire(self, url: str):
+        self.bucket(url).acquire()
+
+    def record(self, url: str, status_code: int, retry_after: Optional[str] = None):
+        """Feed a response status back so the host rate can adapt"""
+        bucket = self.bucket(url)
+        if status_code in THROTTLE_STATUSES or retry_after:
+            bucket.shrink(parse_retry_after(retry_after))
+        elif status_code < 500:
+            bucket.grow()
+
+    def penalize(self, url: str, retry_after: Optional[float] = None):
+        self.bucket(url).shrink(retry_after)
+
+shared_limiter = HostRateLimiter()
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that passes every request through a HostRateLimiter"""
+
+    def __init__(self, limiter: Optional[HostRateLimiter] = None, **kwargs):
+        self.limiter = limiter or shared_limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire(request.url)
+        response = super().send(request, **kwargs)
+        self.limiter.record(request.url, response.status_code, response.headers.get('Retry-After'))
+        return response
+
+def mount_rate_limiter(session: requests.Session, limiter: Optional[HostRateLimiter] = None,
+                       **adapter_kwargs) -> requests.Session:
+    """Route all of a session's traffic through the (shared) rate limiter"""
+    adapter = RateLimitedAdapter(limiter, **adapter_kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Record State
+Per-record content hashes from the last run, so only added/changed/removed records are reprocessed
+"""
+
+import hashlib
+import itertools
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Set
+
+from ba_asset_index import atomic_write_json
+from ba_json_stream import iter_json_records
+
+STATE_DIR = Path('.cache') / 'record_state'
+
+def record_hash(record: Any) -> str:
+    """Stable hash of a JSON record (key order does not matter)"""
+    text = json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class RecordState:
+    """Raw-record hashes keyed by id, tied to the signature of the code that processed them.
+
+    A different ``signature`` (e.g. a changed mapping) makes every record
+    count as changed.
+    """
+
+    def __init__(self, name: str, signature: str = '', directory=STATE_DIR):
+        self.path = Path(directory) / f"{name}.json"
+        self.signature = signature
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            saved = {}
+        # No saved hashes, or hashes produced by different code: every record is reprocessed
+        self.signature_changed = saved.get('signature') != signature
+        self.previous: Dict[str, str] = {} if self.signature_changed else saved.get('hashes', {})
+        self.current: Dict[str, str] = {}
+        self.added: List[str] = []
+        self.changed: List[str] = []
+
+    def check(self, record_id: Any, record: Any) -> bool:
+        """Record this run's hash; True when the record is new or changed"""
+        key = str(record_id)
+        digest = record_hash(record)
+        self.current[key] = digest
+        old = self.previous.get(key)
+        if old == digest:
+            return False
+        (self.added if old is None else self.changed).append(key)
+        return True
+
+    @property
+    def removed(self) -> List[str]:
+        return [key for key in self.previous if key not in self.current]
+
+    def summary(self) -> str:
+        unchanged = len(self.current) - len(self.added) - len(self.changed)
+        return (f"{len(self.added)} added, {len(self.changed)} changed, "
+                f"{len(self.removed)} removed, {unchanged} unchanged")
+
+    def save(self):
+        atomic_write_json(self.path, {'signature': self.signature, 'hashes': self.current}, sort_keys=True)
+
+class PreviousOutput:
+    """Lazily reads the last run's output to reuse unchanged records.
+
+    Records are consumed in file order. Each ``take`` reads at most
+    ``lookahead`` records past the ones already buffered, and the buffer keeps
+    only the ``lookahead`` most recently skipped records, so memory stays
+    bounded when ids are new or out of order. A record not found in that
+    window returns None and is simply mapped again.
+    """
+
+    def __init__(self, path, id_field: str = 'id', lookahead: int = 256):
+        self.id_field = id_field
+        self.lookahead = lookahead
+        self.buffer: Dict[str, Any] = {}
+        self.records: Iterator[Any] = iter_json_records(path) if Path(path).exists() else iter(())
+
+    def take(self, record_id: Any) -> Optional[Any]:
+        key = str(record_id)
+        if key in self.buffer:
+            return self.buffer.pop(key)
+        for record in itertools.islice(self.records, self.lookahead):
+            found = str(record.get(self.id_field))
+            if found == key:
+                return record
+            self.buffer[found] = record
+            if len(self.buffer) > self.lookahead:
+                # Drop the oldest skipped record; it is re-mapped if requested later
+                del self.buffer[next(iter(self.buffer))]
+        return None
+
+class PendingChanges:
+    """Ids changed upstream that downstream consumers (e.g. the Supabase sync) have not handled yet"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            saved = {}
+        self.upserts: Set[str] = set(saved.get('upserts', []))
+        self.removed: Set[str] = set(saved.get('removed', []))
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def add(self, upserts: Iterable[str] = (), removed: Iterable[str] = ()):
+        upserts, removed = set(upserts), set(removed)
+        self.upserts = (self.upserts - removed) | upserts
+        self.removed = (self.removed - upserts) | removed
+
+    def done(self, ids: Iterable[Any]):
+        ids = {str(record_id) for record_id in ids}
+        self.upserts -= ids
+        self.removed -= ids
+
+    def save(self):
+        atomic_write_json(self.path, {'upserts': sorted(self.upserts), 'removed': sorted(self.removed)},
+                          sort_keys=True)
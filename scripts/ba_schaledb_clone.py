@@ -4,23 +4,19 @@ Blue Archive SchaleDB Clone
 Creates a complete SchaleDB-style repository with all data and assets
 """
 
-import os
-import json
-import requests
 from pathlib import Path
-import time
-import shutil
-from typing import Dict, List, Any
+from ba_field_mapping import TORIKUSHII_TO_SCHALEDB
+from ba_json_output import write_json
+from ba_mirrors import fetch_json, get_shared_selector
+from ba_snapshot import write_snapshot
+from ba_http import get_session
 
 class SchaleDBClone:
     def __init__(self):
         self.base_dir = Path(".")
         self.data_dir = self.base_dir / "data"
         self.images_dir = self.base_dir / "images"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.session = get_session()
         
     def create_directory_structure(self):
         """Create SchaleDB-style directory structure"""
@@ -75,25 +71,24 @@ class SchaleDBClone:
             "https://raw.githubusercontent.com/lonqie/SchaleDB/main/data/students.json"
         ]
         
-        for endpoint in endpoints:
-            try:
-                response = self.session.get(endpoint, timeout=30)
-                if response.status_code == 200:
-                    data = response.json()
-                    if isinstance(data, list) and len(data) > 0:
-                        students = data
-                        print(f"✅ Fetched {len(students)} students from {endpoint}")
-                        break
-            except Exception as e:
-                print(f"❌ Failed to fetch from {endpoint}: {e}")
+        # Race the two healthiest endpoints, then fall back to the rest
+        endpoint, data = fetch_json(
+            self.session, endpoints,
+            validate=lambda data: isinstance(data, list) and len(data) > 0,
+            race=True
+        )
+        get_shared_selector().save()
+        if endpoint:
+            students = data
+            print(f"✅ Fetched {len(students)} students from {endpoint}")
         
         # Fallback: Create comprehensive student data from torikushii
         if not students:
             students = self.create_comprehensive_students()
         
         # Save students data
-        with open(self.data_dir / "students.json", 'w', encoding='utf-8') as f:
-            json.dump(students, f, indent=2, ensure_ascii=False)
+        write_json(students, self.data_dir / "students.json")
+        write_snapshot(self.data_dir / "students.json")
         
         return students
     
@@ -108,59 +103,8 @@ class SchaleDBClone:
             response = self.session.get("https://raw.githubusercontent.com/torikushiii/BlueArchiveData/master/global/characters.json")
             tori_data = response.json()
             
-            for char_id, char_data in tori_data.items():
-                if not char_data.get('Name'):
-                    continue
-                    
-                student = {
-                    "Id": int(char_id),
-                    "Name": char_data.get('Name', ''),
-                    "DevName": char_data.get('DevName', ''),
-                    "School": char_data.get('School', ''),
-                    "Club": char_data.get('Club', ''),
-                    "StarGrade": char_data.get('StarGrade', 3),
-                    "SquadType": char_data.get('SquadType', ''),
-                    "TacticRole": char_data.get('TacticRole', ''),
-                    "Position": char_data.get('Position', ''),
-                    "BulletType": char_data.get('BulletType', ''),
-                    "ArmorType": char_data.get('ArmorType', ''),
-                    "WeaponType": char_data.get('WeaponType', ''),
-                    "Equipment": char_data.get('Equipment', []),
-                    "Terrain": {
-                        "Street": char_data.get('Terrain', {}).get('Street', 'D'),
-                        "Outdoor": char_data.get('Terrain', {}).get('Outdoor', 'D'),
-                        "Indoor": char_data.get('Terrain', {}).get('Indoor', 'D')
-                    },
-                    "Profile": {
-                        "Age": char_data.get('Profile', {}).get('Age', ''),
-                        "Birthday": char_data.get('Profile', {}).get('Birthday', ''),
-                        "Height": char_data.get('Profile', {}).get('Height', ''),
-                        "Hobby": char_data.get('Profile', {}).get('Hobby', ''),
-                        "Designer": char_data.get('Profile', {}).get('Designer', ''),
-                        "Illustrator": char_data.get('Profile', {}).get('Illustrator', ''),
-                        "CV": char_data.get('Profile', {}).get('CV', '')
-                    },
-                    "Stat": {
-                        "AttackPower1": char_data.get('Stat', {}).get('AttackPower', [0])[0] if char_data.get('Stat', {}).get('AttackPower') else 0,
-                        "MaxHP1": char_data.get('Stat', {}).get('MaxHP', [0])[0] if char_data.get('Stat', {}).get('MaxHP') else 0,
-                        "DefensePower1": char_data.get('Stat', {}).get('DefensePower', [0])[0] if char_data.get('Stat', {}).get('DefensePower') else 0,
-                        "HealPower1": char_data.get('Stat', {}).get('HealPower', [0])[0] if char_data.get('Stat', {}).get('HealPower') else 0,
-                        "AccuracyPoint1": char_data.get('Stat', {}).get('AccuracyPoint', [0])[0] if char_data.get('Stat', {}).get('AccuracyPoint') else 0,
-                        "DodgePoint1": char_data.get('Stat', {}).get('DodgePoint', [0])[0] if char_data.get('Stat', {}).get('DodgePoint') else 0,
-                        "CriticalPoint1": char_data.get('Stat', {}).get('CriticalPoint', [0])[0] if char_data.get('Stat', {}).get('CriticalPoint') else 0,
-                        "StabilityPoint1": char_data.get('Stat', {}).get('StabilityPoint', [0])[0] if char_data.get('Stat', {}).get('StabilityPoint') else 0,
-                        "Range1": char_data.get('Stat', {}).get('Range', [0])[0] if char_data.get('Stat', {}).get('Range') else 0,
-                        "AmmoCount1": char_data.get('Stat', {}).get('AmmoCount', [0])[0] if char_data.get('Stat', {}).get('AmmoCount') else 0,
-                        "AmmoCost1": char_data.get('Stat', {}).get('AmmoCost', [0])[0] if char_data.get('Stat', {}).get('AmmoCost') else 0
-                    },
-                    "Skills": char_data.get('Skills', []),
-                    "Weapon": char_data.get('Weapon', {}),
-                    "Released": [True, True],  # Global, Japan
-                    "IsLimited": char_data.get('IsLimited', False)
-                }
-                
-                students.append(student)
-                
+            students = TORIKUSHII_TO_SCHALEDB.map_all(tori_data)
+            
             print(f"✅ Created {len(students)} student records")
             
         except Exception as e:
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Schema Validation
+Declarative record shapes compiled once into plain Python checks, run over whole batches with one aggregated report
+"""
+
+import argparse
+import os
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple, Union
+
+# isinstance checks per type name; bool is excluded from the numeric types
+_TYPE_CHECKS = {
+    'str': "isinstance({v}, str)",
+    'int': "(isinstance({v}, int) and not isinstance({v}, bool))",
+    'number': "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    'bool': "isinstance({v}, bool)",
+    'object': "isinstance({v}, dict)",
+    'list': "isinstance({v}, list)",
+}
+
+class Value:
+    """Checks for one key: type name(s) from ``str int number bool object list any``.
+
+    A ``required`` key must be present and not None; ``non_empty`` rejects
+    empty strings and containers. ``choices``, ``minimum`` and ``maximum``
+    restrict the value (bounds only apply to numbers).
+    """
+
+    def __init__(self, types: Union[str, Sequence[str]] = 'any', required: bool = False,
+                 non_empty: bool = False, choices: Optional[Iterable[Any]] = None,
+                 minimum: Optional[float] = None, maximum: Optional[float] = None):
+        self.types = (types,) if isinstance(types, str) else tuple(types)
+        unknown = [name for name in self.types if name != 'any' and name not in _TYPE_CHECKS]
+        if unknown:
+            raise ValueError(f"unknown schema types: {', '.join(unknown)}")
+        self.required = required
+        self.non_empty = non_empty
+        self.choices = frozenset(choices) if choices is not None else None
+        self.minimum = minimum
+        self.maximum = maximum
+
+class Object:
+    """A nested object whose keys are checked by ``fields`` (a plain dict spec is an optional Object)"""
+
+    def __init__(self, fields: Dict[str, 'Spec'], required: bool = False):
+        self.fields = fields
+        self.required = required
+
+class ListOf:
+    """A list whose every element matches ``item``"""
+
+    def __init__(self, item: 'Spec', required: bool = False, non_empty: bool = False):
+        self.item = item
+        self.required = required
+        self.non_empty = non_empty
+
+Spec = Union[Value, Object, ListOf, Dict[str, Any]]
+
+class _Compiler:
+    """Generates the source of one check function for a schema"""
+
+    def __init__(self):
+        self.namespace: Dict[str, Any] = {}
+        self.lines: List[str] = []
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, depth: int, line: str):
+        self.lines.append('    ' * depth + line)
+
+    def error(self, depth: int, path: str, message: str):
+        self.emit(depth, f"e.append(({path!r}, {message!r}))")
+
+    def value(self, var: str, path: str, spec: Spec, depth: int):
+        """Emit the checks for the value held in ``var``"""
+        if isinstance(spec, dict):
+            spec = Object(spec)
+        if isinstance(spec, Object):
+            types, nested = ('object',), spec
+        elif isinstance(spec, ListOf):
+            types, nested = ('list',), spec
+        else:
+            types, nested = spec.types, None
+
+        self.emit(depth, f"if {var} is None:")
+        if spec.required:
+            self.error(depth + 1, path, 'missing')
+        else:
+            self.emit(depth + 1, 'pass')
+        if 'any' not in types:
+            check = ' or '.join(_TYPE_CHECKS[name].format(v=var) for name in types)
+            self.emit(depth, f"elif not ({check}):")
+            self.error(depth + 1, path, f"expected {' or '.join(types)}")
+        if getattr(spec, 'non_empty', False):
+            self.emit(depth, f"elif not {var}:")
+            self.error(depth + 1, path, 'empty')
+        if isinstance(spec, Value):
+            numeric = f"isinstance({var}, (int, float)) and not isinstance({var}, bool)"
+            if spec.choices is not None:
+                choices = self.name('_c')
+                self.namespace[choices] = spec.choices
+                self.emit(depth, f"elif {var} not in {choices}:")
+                self.error(depth + 1, path, f"not one of {', '.join(sorted(map(str, spec.choices)))}")
+            if spec.minimum is not None:
+                self.emit(depth, f"elif {numeric} and {var} < {spec.minimum!r}:")
+                self.error(depth + 1, path, f"below {spec.minimum}")
+            if spec.maximum is not None:
+                self.emit(depth, f"elif {numeric} and {var} > {spec.maximum!r}:")
+                self.error(depth + 1, path, f"above {spec.maximum}")
+        if isinstance(nested, Object) and nested.fields:
+            self.emit(depth, "else:")
+            self.fields(var, path, nested.fields, depth + 1)
+        elif isinstance(nested, ListOf):
+            item = self.name('_x')
+            self.emit(depth, "else:")
+            self.emit(depth + 1, f"for {item} in {var}:")
+            self.value(item, f"{path}[]", nested.item, depth + 2)
+
+    def fields(self, obj: str, prefix: str, fields: Dict[str, Spec], depth: int):
+        for key, spec in fields.items():
+            var = self.name('_v')
+            self.emit(depth, f"{var} = {obj}.get({key!r})")
+            self.value(var, f"{prefix}.{key}" if prefix else key, spec, depth)
+
+class ValidationReport:
+    """Outcome of validating one batch: valid records plus errors grouped by path and message"""
+
+    def __init__(self, name: str, id_field: str):
+        self.name = name
+        self.id_field = id_field
+        self.total = 0
+        self.valid: List[Any] = []
+        # (record id, errors) per rejected record
+        self.invalid: List[Tuple[Any, List[Tuple[str, str]]]] = []
+        # (path, message) -> [count, example record ids]
+        self.errors: Dict[Tuple[str, str], List[Any]] = {}
+
+    def add(self, record: Any, errors: List[Tuple[str, str]]):
+        self.total += 1
+        if not errors:
+            self.valid.append(record)
+            return
+        record_id = record.get(self.id_field) if isinstance(record, dict) else None
+        if record_id is None:
+            record_id = f"#{self.total}"
+        self.invalid.append((record_id, errors))
+        for error in errors:
+            entry = self.errors.setdefault(error, [0, []])
+            entry[0] += 1
+            if record_id not in entry[1] and len(entry[1]) < 3:
+                entry[1].append(record_id)
+
+    @property
+    def ok(self) -> bool:
+        return not self.invalid
+
+    def summary(self, limit: int = 20) -> str:
+        lines = [f"{self.name}: {len(self.invalid)} of {self.total} records invalid"]
+        ranked = sorted(self.errors.items(), key=lambda item: -item[1][0])
+        for (path, message), (count, examples) in ranked[:limit]:
+            lines.append(f"  {path or '<record>'}: {message} ({count}x, e.g. {', '.join(map(str, examples))})")
+        if len(ranked) > limit:
+            lines.append(f"  ... {len(ranked) - limit} more kinds of error")
+        return '\n'.join(lines)
+
+class Schema:
+    """A record shape compiled into one ``check(record) -> [(path, message), ...]`` function"""
+
+    def __init__(self, fields: Dict[str, Spec], name: str = 'schema', id_field: str = 'id'):
+        self.fields = fields
+        self.name = name
+        self.id_field = id_field
+        self.check = self._compile()
+
+    def _compile(self):
+        compiler = _Compiler()
+        compiler.emit(0, "def check(r):")
+        compiler.emit(1, "if not isinstance(r, dict):")
+        compiler.emit(2, "return [('', 'expected object')]")
+        compiler.emit(1, "e = []")
+        compiler.fields('r', '', self.fields, 1)
+        compiler.emit(1, "return e")
+        source = '\n'.join(compiler.lines)
+        exec(compile(source, f"<schema {self.name}>", 'exec'), compiler.namespace)
+        check = compiler.namespace['check']
+        check.__doc__ = source
+        return check
+
+    def __call__(self, record: Any) -> List[Tuple[str, str]]:
+        return self.check(record)
+
+    def validate_all(self, records: Iterable[Any]) -> ValidationReport:
+        report = ValidationReport(self.name, self.id_field)
+        check, add = self.check, report.add
+        for record in records:
+            add(record, check(record))
+        return report
+
+_TEXT = Value('str')
+_NUMBER = Value('number')
+_LIMITED = Value(('int', 'bool'), minimum=0, maximum=3)
+
+# fetch_correct_schaledb output (SCHALEDB_TO_SUPABASE) as sent by sync_corrected_data
+SCHALEDB_SKILL = Object({
+    'skill_type': _TEXT,
+    'name': Value('str', required=True, non_empty=True),
+    'desc': _TEXT,
+    'icon': _TEXT,
+    'parameters': Value('list'),
+    'effects': Value('list'),
+})
+
+SUPABASE_CHARACTER = Schema({
+    'id': Value('int', required=True, minimum=1),
+    'name': Value('str', required=True, non_empty=True),
+    'dev_name': _TEXT,
+    'character_voice': _TEXT,
+    'illustrator': _TEXT,
+    'designer': _TEXT,
+    'collection_bg': _TEXT,
+    'school_year': _TEXT,
+    # SchaleDB IsLimited is 0-3 (permanent, limited, event, archive); the mapper defaults to False
+    'is_limited': _LIMITED,
+    'source': _TEXT,
+    'profile': Object({}, required=True),
+    'stats': Object({
+        'attack_power_1': _NUMBER,
+        'attack_power_100': _NUMBER,
+        'max_hp_1': _NUMBER,
+        'max_hp_100': _NUMBER,
+        'def_power_1': _NUMBER,
+        'def_power_100': _NUMBER,
+        'heal_power_1': _NUMBER,
+        'heal_power_100': _NUMBER,
+    }, required=True),
+    'terrain': Object({}, required=True),
+    'weapon': Object({}, required=True),
+    'skills': ListOf(SCHALEDB_SKILL, required=True),
+    'equipment': ListOf(Value('str'), required=True),
+    'images': Object({}, required=True),
+    'school_name': _TEXT,
+    'club_name': _TEXT,
+    'rarity_stars': Value('int', minimum=1, maximum=5),
+    'squad_type': _TEXT,
+    'position': _TEXT,
+    'weapon_type': _TEXT,
+    'armor_type': _TEXT,
+    'bullet_type': _TEXT,
+    'tactic_role': _TEXT,
+}, name='supabase_character')
+
+# data/characters/characters.json (TORIKUSHII_CHARACTER, SYNC_CHARACTER)
+CHARACTER = Schema({
+    'id': Value('int', required=True, minimum=1),
+    'name': Value('str', required=True, non_empty=True),
+    'dev_name': _TEXT,
+    'school': _TEXT,
+    'club': _TEXT,
+    'rarity': Value('int', minimum=1, maximum=5),
+    'squad_type': _TEXT,
+    'position': _TEXT,
+    'weapon_type': _TEXT,
+    'armor_type': _TEXT,
+    'bullet_type': _TEXT,
+    # Terrain, Weapon and Skills are copied verbatim from upstream, so their keys stay PascalCase;
+    # adaptation grades are letters in some sources and numbers in others
+    'terrain': Object({'Street': Value(('str', 'int')), 'Outdoor': Value(('str', 'int')),
+                       'Indoor': Value(('str', 'int'))}),
+    'profile': Object({}),
+    'stats': Object({}),
+    'skills': ListOf(Value('object')),
+    'weapon': Object({'Name': _TEXT, 'Desc': _TEXT}),
+    'equipment': ListOf(Value('str')),
+    'is_limited': _LIMITED,
+    # Only SYNC_CHARACTER (ba_sync_complete) adds the CDN image URLs
+    'images': Object({'icon': _TEXT, 'portrait': _TEXT, 'collection': _TEXT, 'variants': Value('object')}),
+}, name='character')
+
+# data/enhanced/skills.json
+SKILL = Schema({
+    'character_id': Value('int', required=True, minimum=1),
+    'character_name': _TEXT,
+    'skill_type': Value('str', required=True, non_empty=True),
+    'name': Value('str', required=True, non_empty=True),
+    'description': _TEXT,
+    'cost': Value('int', minimum=0),
+    'cooldown': Value('number', minimum=0),
+    'effects': ListOf(Object({'type': Value('str', required=True), 'target': _TEXT})),
+    'skill_levels': ListOf(Object({'level': Value('int', required=True, minimum=1)})),
+}, name='skill', id_field='name')
+
+# data/enhanced/weapons.json
+WEAPON = Schema({
+    'character_id': Value('int', required=True, minimum=1),
+    'character_name': _TEXT,
+    'name': Value('str', required=True, non_empty=True),
+    'type': _TEXT,
+    'category': _TEXT,
+    'description': _TEXT,
+    'base_stats': Object({}),
+    'max_level': Value('int', minimum=1),
+    'passive_skill': Object({'name': _TEXT, 'description': _TEXT}),
+    'upgrade_tiers': ListOf(Object({'tier': Value('int', required=True, minimum=1),
+                                    'max_level': Value('int', minimum=1)})),
+}, name='weapon', id_field='name')
+
+# data/items/equipment.json (records keyed by id upstream)
+EQUIPMENT = Schema({
+    'Id': Value(('int', 'str'), required=True),
+    'Name': _TEXT,
+    'Icon': _TEXT,
+    'Category': _TEXT,
+    'Tier': Value('int', minimum=1),
+}, name='equipment', id_field='Id')
+
+# Output files checked by the CLI and the pipeline's validate stage
+DEFAULT_FILES = {
+    'corrected_schaledb_data.json': SUPABASE_CHARACTER,
+    'data/characters/characters.json': CHARACTER,
+    'data/enhanced/skills.json': SKILL,
+    'data/enhanced/weapons.json': WEAPON,
+    'data/items/equipment.json': EQUIPMENT,
+}
+
+def load_records(path) -> List[Any]:
+    """Records of a data file; objects keyed by id are flattened with the key as ``Id``"""
+    from ba_snapshot import load_dataset
+
+    data = load_dataset(path)
+    if isinstance(data, dict):
+        return [{'Id': key, **value} for key, value in data.items() if isinstance(value, dict)]
+    return data
+
+def validate_files(files: Optional[Dict[str, Schema]] = None) -> Dict[str, ValidationReport]:
+    """Validate each existing file against its schema"""
+    reports = {}
+    for path, schema in (files or DEFAULT_FILES).items():
+        if os.path.exists(path):
+            reports[path] = schema.validate_all(load_records(path))
+    return reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate the data files against their record schemas")
+    parser.add_argument('files', nargs='*', metavar='FILE=SCHEMA',
+                        help="files to check, e.g. data/enhanced/skills.json=skill (default: all known outputs)")
+    args = parser.parse_args(argv)
+
+    schemas = {schema.name: schema for schema in DEFAULT_FILES.values()}
+    files = {}
+    for item in args.files:
+        path, _, name = item.partition('=')
+        if name not in schemas:
+            parser.error(f"unknown schema {name!r} (choose from {', '.join(sorted(schemas))})")
+        files[path] = schemas[name]
+
+    reports = validate_files(files or None)
+    for path, report in reports.items():
+        if report.ok:
+            print(f"✅ {path}: {report.total} records valid")
+        else:
+            print(f"❌ {path}\n{report.summary()}")
+    if not all(report.ok for report in reports.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Sharding
+Deterministic partitioning of the asset plan and merging of per-shard manifests
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from ba_json_output import write_json
+
+PARTIAL_MANIFEST_PATTERN = 'image_manifest.shard-{index}-of-{total}.json'
+SHARD_STATE_PATTERN = 'shard-{index}-of-{total}'
+PARTIAL_MANIFEST_RE = re.compile(r'image_manifest\.shard-(\d+)-of-(\d+)\.json$')
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse ``K/N`` (1-based) into ``(K, N)``"""
+    try:
+        index, total = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"shard must look like K/N, got {spec!r}")
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"shard index must be between 1 and {total}, got {index}")
+    return index, total
+
+def shard_of(key: str, total: int) -> int:
+    """Stable shard (1..total) for an asset key; identical on every machine"""
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % total + 1
+
+def select_shard(jobs: Iterable, shard: Optional[Tuple[int, int]]) -> List:
+    """Jobs belonging to ``shard``; every layout of one asset key lands in the same shard"""
+    if shard is None:
+        return list(jobs)
+    index, total = shard
+    return [job for job in jobs if shard_of(job.key, total) == index]
+
+def shard_state_dir(shard: Tuple[int, int], cache_dir='.cache') -> Path:
+    """Directory for one shard's journal, caches and indexes; shards never share state files"""
+    index, total = shard
+    return Path(cache_dir) / SHARD_STATE_PATTERN.format(index=index, total=total)
+
+def partial_manifest_path(shard: Tuple[int, int], directory='.') -> Path:
+    index, total = shard
+    return Path(directory) / PARTIAL_MANIFEST_PATTERN.format(index=index, total=total)
+
+def write_partial_manifest(shard: Tuple[int, int], relpaths: Iterable[str], directory='.',
+                           assets: Optional[Dict[str, Dict[str, Any]]] = None) -> Path:
+    """Record the files (relative to images/) this shard produced, grouped by category,
+    plus their per-file manifest entries"""
+    listing: Dict[str, List[str]] = {}
+    for rel in relpaths:
+        category, _, name = rel.rpartition('/')
+        listing.setdefault(category, []).append(name)
+    index, total = shard
+    partial = {
+        'shard': index,
+        'total_shards': total,
+        'files': {category: sorted(names) for category, names in sorted(listing.items())},
+        'assets': assets or {}
+    }
+    path = partial_manifest_path(shard, directory)
+    # Only an input to --merge-manifests, so no CDN variants
+    write_json(partial, path, variants=False)
+    return path
+
+def merge_partial_manifests(directory='.') -> Tuple[Dict[str, set], Dict[str, Dict[str, Any]], List[int], Optional[int]]:
+    """Union the file listings of every partial manifest in ``directory``.
+
+    Returns ``(files_by_category, assets, shards_found, total_shards)``.
+    """
+    files: Dict[str, set] = {}
+    assets: Dict[str, Dict[str, Any]] = {}
+    shards: List[int] = []
+    total = None
+    for path in sorted(Path(directory).glob('image_manifest.shard-*-of-*.json')):
+        if not PARTIAL_MANIFEST_RE.search(path.name):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            partial = json.load(f)
+        if total is not None and partial['total_shards'] != total:
+            raise ValueError(f"{path} belongs to a {partial['total_shards']}-shard run, expected {total}")
+        total = partial['total_shards']
+        shards.append(partial['shard'])
+        for category, names in partial['files'].items():
+            files.setdefault(category, set()).update(names)
+        assets.update(partial.get('assets', {}))
+    return files, assets, sorted(shards), total
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Snapshots
+Compact binary copies of the JSON outputs (MessagePack for records, Parquet for tables) and a loader that prefers them
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Sequence
+
+from ba_json_stream import is_json_object, iter_json_records
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SNAPSHOT_FORMAT = 'ba-snapshot'
+SNAPSHOT_SCHEMA_VERSION = 1
+MSGPACK_SUFFIX = '.msgpack'
+PARQUET_SUFFIX = '.snapshot.parquet'
+# Parquet schema metadata key holding the snapshot header
+PARQUET_HEADER_KEY = b'ba_snapshot'
+HASH_CHUNK = 1024 * 1024
+
+# Outputs snapshotted by default (the CLI and the workflow)
+DEFAULT_OUTPUTS = [
+    'data/students.json',
+    'data/characters.json',
+    'data/character_statistics.json',
+    'data/characters/characters.json',
+    'data/items/items.json',
+    'data/items/equipment.json',
+    'data/enhanced/weapons.json',
+    'data/enhanced/skills.json',
+    'data/enhanced/statistics.json',
+    'data/localization/students.json',
+    'corrected_schaledb_data.json',
+]
+# Flat, column-shaped outputs stored as Parquet; everything else is MessagePack
+TABULAR_OUTPUTS = ('skills.json', 'weapons.json', 'statistics.json', 'character_statistics.json')
+
+class SnapshotError(ValueError):
+    """A snapshot is unreadable or was written with another schema version"""
+
+def _sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _source_header(source: Path, kind: str) -> Dict[str, Any]:
+    stat = source.stat()
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'schema_version': SNAPSHOT_SCHEMA_VERSION,
+        'kind': kind,
+        'source': source.name,
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_sha256': _sha256(source),
+    }
+
+def _check_header(header: Any, path) -> Dict[str, Any]:
+    if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} is not a snapshot")
+    if header.get('schema_version') != SNAPSHOT_SCHEMA_VERSION:
+        raise SnapshotError(
+            f"{path} has schema version {header.get('schema_version')}, expected {SNAPSHOT_SCHEMA_VERSION}"
+        )
+    return header
+
+def snapshot_paths(json_path) -> List[Path]:
+    """Possible snapshot files for a JSON output, in lookup order"""
+    json_path = Path(json_path)
+    return [json_path.with_suffix(MSGPACK_SUFFIX), json_path.with_suffix(PARQUET_SUFFIX)]
+
+def _replace(tmp_path: Path, path: Path, stale: Sequence[Path]):
+    os.replace(tmp_path, path)
+    # Only one snapshot format per output
+    for other in stale:
+        if other != path and other.exists():
+            other.unlink()
+
+@contextmanager
+def _gc_paused():
+    """Bulk loads allocate only acyclic containers; collecting during them is wasted work"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+# MessagePack: a header map followed by one object per record
+
+def _write_msgpack(source: Path, path: Path) -> Path:
+    kind = 'object' if is_json_object(source) else 'array'
+    header = _source_header(source, kind)
+    tmp_path = path.with_name(path.name + '.tmp')
+    packer = msgpack.Packer(use_bin_type=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(packer.pack(header))
+        # Records are streamed, so memory stays bounded by the largest record
+        for record in iter_json_records(source):
+            f.write(packer.pack(list(record) if kind == 'object' else record))
+    _replace(tmp_path, path, snapshot_paths(source))
+    return path
+
+def _open_msgpack(path):
+    if msgpack is None:
+        raise SnapshotError("msgpack is not installed")
+    f = open(path, 'rb')
+    unpacker = msgpack.Unpacker(f, raw=False, strict_map_key=False)
+    try:
+        header = _check_header(next(unpacker), path)
+    except StopIteration:
+        f.close()
+        raise SnapshotError(f"{path} is empty")
+    except Exception:
+        f.close()
+        raise
+    return f, unpacker, header
+
+# Parquet: a table with the header (and any scalar fields) in the schema metadata
+
+def _stats_table(data: Dict[str, Any]):
+    """Statistics as (stat, key, count) rows; scalar fields stay in the header"""
+    rows, scalars = [], {}
+    for stat, value in data.items():
+        if isinstance(value, dict) and all(isinstance(count, (int, float)) for count in value.values()):
+            rows.extend({'stat': stat, 'key': key, 'count': count} for key, count in value.items())
+        else:
+            scalars[stat] = value
+    return rows, scalars
+
+def _nested_columns(rows: List[Dict[str, Any]]) -> List[str]:
+    columns = dict.fromkeys(key for row in rows for key, value in row.items() if isinstance(value, (dict, list)))
+    return list(columns)
+
+def _decode_rows(rows: List[Dict[str, Any]], json_columns: Sequence[str]) -> List[Dict[str, Any]]:
+    for row in rows:
+        for column in json_columns:
+            if row.get(column) is not None:
+                row[column] = json.loads(row[column])
+    return rows
+
+def _write_parquet(source: Path, path: Path) -> Path:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with open(source, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        rows, scalars = _stats_table(data)
+        header = _source_header(source, 'stats')
+        header['scalars'] = scalars
+    else:
+        rows = data
+        header = _source_header(source, 'records')
+    # Nested values (skill effects, levels) are kept as JSON text so their
+    # shape survives; flat columns stay typed
+    json_columns = _nested_columns(rows)
+    header['json_columns'] = json_columns
+    encoded = [
+        {key: json.dumps(value, ensure_ascii=False) if key in json_columns and value is not None else value
+         for key, value in row.items()}
+        for row in rows
+    ]
+    table = pa.Table.from_pylist(encoded)
+    # Tables fill absent keys with nulls; such outputs are not tabular
+    if _decode_rows(table.to_pylist(), json_columns) != rows:
+        raise ValueError("records do not share one set of columns")
+    table = table.replace_schema_metadata({PARQUET_HEADER_KEY: json.dumps(header).encode('utf-8')})
+    tmp_path = path.with_name(path.name + '.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    _replace(tmp_path, path, snapshot_paths(source))
+    return path
+
+def _read_parquet_header(path) -> Dict[str, Any]:
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(path).metadata or {}
+    try:
+        header = json.loads(metadata[PARQUET_HEADER_KEY])
+    except (KeyError, ValueError):
+        raise SnapshotError(f"{path} is not a snapshot")
+    return _check_header(header, path)
+
+def _load_parquet(path) -> Any:
+    import pyarrow.parquet as pq
+
+    header = _read_parquet_header(path)
+    rows = _decode_rows(pq.read_table(path).to_pylist(), header.get('json_columns', []))
+    if header['kind'] != 'stats':
+        return rows
+    data: Dict[str, Any] = {}
+    for row in rows:
+        data.setdefault(row['stat'], {})[row['key']] = row['count']
+    data.update(header.get('scalars', {}))
+    return data
+
+def write_snapshot(json_path, fmt: Optional[str] = None) -> Optional[Path]:
+    """Write the binary snapshot of a JSON output next to it.
+
+    ``fmt`` is ``'msgpack'`` or ``'parquet'``; by default tabular outputs
+    (see TABULAR_OUTPUTS) use Parquet. Returns None when the needed library
+    is not installed.
+    """
+    source = Path(json_path)
+    if fmt is None:
+        fmt = 'parquet' if source.name in TABULAR_OUTPUTS else 'msgpack'
+    if fmt == 'parquet':
+        try:
+            return _write_parquet(source, source.with_suffix(PARQUET_SUFFIX))
+        except ImportError:
+            print(f"⚠️  pyarrow is not installed, writing {source} as MessagePack")
+        except Exception as e:
+            # Mixed value types or records with differing columns
+            print(f"⚠️  {source} is not tabular ({e}), writing MessagePack")
+    if msgpack is None:
+        print(f"⚠️  msgpack is not installed, skipping snapshot of {source}")
+        return None
+    return _write_msgpack(source, source.with_suffix(MSGPACK_SUFFIX))
+
+def read_header(path) -> Dict[str, Any]:
+    """Header of a snapshot file (format, schema version, kind and source file details)"""
+    path = Path(path)
+    if path.name.endswith(PARQUET_SUFFIX):
+        return _read_parquet_header(path)
+    f, _, header = _open_msgpack(path)
+    f.close()
+    return header
+
+def iter_snapshot(path) -> Iterator[Any]:
+    """Yield records one at a time: array items, or ``(key, value)`` pairs of an object"""
+    path = Path(path)
+    if path.name.endswith(PARQUET_SUFFIX):
+        data = _load_parquet(path)
+        yield from (data.items() if isinstance(data, dict) else data)
+        return
+    f, unpacker, header = _open_msgpack(path)
+    with f:
+        for record in unpacker:
+            yield tuple(record) if header['kind'] == 'object' else record
+
+def load_snapshot(path) -> Any:
+    """Load a whole snapshot; the result equals ``json.load`` of its source"""
+    path = Path(path)
+    if path.name.endswith(PARQUET_SUFFIX):
+        with _gc_paused():
+            return _load_parquet(path)
+    f, unpacker, header = _open_msgpack(path)
+    with f, _gc_paused():
+        if header['kind'] == 'object':
+            return {key: value for key, value in unpacker}
+        return list(unpacker)
+
+def fresh_snapshot(json_path) -> Optional[Path]:
+    """The snapshot of ``json_path`` if one exists and still matches the JSON file"""
+    json_path = Path(json_path)
+    try:
+        stat = json_path.stat()
+    except FileNotFoundError:
+        stat = None
+    for path in snapshot_paths(json_path):
+        if not path.exists():
+            continue
+        try:
+            header = read_header(path)
+        except (SnapshotError, ImportError, OSError):
+            continue
+        if stat is None:
+            # Only the snapshot was shipped
+            return path
+        if header['source_size'] != stat.st_size:
+            continue
+        # A checkout resets mtimes; the content hash decides then
+        if header['source_mtime_ns'] == stat.st_mtime_ns or header['source_sha256'] == _sha256(json_path):
+            return path
+    return None
+
+def load_dataset(json_path) -> Any:
+    """Load a JSON output, from its snapshot when that is current"""
+    path = fresh_snapshot(json_path)
+    if path is not None:
+        try:
+            return load_snapshot(path)
+        except (SnapshotError, ImportError):
+            pass
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write binary snapshots of the JSON outputs")
+    parser.add_argument('paths', nargs='*', help="JSON outputs to snapshot (default: all known outputs)")
+    args = parser.parse_args(argv)
+
+    written = 0
+    for json_path in args.paths or DEFAULT_OUTPUTS:
+        if not os.path.exists(json_path):
+            continue
+        path = write_snapshot(json_path)
+        if path is not None:
+            written += 1
+            print(f"✅ {json_path} -> {path} ({os.path.getsize(json_path)} -> {os.path.getsize(path)} bytes)")
+    print(f"📦 Wrote {written} snapshots")
+
+if __name__ == "__main__":
+    main()
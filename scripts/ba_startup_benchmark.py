@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Blue Archive Startup Benchmark
+Measures how long fetch-only entry points take to import and fails when one is over the startup budget
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+# Entry points that must start quickly: none of them needs a heavy client to fetch
+FETCH_ONLY_MODULES = [
+    'fetch_correct_schaledb',
+    'ba_enhanced_fetcher',
+    'ba_schaledb_clone',
+    'ba_localization',
+    'ba_delta_sync',
+    'ba_sync_complete',
+    'ba_image_downloader',
+    'ba_asset_downloader',
+    'ba_asset_manager',
+    'ba_pipeline',
+]
+# Imported only by the stage that uses them
+HEAVY_MODULES = ('supabase', 'pandas', 'PIL', 'pyarrow')
+DEFAULT_BUDGET_MS = 400
+DEFAULT_RUNS = 3
+
+def import_profile(module: str) -> Tuple[float, Set[str]]:
+    """(cumulative import time in ms, top-level packages loaded) in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True
+    )
+    lines = result.stderr.splitlines()
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {lines[-1] if lines else result.returncode}")
+    total_us = None
+    loaded = set()
+    for line in lines:
+        # "import time: <self us> | <cumulative us> | <indented name>"
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        loaded.add(name.strip().split('.')[0])
+        if name.strip() == module:
+            total_us = int(cumulative)
+    if total_us is None:
+        raise RuntimeError(f"no import time reported for {module}")
+    return total_us / 1000, loaded
+
+def benchmark(modules: List[str], runs: int = DEFAULT_RUNS) -> Dict[str, Tuple[float, Set[str]]]:
+    """Best-of-``runs`` import time and the heavy packages each module pulls in"""
+    results = {}
+    for module in modules:
+        times, heavy = [], set()
+        for _ in range(runs):
+            elapsed, loaded = import_profile(module)
+            times.append(elapsed)
+            heavy |= loaded.intersection(HEAVY_MODULES)
+        results[module] = (min(times), heavy)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail when a fetch-only entry point starts too slowly")
+    parser.add_argument('modules', nargs='*', help="modules to import (default: the fetch-only entry points)")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum import time per module in milliseconds")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="imports per module; the fastest counts")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for module, (elapsed, heavy) in benchmark(args.modules or FETCH_ONLY_MODULES, args.runs).items():
+        problems = []
+        if elapsed > args.budget_ms:
+            problems.append(f"over the {args.budget_ms:.0f} ms budget")
+        if heavy:
+            problems.append(f"imports {', '.join(sorted(heavy))}")
+        failures += bool(problems)
+        print(f"{'❌' if problems else '✅'} {module:<24} {elapsed:7.1f} ms"
+              + (f"  ({'; '.join(problems)})" if problems else ''))
+
+    if failures:
+        print(f"\n{failures} entry points are over the startup budget")
+        raise SystemExit(1)
+    print("\nAll entry points are within the startup budget")
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,12 @@ import os
 import json
 import requests
 from pathlib import Path
-from typing import Dict, List, Any
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Dict, List, Any
+from ba_http import get_session
+from ba_schema import CHARACTER
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 class BlueArchiveSupabaseSync:
     def __init__(self):
@@ -20,7 +24,9 @@ class BlueArchiveSupabaseSync:
         if not self.supabase_key:
             raise ValueError("SUPABASE_SERVICE_ROLE_KEY environment variable is required")
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        # Imported here: the supabase package is slow to import
+        from supabase import create_client
+        self.supabase: 'Client' = create_client(self.supabase_url, self.supabase_key)
         
     def create_database_schema(self):
         """Create clean database schema"""
@@ -71,7 +77,7 @@ class BlueArchiveSupabaseSync:
         try:
             # Load character data from GitHub
             url = "https://raw.githubusercontent.com/dungdinhmanh/blue-archive-data/main/data/characters/characters.json"
-            response = requests.get(url, timeout=30)
+            response = get_session().get(url, timeout=30)
             
             if response.status_code != 200:
                 print("❌ Character data not found, running local fetch...")
@@ -88,6 +94,11 @@ class BlueArchiveSupabaseSync:
                     'collection': f"https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main/images/characters/collection/{character['id']}.webp"
                 }
             
+            report = CHARACTER.validate_all(characters)
+            if not report.ok:
+                print(f"⚠️  Skipping invalid characters\n{report.summary()}")
+            characters = report.valid
+            
             # Upsert to Supabase
             result = self.supabase.table('characters').upsert(characters).execute()
             
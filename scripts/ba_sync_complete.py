@@ -4,26 +4,51 @@ Blue Archive Complete Sync
 Fetches data and syncs to Supabase in one script
 """
 
+import argparse
 import os
-import json
 import requests
 from pathlib import Path
 import time
-from typing import Dict, List, Any
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+from ba_field_mapping import CDN_BASE_URL, Computed, TORIKUSHII_CHARACTER
+from ba_http import get_session
+from ba_image_variants import character_variant_urls
+from ba_json_output import write_json
+from ba_rate_limiter import shared_limiter
+from ba_schema import CHARACTER
+from ba_snapshot import write_snapshot
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+def character_images(char_data, char_id):
+    return {
+        'icon': f"{CDN_BASE_URL}/images/characters/icons/{char_id}.webp",
+        'portrait': f"{CDN_BASE_URL}/images/characters/portraits/{char_id}.webp",
+        'collection': f"{CDN_BASE_URL}/images/characters/collection/{char_id}.webp",
+        'variants': character_variant_urls(CDN_BASE_URL, char_id)
+    }
+
+# torikushii character plus CDN image URLs
+SYNC_CHARACTER = TORIKUSHII_CHARACTER.extend(name='sync_character', images=Computed(character_images))
 
 class BlueArchiveCompleteSync:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.session = get_session()
         
         # Supabase setup
         self.supabase_url = "https://bpvdkhsgznuibgmjsnjz.supabase.co"
         self.supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY', 'sbp_5cde0efc3712bcd2082effbe37ae4d649a1d8f93')
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-        
+        self._supabase: Optional['Client'] = None
+    
+    @property
+    def supabase(self) -> 'Client':
+        """Supabase client, built on first use so fetch-only runs never import supabase"""
+        if self._supabase is None:
+            from supabase import create_client
+            self._supabase = create_client(self.supabase_url, self.supabase_key)
+        return self._supabase
+    
     def fetch_character_data(self):
         """Fetch character data from torikushii repository"""
         print("🔄 Fetching character data...")
@@ -34,39 +59,7 @@ class BlueArchiveCompleteSync:
             response.raise_for_status()
             
             raw_data = response.json()
-            characters = []
-            
-            for char_id, char_data in raw_data.items():
-                if not char_data.get('Name'):
-                    continue
-                    
-                character = {
-                    'id': int(char_id),
-                    'name': char_data.get('Name', ''),
-                    'dev_name': char_data.get('DevName', ''),
-                    'school': char_data.get('School', ''),
-                    'club': char_data.get('Club', ''),
-                    'rarity': char_data.get('StarGrade', 3),
-                    'squad_type': char_data.get('SquadType', ''),
-                    'position': char_data.get('Position', ''),
-                    'weapon_type': char_data.get('WeaponType', ''),
-                    'armor_type': char_data.get('ArmorType', ''),
-                    'bullet_type': char_data.get('BulletType', ''),
-                    'terrain': char_data.get('Terrain', {}),
-                    'profile': char_data.get('Profile', {}),
-                    'stats': char_data.get('Stat', {}),
-                    'skills': char_data.get('Skills', []),
-                    'weapon': char_data.get('Weapon', {}),
-                    'equipment': char_data.get('Equipment', []),
-                    'is_limited': char_data.get('IsLimited', False),
-                    'images': {
-                        'icon': f"https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main/images/characters/icons/{char_id}.webp",
-                        'portrait': f"https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main/images/characters/portraits/{char_id}.webp",
-                        'collection': f"https://cdn.jsdelivr.net/gh/dungdinhmanh/blue-archive-data@main/images/characters/collection/{char_id}.webp"
-                    }
-                }
-                
-                characters.append(character)
+            characters = SYNC_CHARACTER.map_all(raw_data)
             
             print(f"✅ Fetched {len(characters)} characters")
             return characters
@@ -79,6 +72,11 @@ class BlueArchiveCompleteSync:
         """Sync character data to Supabase"""
         print("🔄 Syncing to Supabase...")
         
+        report = CHARACTER.validate_all(characters)
+        if not report.ok:
+            print(f"⚠️  Skipping invalid characters\n{report.summary()}")
+        characters = report.valid
+        
         try:
             # Batch insert/upsert characters
             batch_size = 50
@@ -87,11 +85,16 @@ class BlueArchiveCompleteSync:
             for i in range(0, len(characters), batch_size):
                 batch = characters[i:i + batch_size]
                 
-                result = self.supabase.table('characters').upsert(batch).execute()
+                shared_limiter.acquire(self.supabase_url)
+                try:
+                    result = self.supabase.table('characters').upsert(batch).execute()
+                except Exception:
+                    shared_limiter.penalize(self.supabase_url)
+                    raise
+                shared_limiter.record(self.supabase_url, 200)
                 total_synced += len(batch)
                 
                 print(f"✅ Synced batch {i//batch_size + 1}: {len(batch)} characters")
-                time.sleep(0.5)  # Rate limiting
             
             print(f"✅ Total synced: {total_synced} characters")
             
@@ -109,16 +112,16 @@ class BlueArchiveCompleteSync:
             
             # Save character data
             output_file = data_dir / 'characters.json'
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(characters, f, indent=2, ensure_ascii=False)
+            write_json(characters, output_file)
+            write_snapshot(output_file)
             
             print(f"✅ Saved {len(characters)} characters to {output_file}")
             
         except Exception as e:
             print(f"❌ Error saving data: {e}")
     
-    def run(self):
-        """Run complete sync process"""
+    def run(self, sync: bool = True):
+        """Run complete sync process (``sync=False`` only fetches and saves)"""
         print("🚀 Blue Archive Complete Sync")
         print("=" * 40)
         
@@ -133,16 +136,23 @@ class BlueArchiveCompleteSync:
         self.upload_to_github(characters)
         
         # Step 3: Sync to Supabase
-        self.sync_to_supabase(characters)
+        if sync:
+            self.sync_to_supabase(characters)
         
         print("\n🎉 Complete sync finished!")
         print(f"📊 {len(characters)} characters processed")
         print("📁 Data saved locally")
-        print("🗄️ Data synced to Supabase")
+        if sync:
+            print("🗄️ Data synced to Supabase")
 
 def main():
+    parser = argparse.ArgumentParser(description="Fetch character data and sync it to Supabase")
+    parser.add_argument('--fetch-only', action='store_true',
+                        help="only fetch and save data/characters/characters.json")
+    args = parser.parse_args()
+    
     sync = BlueArchiveCompleteSync()
-    sync.run()
+    sync.run(sync=not args.fetch_only)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,174 +3,127 @@
 Fetch correct and complete character data from SchaleDB
 """
 
-import json
+import argparse
+import os
 import requests
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from ba_http import get_session
+from ba_field_mapping import SCHALEDB_TO_SUPABASE
+from ba_http_cache import get_shared_cache
+from ba_json_stream import JsonArrayWriter, fetch_to_spool, iter_json_records
+from ba_localization import LOCALIZATION_DIR, SCHALEDB_LOCALES, fetch_localized_students
+from ba_record_state import STATE_DIR, PendingChanges, PreviousOutput, RecordState
+from ba_snapshot import write_snapshot
 
-def fetch_schaledb_data() -> List[Dict[str, Any]]:
-    """Fetch raw character data from SchaleDB GitHub repository"""
-    url = "https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/data/en/students.json"
+SCHALEDB_STUDENTS_URL = "https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/data/en/students.json"
+OUTPUT_FILE = 'corrected_schaledb_data.json'
+# Character ids added/changed/removed since sync_corrected_data.py last ran
+PENDING_CHANGES_FILE = STATE_DIR / 'corrected_schaledb_data.pending.json'
+
+def fetch_schaledb_spool(conditional: bool = True) -> Tuple[Optional[str], Any, Optional[str]]:
+    """Stream students.json to a spool file without parsing it
+    
+    Returns ``(spool_path, response, sha256)``; ``spool_path`` is None when
+    upstream is unchanged since the last processed run. ``conditional=False``
+    always downloads.
+    """
+    return fetch_to_spool(get_session(), SCHALEDB_STUDENTS_URL, OUTPUT_FILE, cache=get_shared_cache(),
+                          conditional=conditional, timeout=30)
+
+def iter_schaledb_students(spool_path) -> Iterator[Dict[str, Any]]:
+    """Yield raw students one at a time from a spooled students.json"""
+    for record in iter_json_records(spool_path):
+        # Some mirrors publish students keyed by id instead of as a list
+        yield record[1] if isinstance(record, tuple) else record
+
+def fetch_schaledb_data() -> Optional[List[Dict[str, Any]]]:
+    """Fetch raw character data from SchaleDB GitHub repository
     
+    Returns None when upstream is unchanged since the last processed run.
+    Loads every student into memory; process_and_save_data streams instead.
+    """
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        spool, response, sha256 = fetch_schaledb_spool()
     except requests.RequestException as e:
         print(f"Error fetching SchaleDB data: {str(e)}")
         return []
+    if spool is None:
+        return None
+    try:
+        return list(iter_schaledb_students(spool))
+    finally:
+        os.unlink(spool)
 
 def map_schaledb_to_supabase_format(schale_student: Dict[str, Any]) -> Dict[str, Any]:
-    """Map SchaleDB student data to Supabase character format"""
-    
-    char_id = schale_student.get("Id")
-    if not char_id:
-        return None
-    
-    # Extract basic info
-    name = schale_student.get("Name")
-    
-    # Extract profile data
-    profile_data = {
-        "age": schale_student.get("ProfileAge"),
-        "birthday": schale_student.get("ProfileBirthday"),
-        "height": schale_student.get("ProfileHeight"),
-        "hobby": schale_student.get("ProfileHobby"),
-        "school_year": schale_student.get("SchoolYear"),
-        "ssr_quote": schale_student.get("CharacterSSRNew")
-    }
-    
-    # Extract stats data
-    stats_data = {
-        "attack_power_1": schale_student.get("AttackPower1"),
-        "attack_power_100": schale_student.get("AttackPower100"),
-        "max_hp_1": schale_student.get("MaxHP1"),
-        "max_hp_100": schale_student.get("MaxHP100"),
-        "def_power_1": schale_student.get("DefensePower1"),
-        "def_power_100": schale_student.get("DefensePower100"),
-        "heal_power_1": schale_student.get("HealPower1"),
-        "heal_power_100": schale_student.get("HealPower100"),
-        "stability_point": schale_student.get("StabilityPoint"),
-        "dodge_point": schale_student.get("DodgePoint"),
-        "accuracy_point": schale_student.get("AccuracyPoint"),
-        "critical_point": schale_student.get("CriticalPoint"),
-        "critical_damage": schale_student.get("CriticalDamageRate")
-    }
-    
-    # Extract terrain data
-    terrain_data = {
-        "street": schale_student.get("StreetBattleAdaptation"),
-        "outdoor": schale_student.get("OutdoorBattleAdaptation"),
-        "indoor": schale_student.get("IndoorBattleAdaptation")
-    }
-    
-    # Extract weapon data
-    weapon_data = {
-        "name": schale_student.get("WeaponName"),
-        "image": schale_student.get("WeaponImg"),
-        "description": schale_student.get("WeaponDesc")
-    }
-    
-    # Extract skills data - only include fields that exist in SchaleDB
-    skills_data = []
-    skills_raw = schale_student.get("Skills", [])
-    
-    for skill in skills_raw:
-        if not skill:
-            continue
-            
-        skill_obj = {
-            "skill_type": skill.get("SkillType"),
-            "name": skill.get("Name"),
-            "desc": skill.get("Desc"),
-            "icon": skill.get("Icon")
-        }
-        
-        # Only add optional fields if they exist and are not null
-        if skill.get("Parameters"):
-            skill_obj["parameters"] = skill.get("Parameters")
-        if skill.get("Cost"):
-            skill_obj["cost"] = skill.get("Cost")
-        if skill.get("Duration"):
-            skill_obj["duration"] = skill.get("Duration")
-        if skill.get("Range"):
-            skill_obj["range"] = skill.get("Range")
-        if skill.get("Radius"):
-            skill_obj["radius"] = skill.get("Radius")
-        if skill.get("Effects"):
-            skill_obj["effects"] = skill.get("Effects")
-            
-        skills_data.append(skill_obj)
-    
-    # Extract equipment data
-    equipment_data = schale_student.get("Equipment", [])
-    
-    # Extract images data
-    images_data = {
-        "collection": schale_student.get("CollectionBG"),
-        "portrait": schale_student.get("PortraitImg"),
-        "lobby": schale_student.get("LobbyImg")
-    }
-    
-    return {
-        "id": char_id,
-        "name": name,
-        "dev_name": schale_student.get("DevName"),
-        "character_voice": schale_student.get("CharacterVoice"),
-        "illustrator": schale_student.get("Illustrator"),
-        "designer": schale_student.get("Designer"),
-        "collection_bg": schale_student.get("CollectionBG"),
-        "school_year": schale_student.get("SchoolYear"),
-        "is_limited": schale_student.get("IsLimited", False),
-        "source": "schaledb",
-        "profile": profile_data,
-        "stats": stats_data,
-        "terrain": terrain_data,
-        "weapon": weapon_data,
-        "skills": skills_data,
-        "equipment": equipment_data,
-        "images": images_data,
-        # Foreign key mappings - will need lookup functions
-        "school_name": schale_student.get("School"),
-        "club_name": schale_student.get("Club"),
-        "rarity_stars": schale_student.get("StarGrade"),
-        "squad_type": schale_student.get("SquadType"),
-        "position": schale_student.get("Position"),
-        "weapon_type": schale_student.get("WeaponType"),
-        "armor_type": schale_student.get("ArmorType"),
-        "bullet_type": schale_student.get("BulletType"),
-        "tactic_role": schale_student.get("TacticRole")
-    }
+    """Map SchaleDB student data to Supabase character format (see SCHALEDB_TO_SUPABASE)"""
+    return SCHALEDB_TO_SUPABASE.extract(schale_student)
 
 def process_and_save_data():
-    """Fetch, process and save corrected SchaleDB data"""
+    """Fetch, process and save corrected SchaleDB data
+    
+    Students are parsed, mapped and written one at a time, so peak memory
+    does not grow with the number of students.
+    """
     print("Fetching character data from SchaleDB...")
     
-    # Fetch raw data
-    raw_students = fetch_schaledb_data()
-    if not raw_students:
+    # Unchanged students (same raw hash, same mapping) are copied from the last output
+    state = RecordState('schaledb_students', signature=SCHALEDB_TO_SUPABASE.signature)
+    if state.signature_changed and state.path.exists():
+        print("Mapping changed since the last run, remapping every student")
+    try:
+        # An unchanged upstream does not help when the output must be remapped
+        spool, response, sha256 = fetch_schaledb_spool(conditional=not state.signature_changed)
+    except requests.RequestException as e:
+        print(f"Error fetching SchaleDB data: {str(e)}")
         print("No data fetched from SchaleDB")
         return
+    if spool is None:
+        print(f"SchaleDB data unchanged, keeping {OUTPUT_FILE}")
+        return
     
-    print(f"Fetched {len(raw_students)} characters from SchaleDB")
-    
-    # Process data
-    processed_characters = []
-    for student in raw_students:
-        mapped_char = map_schaledb_to_supabase_format(student)
-        if mapped_char:
-            processed_characters.append(mapped_char)
+    previous = PreviousOutput(OUTPUT_FILE)
+    fetched = 0
+    sample = None
+    try:
+        with JsonArrayWriter(OUTPUT_FILE, variants=True) as writer:
+            extract = SCHALEDB_TO_SUPABASE.extract
+            for student in iter_schaledb_students(spool):
+                fetched += 1
+                student_id = student.get("Id")
+                if not student_id:
+                    continue
+                mapped_char = None
+                if not state.check(student_id, student):
+                    mapped_char = previous.take(student_id)
+                if mapped_char is None:
+                    mapped_char = extract(student)
+                if mapped_char:
+                    writer.write(mapped_char)
+                    sample = sample or mapped_char
+    finally:
+        os.unlink(spool)
+    
+    if not fetched:
+        print("No data fetched from SchaleDB")
+        return
     
-    print(f"Processed {len(processed_characters)} characters successfully")
+    print(f"Fetched {fetched} characters from SchaleDB")
+    print(f"Processed {writer.count} characters successfully ({state.summary()})")
     
-    # Save to file
-    with open('corrected_schaledb_data.json', 'w', encoding='utf-8') as f:
-        json.dump(processed_characters, f, indent=2, ensure_ascii=False)
+    # Downstream steps (sync_corrected_data.py) only handle what changed
+    pending = PendingChanges(PENDING_CHANGES_FILE)
+    pending.add(upserts=state.added + state.changed, removed=state.removed)
+    pending.save()
+    state.save()
+    cache = get_shared_cache()
+    cache.remember(SCHALEDB_STUDENTS_URL, response, sha256)
+    cache.save()
     
-    print(f"✓ Saved corrected data to corrected_schaledb_data.json")
+    write_snapshot(OUTPUT_FILE)
+    print(f"✓ Saved corrected data to {OUTPUT_FILE}")
     
     # Print sample for verification
-    if processed_characters:
-        sample = processed_characters[0]
+    if sample:
         print(f"\nSample character: {sample.get('name')} (ID: {sample.get('id')})")
         print(f"Skills count: {len(sample.get('skills', []))}")
         if sample.get('skills'):
@@ -178,7 +131,17 @@ def process_and_save_data():
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Fetch and map SchaleDB student data")
+    parser.add_argument('--localized', nargs='?', const=','.join(SCHALEDB_LOCALES), default=None,
+                        metavar='LOCALES',
+                        help="also fetch these SchaleDB locales (comma-separated, default all) "
+                             f"concurrently and merge them into {LOCALIZATION_DIR}")
+    args = parser.parse_args()
+    
     process_and_save_data()
+    if args.localized:
+        print("\nFetching localized data from SchaleDB...")
+        fetch_localized_students(args.localized.split(','))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
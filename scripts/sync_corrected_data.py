@@ -3,21 +3,27 @@
 Sync corrected SchaleDB data to Supabase database
 """
 
-import json
+import argparse
 import os
-from typing import Dict, List, Any, Optional
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Dict, List, Any, Optional
+from ba_dataset_diff import changed_ids, load_patch
+from ba_record_state import PendingChanges
+from fetch_correct_schaledb import OUTPUT_FILE, PENDING_CHANGES_FILE
+from ba_schema import SUPABASE_CHARACTER
+from ba_snapshot import load_dataset
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 def load_corrected_data() -> List[Dict[str, Any]]:
     """Load corrected SchaleDB character data"""
     try:
-        with open('corrected_schaledb_data.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_dataset(OUTPUT_FILE)
     except FileNotFoundError:
-        print("Error: corrected_schaledb_data.json not found")
+        print(f"Error: {OUTPUT_FILE} not found")
         return []
 
-def create_supabase_client() -> Client:
+def create_supabase_client() -> 'Client':
     """Create Supabase client using environment variables"""
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
@@ -25,9 +31,11 @@ def create_supabase_client() -> Client:
     if not supabase_url or not supabase_key:
         raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables must be set")
     
+    # Imported here: the supabase package is slow to import and only this step needs it
+    from supabase import create_client
     return create_client(supabase_url, supabase_key)
 
-def lookup_foreign_key_id(supabase: Client, table: str, name_field: str, name_value: str) -> Optional[int]:
+def lookup_foreign_key_id(supabase: 'Client', table: str, name_field: str, name_value: str) -> Optional[int]:
     """Lookup foreign key ID by name"""
     if not name_value:
         return None
@@ -41,7 +49,7 @@ def lookup_foreign_key_id(supabase: Client, table: str, name_field: str, name_va
     
     return None
 
-def prepare_character_for_sync(supabase: Client, char: Dict[str, Any]) -> Dict[str, Any]:
+def prepare_character_for_sync(supabase: 'Client', char: Dict[str, Any]) -> Dict[str, Any]:
     """Prepare character data with proper foreign key IDs"""
     sync_data = {
         "id": char.get("id"),
@@ -99,8 +107,12 @@ def prepare_character_for_sync(supabase: Client, char: Dict[str, Any]) -> Dict[s
     
     return sync_data
 
-def sync_characters_to_supabase(supabase: Client, characters: List[Dict[str, Any]], batch_size: int = 10):
-    """Sync characters to Supabase in batches with proper foreign key mapping"""
+def sync_characters_to_supabase(supabase: 'Client', characters: List[Dict[str, Any]], batch_size: int = 10,
+                                synced: Optional[List[Any]] = None):
+    """Sync characters to Supabase in batches with proper foreign key mapping
+    
+    Ids updated successfully are appended to ``synced`` when given.
+    """
     
     total_updated = 0
     total_chars = len(characters)
@@ -123,6 +135,8 @@ def sync_characters_to_supabase(supabase: Client, characters: List[Dict[str, Any
                 
                 if result.data:
                     total_updated += 1
+                    if synced is not None:
+                        synced.append(char_id)
                     print(f"✓ Updated character {char_id}: {char.get('name', 'Unknown')}")
                 else:
                     print(f"✗ Failed to update character {char_id}: {char.get('name', 'Unknown')}")
@@ -134,8 +148,17 @@ def sync_characters_to_supabase(supabase: Client, characters: List[Dict[str, Any
     print(f"\nSync completed: {total_updated}/{total_chars} characters updated successfully")
     return total_updated
 
-def main():
+def main(argv=None):
     """Main sync function"""
+    parser = argparse.ArgumentParser(description="Sync corrected SchaleDB data to Supabase")
+    parser.add_argument('--all', action='store_true',
+                        help="sync every character instead of only those changed since the last sync")
+    parser.add_argument('--strict', action='store_true',
+                        help="sync nothing when any character fails schema validation")
+    parser.add_argument('--patch', metavar='FILE',
+                        help="sync the characters added or modified in a data/changes patch set")
+    args = parser.parse_args(argv)
+    
     print("Starting Blue Archive data sync to Supabase...")
     
     # Load corrected data
@@ -146,6 +169,39 @@ def main():
     
     print(f"Loaded {len(characters)} characters from corrected data")
     
+    # Only characters added or changed since the last sync, unless --all
+    pending = PendingChanges(PENDING_CHANGES_FILE)
+    if args.patch:
+        patch = load_patch(args.patch)['datasets'].get(OUTPUT_FILE)
+        if patch is None:
+            print(f"No {OUTPUT_FILE} changes in {args.patch}")
+            return
+        ids = set(changed_ids(patch))
+        characters = [char for char in characters if char.get(patch['id_field']) in ids]
+        if patch['removed']:
+            print(f"Removed upstream (left in Supabase): {', '.join(map(str, patch['removed']))}")
+        print(f"Syncing {len(characters)} characters from {args.patch}")
+    elif not args.all and pending.exists():
+        characters = [char for char in characters if str(char.get('id')) in pending.upserts]
+        if pending.removed:
+            print(f"Removed upstream (left in Supabase): {', '.join(sorted(pending.removed))}")
+        if not characters:
+            print("No changed characters to sync")
+            pending.done(pending.removed)
+            pending.save()
+            return
+        print(f"Syncing {len(characters)} changed characters")
+    
+    # Reject malformed rows locally instead of one failed request at a time;
+    # they stay pending until they validate
+    report = SUPABASE_CHARACTER.validate_all(characters)
+    if not report.ok:
+        print(f"✗ Schema validation failed\n{report.summary()}")
+        if args.strict or not report.valid:
+            return
+        print(f"Syncing the {len(report.valid)} valid characters")
+    characters = report.valid
+    
     # Create Supabase client
     try:
         supabase = create_supabase_client()
@@ -155,7 +211,11 @@ def main():
         return
     
     # Sync data
-    updated_count = sync_characters_to_supabase(supabase, characters)
+    synced: List[Any] = []
+    updated_count = sync_characters_to_supabase(supabase, characters, synced=synced)
+    pending.done(synced)
+    pending.done(pending.removed)
+    pending.save()
     
     if updated_count > 0:
         print(f"✓ Successfully synced {updated_count} characters to Supabase")
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# The scripts import each other as top-level modules
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
@@ -0,0 +1,56 @@
+import json
+
+import ba_asset_discovery
+from ba_delta_sync import DeltaPlanner, load_listing
+from ba_download_engine import DownloadJob
+from conftest import FIXTURES
+
+CDN = 'https://schaledb.com/images'
+
+def test_listing_fixture_keeps_only_image_blobs():
+    listing = load_listing(FIXTURES / 'schaledb_tree.json')
+    assert set(listing) == {
+        'student/icon/10000.webp',
+        'student/icon/10001.webp',
+        'student/icon/10002.webp',
+        'equipment/icon/equipment_icon_hat_tier1.webp',
+    }
+
+def test_discovered_ids_from_fixture_data(monkeypatch):
+    monkeypatch.setattr(ba_asset_discovery, 'STUDENT_SOURCES', [
+        (str(FIXTURES / 'missing.json'), 'id'),
+        (str(FIXTURES / 'students.json'), 'Id'),
+    ])
+    monkeypatch.setattr(ba_asset_discovery, 'EQUIPMENT_FILE', str(FIXTURES / 'equipment.json'))
+
+    assert ba_asset_discovery.discover_student_ids() == [10000, 10001, 10002, 13000]
+    assert ba_asset_discovery.discover_school_ids() == ['Gehenna', 'Abydos']
+    # Dict-keyed files fall back to the key when a record has no icon
+    assert ba_asset_discovery.discover_equipment_ids() == [
+        'equipment_icon_hat_tier1', 'equipment_icon_hat_tier2', '1002'
+    ]
+
+def test_delta_plan_against_fixture_listing(tmp_path):
+    images = tmp_path / 'images'
+    (images / 'student' / 'icon').mkdir(parents=True)
+    (images / 'student' / 'icon' / '10000.webp').write_bytes(b'aru-v1')   # matches the listing
+    (images / 'student' / 'icon' / '10001.webp').write_bytes(b'eimi-v1')  # changed upstream
+
+    state = tmp_path / 'delta_state.json'
+    state.write_text(json.dumps({'student/icon/9999.webp': '0' * 40}))
+
+    jobs = [
+        DownloadJob(f"{CDN}/student/icon/{student_id}.webp",
+                    images / 'student' / 'icon' / f"{student_id}.webp",
+                    key=f"student/icon/{student_id}.webp")
+        for student_id in (10000, 10001, 10002, 13000)
+    ]
+    planner = DeltaPlanner(load_listing(FIXTURES / 'schaledb_tree.json'), path=state)
+    plan = planner.plan(jobs)
+
+    assert [job.key for job in plan.unchanged] == ['student/icon/10000.webp']
+    assert [job.key for job in plan.queued] == ['student/icon/10001.webp', 'student/icon/10002.webp']
+    assert [job.key for job in plan.absent] == ['student/icon/13000.webp']
+    assert plan.deleted == ['student/icon/9999.webp']
+    # The file already on disk is adopted without a download
+    assert planner.synced['student/icon/10000.webp'] == planner.listing['student/icon/10000.webp']
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+import ba_asset_store
+from ba_asset_store import AssetStore
+from ba_http_cache import sha256_bytes
+
+BODY = b'webp bytes'
+KEY = 'student/icon/10000.webp'
+
+def _ingest(store, tmp_path, body=BODY):
+    tmp = tmp_path / 'download.part'
+    tmp.write_bytes(body)
+    sha256 = sha256_bytes(body)
+    store.ingest(tmp, sha256)
+    return sha256
+
+@pytest.mark.parametrize('link_mode', ['hardlink', 'symlink', 'copy'])
+def test_layouts_share_one_object(tmp_path, link_mode):
+    store = AssetStore(tmp_path / 'objects', link_mode=link_mode)
+    sha256 = _ingest(store, tmp_path)
+    # A second download of the same bytes is dropped
+    assert _ingest(store, tmp_path) == sha256
+    assert not (tmp_path / 'download.part').exists()
+
+    icon = tmp_path / 'images' / 'student' / 'icon' / '10000.webp'
+    legacy = tmp_path / 'images' / 'characters' / 'icons' / '10000.webp'
+    assert store.link(sha256, icon)
+    assert store.link(sha256, legacy)
+    assert icon.read_bytes() == legacy.read_bytes() == BODY
+    # Already published: nothing is rewritten
+    assert not store.link(sha256, icon)
+    assert store.is_published(sha256, legacy)
+    if link_mode == 'hardlink':
+        assert os.path.samefile(icon, store.object_path(sha256))
+
+def test_relinking_replaces_a_changed_file(tmp_path):
+    store = AssetStore(tmp_path / 'objects')
+    dest = tmp_path / 'images' / 'icon.webp'
+    assert store.link(_ingest(store, tmp_path, b'old'), dest)
+    assert store.link(_ingest(store, tmp_path, b'new'), dest)
+    assert dest.read_bytes() == b'new'
+
+def test_adopt_keeps_the_published_file(tmp_path):
+    store = AssetStore(tmp_path / 'objects')
+    dest = tmp_path / 'images' / 'icon.webp'
+    dest.parent.mkdir(parents=True)
+    dest.write_bytes(BODY)
+    sha256 = store.adopt(dest)
+    assert sha256 == sha256_bytes(BODY)
+    assert store.is_published(sha256, dest)
+
+def test_index_freshness_and_persistence(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ba_asset_store.time, 'time', lambda: now[0])
+    store = AssetStore(tmp_path / 'objects', fresh_for=60, index_path=tmp_path / 'store_index.json')
+    sha256 = _ingest(store, tmp_path)
+    store.record(KEY, sha256)
+    assert store.is_fresh(KEY)
+    store.save()
+
+    reloaded = AssetStore(tmp_path / 'objects', fresh_for=60, index_path=tmp_path / 'store_index.json')
+    assert reloaded.lookup(KEY) == sha256
+    now[0] += 61
+    assert not reloaded.is_fresh(KEY)
+    # A fresh entry whose object is gone must be fetched again
+    now[0] = 1000.0
+    os.unlink(reloaded.object_path(sha256))
+    assert not reloaded.is_fresh(KEY)
@@ -0,0 +1,47 @@
+import json
+
+from ba_columnar import character_statistics, characters_frame, frame_records, statistics_frame
+
+RECORDS = [
+    {'id': 10000, 'name': 'Aru', 'school': 'Gehenna', 'rarity': 3},
+    {'id': 10001, 'name': 'Eimi', 'school': 'Millennium', 'rarity': 2},
+    {'id': 10002, 'name': 'Haruna', 'school': 'Gehenna', 'rarity': 3},
+    {'id': 10003, 'name': 'Hifumi', 'school': None, 'rarity': None},
+    {'id': 10004, 'name': 'Hoshino', 'school': '', 'rarity': ''},
+    {'id': 10005, 'name': 'Shiroko', 'rarity': 1},
+    {'id': 10006, 'name': 'Iroha', 'school': 'Gehenna'},
+    {'id': 10007, 'name': 'Izuna', 'school': 'Hyakkiyako', 'rarity': '3'},
+]
+
+def reference_statistics(processed_characters):
+    """The per-record counting the columnar stage replaced"""
+    stats = {'total_characters': len(processed_characters), 'by_school': {}, 'by_rarity': {}}
+    for char in processed_characters:
+        school = char.get('school', 'Unknown')
+        rarity = char.get('rarity', 'Unknown')
+        stats['by_school'][school] = stats['by_school'].get(school, 0) + 1
+        stats['by_rarity'][rarity] = stats['by_rarity'].get(rarity, 0) + 1
+    return stats
+
+def _json(stats):
+    return json.dumps({key: stats[key] for key in ('total_characters', 'by_school', 'by_rarity')},
+                      ensure_ascii=False, indent=2)
+
+def test_statistics_match_the_per_record_counts():
+    stats = character_statistics(statistics_frame(RECORDS))
+    assert stats['by_school'] == reference_statistics(RECORDS)['by_school']
+    assert stats['by_rarity'] == reference_statistics(RECORDS)['by_rarity']
+    # Same keys in the same order once written, e.g. "3" and not "3.0"
+    assert _json(stats) == _json(reference_statistics(RECORDS))
+
+def test_statistics_keep_previous_keys():
+    stats = character_statistics(statistics_frame(RECORDS[:1]), {'game_version': '1.2', 'total_characters': 9})
+    assert stats['game_version'] == '1.2'
+    assert stats['total_characters'] == 1
+
+def test_normalized_rarity_is_integer():
+    records = frame_records(characters_frame(RECORDS))
+    assert [record['rarity'] for record in records] == [3, 2, 3, None, None, 1, None, 3]
+    assert json.dumps(records[0]['rarity']) == '3'
+    # Blank strings are kept, not folded into null
+    assert records[4]['school'] == ''
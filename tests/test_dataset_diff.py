@@ -0,0 +1,42 @@
+import json
+
+from ba_dataset_diff import apply_ops, apply_patch, changed_ids, diff_datasets, diff_values
+
+OLD = [
+    {'id': 10000, 'name': 'Aru', 'school': 'Gehenna', 'skills': [{'name': 'EX', 'cost': 3}],
+     'tags': ['striker', 'explosive']},
+    {'id': 10002, 'name': 'Haruna', 'school': 'Gehenna', 'path/name': 'a~b'},
+    {'id': 10004, 'name': 'Eimi', 'school': 'Millennium', 'skills': []},
+]
+NEW = [
+    {'id': 10000, 'name': 'Aru', 'school': 'Gehenna', 'skills': [{'name': 'EX', 'cost': 4}, {'name': 'Normal'}],
+     'tags': ['striker']},
+    # Added between existing records, as an upstream sorted by id does
+    {'id': 10001, 'name': 'Kayoko', 'school': 'Gehenna'},
+    {'id': 10002, 'name': 'Haruna', 'school': 'Gehenna', 'path/name': 'a~c', 'rarity': 3},
+    {'id': 10003, 'name': 'Izumi', 'school': 'Gehenna'},
+]
+
+def test_patch_round_trip():
+    diff = diff_datasets(OLD, NEW)
+    assert diff.summary() == '2 added, 1 removed, 2 modified (of 4)'
+    # Through JSON, as written to data/changes
+    patch = json.loads(json.dumps(diff.to_patch()))
+    assert apply_patch(OLD, patch) == NEW
+    assert changed_ids(patch) == [10001, 10003, 10000, 10002]
+
+def test_round_trip_of_reordered_records():
+    new = list(reversed(OLD))
+    diff = diff_datasets(OLD, new)
+    assert not diff.changed
+    assert apply_patch(OLD, diff.to_patch()) == new
+
+def test_patch_without_order_appends_added_records():
+    patch = diff_datasets(OLD, NEW).to_patch()
+    del patch['order']
+    assert [record['id'] for record in apply_patch(OLD, patch)] == [10000, 10002, 10001, 10003]
+
+def test_value_ops_round_trip():
+    for old, new in [(OLD[0], NEW[0]), (OLD[2], NEW[2]), ([1, 2, 3], [1]), ({'a': 1}, [1]), (1, 1.0)]:
+        assert apply_ops(old, diff_values(old, new)) == new
+    assert diff_values(OLD, OLD) == []
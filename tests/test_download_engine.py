@@ -0,0 +1,66 @@
+import ba_download_engine
+from ba_asset_index import LocalAssetIndex
+from ba_asset_store import AssetStore
+from ba_download_engine import AsyncDownloadEngine, DownloadJob
+from ba_http_cache import NegativeCache, ValidatorCache
+from ba_mirrors import MirrorSelector
+
+URL = 'https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/images/student/icon/10000.webp'
+BODY = b'webp bytes'
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=b''):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+        self.url = URL
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def close(self):
+        pass
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+def _engine(tmp_path, session, **kwargs):
+    return AsyncDownloadEngine(
+        session, workers=1, verbose=False,
+        cache=ValidatorCache(tmp_path / 'validators.json'),
+        store=AssetStore(tmp_path / 'objects'),
+        index=LocalAssetIndex(tmp_path / 'images', tmp_path / 'index.json'),
+        negative_cache=NegativeCache(tmp_path / 'missing.json'),
+        selector=MirrorSelector(path=tmp_path / 'mirrors.json'),
+        **kwargs)
+
+def _job(tmp_path):
+    return DownloadJob(URL, tmp_path / 'images' / 'student' / 'icon' / '10000.webp')
+
+def test_throttled_response_waits_for_retry_after(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ba_download_engine.time, 'sleep', sleeps.append)
+    session = FakeSession([FakeResponse(429, {'Retry-After': '7'}),
+                           FakeResponse(503),
+                           FakeResponse(200, {'Content-Length': str(len(BODY))}, BODY)])
+    stats = _engine(tmp_path, session).run([_job(tmp_path)])
+    assert stats['downloaded'] == 1
+    assert session.calls == 3
+    # Retry-After when given, else exponential backoff
+    assert sleeps == [7.0, ba_download_engine.RETRY_BACKOFF * 2]
+    assert _job(tmp_path).dest.read_bytes() == BODY
+
+def test_throttled_job_fails_after_its_retries(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ba_download_engine.time, 'sleep', sleeps.append)
+    session = FakeSession([FakeResponse(429, {'Retry-After': '1'}) for _ in range(3)])
+    stats = _engine(tmp_path, session, retries=3).run([_job(tmp_path)])
+    assert stats['failed'] == 1
+    # No wait after the last attempt
+    assert sleeps == [1.0, 1.0]
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import fetch_correct_schaledb
+from ba_field_mapping import SCHALEDB_TO_SUPABASE, Field
+from ba_http_cache import ValidatorCache
+from conftest import FIXTURES
+
+class FakeResponse:
+    def __init__(self, status_code, body=b''):
+        self.status_code = status_code
+        self.body = body
+        self.headers = {'ETag': '"students-v1"'}
+        self.url = fetch_correct_schaledb.SCHALEDB_STUDENTS_URL
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+class UnchangedUpstream:
+    """Serves one students.json and answers 304 to every conditional request"""
+
+    def __init__(self, body):
+        self.body = body
+        self.conditional = 0
+
+    def get(self, url, headers=None, **kwargs):
+        if (headers or {}).get('If-None-Match') == '"students-v1"':
+            self.conditional += 1
+            return FakeResponse(304)
+        return FakeResponse(200, self.body)
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    student = json.loads((FIXTURES / 'schaledb_student.json').read_text(encoding='utf-8'))
+    session = UnchangedUpstream(json.dumps([student]).encode('utf-8'))
+    cache = ValidatorCache(tmp_path / 'validators.json')
+    monkeypatch.setattr(fetch_correct_schaledb, 'get_session', lambda: session)
+    monkeypatch.setattr(fetch_correct_schaledb, 'get_shared_cache', lambda: cache)
+    return session
+
+def _output():
+    with open(fetch_correct_schaledb.OUTPUT_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_mapping_change_remaps_an_unchanged_upstream(upstream, monkeypatch):
+    fetch_correct_schaledb.process_and_save_data()
+    assert 'path_name' not in _output()[0]
+
+    # Same mapping and upstream answers 304: the output is kept
+    fetch_correct_schaledb.process_and_save_data()
+    assert upstream.conditional == 1
+
+    edited = SCHALEDB_TO_SUPABASE.extend(path_name=Field('PathName'))
+    monkeypatch.setattr(fetch_correct_schaledb, 'SCHALEDB_TO_SUPABASE', edited)
+    fetch_correct_schaledb.process_and_save_data()
+    # The new signature skips the conditional request and remaps the student
+    assert upstream.conditional == 1
+    assert _output()[0]['path_name'] == 'aru'
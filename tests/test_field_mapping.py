@@ -0,0 +1,256 @@
+"""Compiled mappings against the hand-written functions they replaced"""
+
+import random
+
+import pytest
+
+from ba_field_mapping import (
+    CDN_BASE_URL, ENNEAD_CHARACTER, SCHALEDB_TO_SUPABASE, TORIKUSHII_CHARACTER, TORIKUSHII_TO_SCHALEDB
+)
+
+RECORDS = 500
+SCALARS = [None, 0, 1, 3, 42, 1.5, '', 'x', 'Gehenna', True, False]
+STATS = ['AttackPower', 'MaxHP', 'DefensePower', 'HealPower', 'AccuracyPoint', 'DodgePoint',
+         'CriticalPoint', 'StabilityPoint', 'Range', 'AmmoCount', 'AmmoCost']
+
+def map_schaledb_to_supabase_format(schale_student):
+    char_id = schale_student.get("Id")
+    if not char_id:
+        return None
+    skills_data = []
+    for skill in schale_student.get("Skills", []):
+        if not skill:
+            continue
+        skill_obj = {
+            "skill_type": skill.get("SkillType"),
+            "name": skill.get("Name"),
+            "desc": skill.get("Desc"),
+            "icon": skill.get("Icon")
+        }
+        for source, target in (("Parameters", "parameters"), ("Cost", "cost"), ("Duration", "duration"),
+                               ("Range", "range"), ("Radius", "radius"), ("Effects", "effects")):
+            if skill.get(source):
+                skill_obj[target] = skill.get(source)
+        skills_data.append(skill_obj)
+    return {
+        "id": char_id,
+        "name": schale_student.get("Name"),
+        "dev_name": schale_student.get("DevName"),
+        "character_voice": schale_student.get("CharacterVoice"),
+        "illustrator": schale_student.get("Illustrator"),
+        "designer": schale_student.get("Designer"),
+        "collection_bg": schale_student.get("CollectionBG"),
+        "school_year": schale_student.get("SchoolYear"),
+        "is_limited": schale_student.get("IsLimited", False),
+        "source": "schaledb",
+        "profile": {
+            "age": schale_student.get("ProfileAge"),
+            "birthday": schale_student.get("ProfileBirthday"),
+            "height": schale_student.get("ProfileHeight"),
+            "hobby": schale_student.get("ProfileHobby"),
+            "school_year": schale_student.get("SchoolYear"),
+            "ssr_quote": schale_student.get("CharacterSSRNew")
+        },
+        "stats": {
+            "attack_power_1": schale_student.get("AttackPower1"),
+            "attack_power_100": schale_student.get("AttackPower100"),
+            "max_hp_1": schale_student.get("MaxHP1"),
+            "max_hp_100": schale_student.get("MaxHP100"),
+            "def_power_1": schale_student.get("DefensePower1"),
+            "def_power_100": schale_student.get("DefensePower100"),
+            "heal_power_1": schale_student.get("HealPower1"),
+            "heal_power_100": schale_student.get("HealPower100"),
+            "stability_point": schale_student.get("StabilityPoint"),
+            "dodge_point": schale_student.get("DodgePoint"),
+            "accuracy_point": schale_student.get("AccuracyPoint"),
+            "critical_point": schale_student.get("CriticalPoint"),
+            "critical_damage": schale_student.get("CriticalDamageRate")
+        },
+        "terrain": {
+            "street": schale_student.get("StreetBattleAdaptation"),
+            "outdoor": schale_student.get("OutdoorBattleAdaptation"),
+            "indoor": schale_student.get("IndoorBattleAdaptation")
+        },
+        "weapon": {
+            "name": schale_student.get("WeaponName"),
+            "image": schale_student.get("WeaponImg"),
+            "description": schale_student.get("WeaponDesc")
+        },
+        "skills": skills_data,
+        "equipment": schale_student.get("Equipment", []),
+        "images": {
+            "collection": schale_student.get("CollectionBG"),
+            "portrait": schale_student.get("PortraitImg"),
+            "lobby": schale_student.get("LobbyImg")
+        },
+        "school_name": schale_student.get("School"),
+        "club_name": schale_student.get("Club"),
+        "rarity_stars": schale_student.get("StarGrade"),
+        "squad_type": schale_student.get("SquadType"),
+        "position": schale_student.get("Position"),
+        "weapon_type": schale_student.get("WeaponType"),
+        "armor_type": schale_student.get("ArmorType"),
+        "bullet_type": schale_student.get("BulletType"),
+        "tactic_role": schale_student.get("TacticRole")
+    }
+
+def torikushii_character(char_id, char_data):
+    if not char_data.get('Name'):
+        return None
+    return {
+        'id': int(char_id),
+        'name': char_data.get('Name', ''),
+        'dev_name': char_data.get('DevName', ''),
+        'school': char_data.get('School', ''),
+        'club': char_data.get('Club', ''),
+        'rarity': char_data.get('StarGrade', 3),
+        'squad_type': char_data.get('SquadType', ''),
+        'position': char_data.get('Position', ''),
+        'weapon_type': char_data.get('WeaponType', ''),
+        'armor_type': char_data.get('ArmorType', ''),
+        'bullet_type': char_data.get('BulletType', ''),
+        'terrain': char_data.get('Terrain', {}),
+        'profile': char_data.get('Profile', {}),
+        'stats': char_data.get('Stat', {}),
+        'skills': char_data.get('Skills', []),
+        'weapon': char_data.get('Weapon', {}),
+        'equipment': char_data.get('Equipment', []),
+        'is_limited': char_data.get('IsLimited', False)
+    }
+
+def torikushii_to_schaledb(char_id, char_data):
+    if not char_data.get('Name'):
+        return None
+    stat = char_data.get('Stat', {})
+    return {
+        "Id": int(char_id),
+        "Name": char_data.get('Name', ''),
+        "DevName": char_data.get('DevName', ''),
+        "School": char_data.get('School', ''),
+        "Club": char_data.get('Club', ''),
+        "StarGrade": char_data.get('StarGrade', 3),
+        "SquadType": char_data.get('SquadType', ''),
+        "TacticRole": char_data.get('TacticRole', ''),
+        "Position": char_data.get('Position', ''),
+        "BulletType": char_data.get('BulletType', ''),
+        "ArmorType": char_data.get('ArmorType', ''),
+        "WeaponType": char_data.get('WeaponType', ''),
+        "Equipment": char_data.get('Equipment', []),
+        "Terrain": {
+            "Street": char_data.get('Terrain', {}).get('Street', 'D'),
+            "Outdoor": char_data.get('Terrain', {}).get('Outdoor', 'D'),
+            "Indoor": char_data.get('Terrain', {}).get('Indoor', 'D')
+        },
+        "Profile": {
+            name: char_data.get('Profile', {}).get(name, '')
+            for name in ('Age', 'Birthday', 'Height', 'Hobby', 'Designer', 'Illustrator', 'CV')
+        },
+        "Stat": {
+            f"{name}1": stat.get(name, [0])[0] if stat.get(name) else 0
+            for name in STATS
+        },
+        "Skills": char_data.get('Skills', []),
+        "Weapon": char_data.get('Weapon', {}),
+        "Released": [True, True],
+        "IsLimited": char_data.get('IsLimited', False)
+    }
+
+def ennead_character(char):
+    if not (char.get('name') and char.get('school')):
+        return None
+    dev_name = char.get('devname', char.get('name', '').lower())
+    return {
+        'id': char.get('id'),
+        'name': char.get('name'),
+        'dev_name': dev_name,
+        'rarity': char.get('rarity'),
+        'school': char.get('school'),
+        'club': char.get('club'),
+        'type': char.get('role'),
+        'weapon_type': char.get('weaponType'),
+        'armor_type': char.get('armorType'),
+        'bullet_type': char.get('bulletType'),
+        'range': char.get('range'),
+        'equipment': char.get('equipment', []),
+        'image_url': f"{CDN_BASE_URL}/images/characters/{dev_name}.png",
+        'school_icon_url': f"{CDN_BASE_URL}/images/schools/{char.get('school', '').lower()}.png",
+    }
+
+def _random_record(rng, keys, nested=None):
+    """Random subset of ``keys`` with scalar values; ``nested`` keys get a dict or list from its factory"""
+    record = {key: rng.choice(SCALARS) for key in keys if rng.random() < 0.7}
+    for key, factory in (nested or {}).items():
+        if rng.random() < 0.8:
+            record[key] = factory()
+    return record
+
+def _schaledb_student(rng):
+    keys = ['Id', 'Name', 'DevName', 'CharacterVoice', 'Illustrator', 'Designer', 'CollectionBG', 'SchoolYear',
+            'IsLimited', 'ProfileAge', 'ProfileBirthday', 'ProfileHeight', 'ProfileHobby', 'CharacterSSRNew',
+            'AttackPower1', 'AttackPower100', 'MaxHP1', 'MaxHP100', 'DefensePower1', 'DefensePower100',
+            'HealPower1', 'HealPower100', 'StabilityPoint', 'DodgePoint', 'AccuracyPoint', 'CriticalPoint',
+            'CriticalDamageRate', 'StreetBattleAdaptation', 'OutdoorBattleAdaptation', 'IndoorBattleAdaptation',
+            'WeaponName', 'WeaponImg', 'WeaponDesc', 'PortraitImg', 'LobbyImg', 'School', 'Club', 'StarGrade',
+            'SquadType', 'Position', 'WeaponType', 'ArmorType', 'BulletType', 'TacticRole']
+    skill_keys = ['SkillType', 'Name', 'Desc', 'Icon', 'Parameters', 'Cost', 'Duration', 'Range', 'Radius', 'Effects']
+    return _random_record(rng, keys, {
+        'Skills': lambda: [rng.choice([None, {}, _random_record(rng, skill_keys)]) for _ in range(rng.randint(0, 5))],
+        'Equipment': lambda: [rng.choice(SCALARS) for _ in range(rng.randint(0, 3))],
+    })
+
+def _torikushii_character(rng):
+    keys = ['Name', 'DevName', 'School', 'Club', 'StarGrade', 'SquadType', 'TacticRole', 'Position',
+            'WeaponType', 'ArmorType', 'BulletType', 'IsLimited']
+    return _random_record(rng, keys, {
+        'Terrain': lambda: _random_record(rng, ['Street', 'Outdoor', 'Indoor']),
+        'Profile': lambda: _random_record(rng, ['Age', 'Birthday', 'Height', 'Hobby', 'Designer', 'Illustrator', 'CV']),
+        'Stat': lambda: {name: [rng.randint(0, 9999) for _ in range(rng.randint(0, 3))]
+                         for name in STATS if rng.random() < 0.7},
+        'Skills': lambda: [_random_record(rng, ['Name', 'Desc']) for _ in range(rng.randint(0, 3))],
+        'Weapon': lambda: _random_record(rng, ['Name', 'Desc']),
+        'Equipment': lambda: [rng.choice(['Hat', 'Gloves', 'Shoes']) for _ in range(rng.randint(0, 3))],
+    })
+
+def _ennead_character(rng):
+    record = _random_record(rng, ['id', 'rarity', 'club', 'role', 'weaponType', 'armorType', 'bulletType', 'range'], {
+        'equipment': lambda: [rng.choice(['Hat', 'Gloves']) for _ in range(rng.randint(0, 3))],
+    })
+    for key in ('name', 'school', 'devname'):
+        if rng.random() < 0.8:
+            record[key] = rng.choice(['', 'Aru', 'Gehenna', 'Trinity'])
+    return record
+
+@pytest.fixture
+def rng():
+    return random.Random(2024)
+
+def test_schaledb_to_supabase(rng):
+    for _ in range(RECORDS):
+        student = _schaledb_student(rng)
+        assert SCHALEDB_TO_SUPABASE(student) == map_schaledb_to_supabase_format(student)
+
+def test_torikushii_character(rng):
+    for char_id in range(RECORDS):
+        char_data = _torikushii_character(rng)
+        assert TORIKUSHII_CHARACTER(char_data, str(char_id)) == torikushii_character(str(char_id), char_data)
+
+def test_torikushii_to_schaledb(rng):
+    for char_id in range(RECORDS):
+        char_data = _torikushii_character(rng)
+        assert TORIKUSHII_TO_SCHALEDB(char_data, str(char_id)) == torikushii_to_schaledb(str(char_id), char_data)
+
+def test_ennead_character(rng):
+    for _ in range(RECORDS):
+        char = _ennead_character(rng)
+        mapped, expected = ENNEAD_CHARACTER(char), ennead_character(char)
+        if expected is None:
+            assert mapped is None
+            continue
+        # The only field that differs between two calls
+        assert isinstance(mapped.pop('updated_at'), str)
+        assert mapped == expected
+
+def test_map_all_matches_per_record(rng):
+    raw = {str(char_id): _torikushii_character(rng) for char_id in range(RECORDS)}
+    expected = [m for m in (torikushii_character(k, v) for k, v in raw.items()) if m is not None]
+    assert TORIKUSHII_CHARACTER.map_all(raw) == expected
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import ba_http_cache
+from ba_asset_index import atomic_write_json
+from ba_http_cache import NegativeCache, ValidatorCache, conditional_get, sha256_bytes
+
+URL = 'https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/data/en/students.json'
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.sent_headers = None
+
+    def get(self, url, headers=None, **kwargs):
+        self.sent_headers = headers
+        return self.response
+
+def test_validators_round_trip(tmp_path):
+    cache = ValidatorCache(tmp_path / 'validators.json')
+    response = FakeResponse(200, b'[]', {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+    cache.remember(URL, response, records=0)
+    cache.save()
+
+    reloaded = ValidatorCache(tmp_path / 'validators.json')
+    assert reloaded.conditional_headers(URL) == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'
+    }
+    assert reloaded.get(URL) == {'etag': '"v1"', 'last_modified': 'Wed, 21 Oct 2015 07:28:00 GMT',
+                                 'sha256': sha256_bytes(b'[]'), 'records': 0}
+    reloaded.forget(URL)
+    assert reloaded.conditional_headers(URL) == {}
+
+def test_conditional_get_only_revalidates_existing_outputs(tmp_path):
+    cache = ValidatorCache(tmp_path / 'validators.json')
+    cache.remember(URL, FakeResponse(200, b'[1]', {'ETag': '"v1"'}))
+    output = tmp_path / 'students.json'
+
+    session = FakeSession(FakeResponse(200, b'[1]'))
+    # A deleted output is always downloaded in full
+    assert conditional_get(session, URL, output, cache=cache)[1]
+    assert session.sent_headers == {}
+
+    output.write_text('[1]')
+    session = FakeSession(FakeResponse(304))
+    assert not conditional_get(session, URL, output, cache=cache)[1]
+    assert session.sent_headers == {'If-None-Match': '"v1"'}
+    # A 200 with the same body counts as unchanged; a new body does not
+    assert not conditional_get(FakeSession(FakeResponse(200, b'[1]')), URL, output, cache=cache)[1]
+    assert conditional_get(FakeSession(FakeResponse(200, b'[2]')), URL, output, cache=cache)[1]
+
+def test_atomic_write_json_replaces_the_file(tmp_path):
+    path = tmp_path / 'state' / 'data.json'
+    atomic_write_json(path, {'b': 1, 'a': 2}, sort_keys=True)
+    assert path.read_text() == '{"a": 2, "b": 1}'
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {'a': object()})
+    # A failed dump keeps the old file and leaves no temp file behind
+    assert json.loads(path.read_text()) == {'a': 2, 'b': 1}
+    assert [p.name for p in path.parent.iterdir()] == ['data.json']
+
+def test_negative_cache_expires_and_prunes(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ba_http_cache.time, 'time', lambda: now[0])
+    cache = NegativeCache(tmp_path / 'missing.json', ttl=60)
+    cache.record(URL)
+    cache.record(URL + '?old')
+    assert cache.is_missing(URL)
+
+    now[0] += 30
+    cache.record(URL)
+    now[0] += 45
+    # The first URL was re-recorded; the second one's TTL has passed
+    assert cache.is_missing(URL)
+    assert not cache.is_missing(URL + '?old')
+    cache.save()
+    assert json.loads((tmp_path / 'missing.json').read_text()) == {URL: 1090.0}
+
+    reloaded = NegativeCache(tmp_path / 'missing.json', ttl=60)
+    assert reloaded.is_missing(URL)
+    reloaded.forget(URL)
+    assert not reloaded.is_missing(URL)
@@ -0,0 +1,57 @@
+import pytest
+
+from ba_download_engine import DownloadJob
+from ba_job_journal import DONE, FAILED, IN_FLIGHT, MISSING, PENDING, JobJournal
+
+BASE = 'https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/images/student'
+
+def _job(kind, char_id, priority=0):
+    return DownloadJob(f"{BASE}/{kind}/{char_id}.webp", f"images/student/{kind}/{char_id}.webp",
+                       priority=priority)
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(tmp_path / 'journal.sqlite3', max_attempts=2)
+    yield journal
+    journal.close()
+
+def test_runnable_orders_pending_by_priority_then_failed(journal):
+    lobby, icon, portrait = _job('lobby', 10000, 0), _job('icon', 10000, 3), _job('portrait', 10000, 2)
+    jobs = [lobby, icon, portrait]
+    journal.plan(jobs)
+    journal.mark([icon], FAILED, 'timeout')
+    assert journal.runnable(jobs) == [portrait, lobby, icon]
+
+    # Failed jobs stop being retried after max_attempts
+    journal.mark([icon], FAILED, 'timeout')
+    journal.mark([portrait, lobby], DONE)
+    assert journal.runnable(jobs) == []
+    assert journal.is_complete()
+
+def test_interrupted_run_resumes(tmp_path):
+    jobs = [_job('icon', char_id) for char_id in (10000, 10001, 10002)]
+    journal = JobJournal(tmp_path / 'journal.sqlite3')
+    journal.plan(jobs)
+    journal.mark(jobs[:1], DONE)
+    journal.mark(jobs[1:2], IN_FLIGHT)
+    journal.close()
+
+    # In-flight work from the dead run is pending again; finished work is not redone
+    resumed = JobJournal(tmp_path / 'journal.sqlite3')
+    assert resumed.counts() == {DONE: 1, PENDING: 2}
+    assert resumed.runnable(jobs) == jobs[1:]
+    assert not resumed.is_complete()
+    resumed.close()
+
+def test_replanning_keeps_state_and_new_cycle_requeues(journal):
+    jobs = [_job('icon', 10000), _job('icon', 10001)]
+    journal.plan(jobs)
+    journal.mark(jobs[:1], DONE)
+    journal.mark(jobs[1:], MISSING)
+    journal.plan(jobs)
+    assert journal.counts() == {DONE: 1, MISSING: 1}
+    assert journal.is_complete()
+
+    journal.start_cycle()
+    assert journal.counts() == {PENDING: 2}
+    assert journal.runnable(jobs) == jobs
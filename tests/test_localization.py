@@ -0,0 +1,82 @@
+import copy
+import json
+
+import pytest
+
+import ba_localization
+from ba_http_cache import ValidatorCache
+from ba_localization import fetch_localized_students, locale_strings, locale_url, merge_locales
+from conftest import FIXTURES
+
+def _students():
+    with open(FIXTURES / 'schaledb_student.json', 'r', encoding='utf-8') as f:
+        en = json.load(f)
+    jp = copy.deepcopy(en)
+    jp['Name'] = 'アル'
+    jp['Skills'][0]['Name'] = 'ハードボイルドショット'
+    # Not a localized field: a lagging locale must not turn it into a per-locale map
+    jp['StarGrade'] = en['StarGrade'] + 1
+    return en, jp
+
+def test_only_localized_fields_become_locale_maps():
+    en, jp = _students()
+    merged, = merge_locales({'en': {en['Id']: en}, 'jp': {jp['Id']: jp}})
+    assert merged['Name'] == {'en': 'Aru', 'jp': 'アル'}
+    assert merged['Skills'][0]['Name'] == {'en': en['Skills'][0]['Name'], 'jp': 'ハードボイルドショット'}
+    assert merged['StarGrade'] == en['StarGrade']
+    assert merged['School'] == 'Gehenna'
+    assert merged['Locales'] == ['en', 'jp']
+
+    strings = locale_strings([merged], ['en', 'jp'])
+    assert strings['jp'] == {str(en['Id']): {'Name': 'アル', 'Skills.0.Name': 'ハードボイルドショット'}}
+    assert set(strings['en'][str(en['Id'])]) == {'Name', 'Skills.0.Name'}
+
+class FakeResponse:
+    def __init__(self, url, body, headers=None):
+        self.url = url
+        self.status_code = 200
+        self.body = body
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakeSession:
+    def __init__(self, bodies):
+        self.bodies = bodies
+
+    def get(self, url, **kwargs):
+        body, headers = self.bodies[url]
+        return FakeResponse(url, body, headers)
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ValidatorCache(tmp_path / 'validators.json')
+    monkeypatch.setattr(ba_localization, 'get_shared_cache', lambda: cache)
+    return cache
+
+def test_failed_locales_are_skipped_and_refetched(tmp_path, monkeypatch, cache):
+    en, jp = _students()
+    bodies = {
+        locale_url('en'): (json.dumps([en]).encode('utf-8'), {}),
+        # Truncated JSON and a short body fail in the worker instead of aborting the run
+        locale_url('jp'): (json.dumps([jp]).encode('utf-8')[:-20], {}),
+        locale_url('kr'): (b'[]', {'Content-Length': '100'}),
+    }
+    monkeypatch.setattr(ba_localization, 'get_session', lambda: FakeSession(bodies))
+    cache.entries[locale_url('jp')] = {'etag': '"old"', 'sha256': 'old'}
+
+    merged = fetch_localized_students(['en', 'jp', 'kr'], output_dir=tmp_path / 'localization')
+    assert [record['Locales'] for record in merged] == [['en']]
+    assert merged[0]['Name'] == 'Aru'
+    # Failed locales keep no validators, so the next run fetches them in full
+    assert locale_url('en') in cache.entries
+    assert locale_url('jp') not in cache.entries
+    assert locale_url('kr') not in cache.entries
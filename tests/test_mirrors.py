@@ -0,0 +1,66 @@
+import requests
+
+from ba_mirrors import MirrorSelector, fetch_json, source_of, timed_get
+
+GITHUB = 'https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/data/en/students.json'
+JSDELIVR = 'https://cdn.jsdelivr.net/gh/SchaleDB/SchaleDB@main/data/en/students.json'
+FORK = 'https://raw.githubusercontent.com/lonqie/SchaleDB/main/data/en/students.json'
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.data = data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}")
+
+    def json(self):
+        if self.data is None:
+            raise ValueError("not JSON")
+        return self.data
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        return self.responses[url]
+
+def test_sources_group_repositories_on_shared_hosts():
+    assert source_of(GITHUB) == 'raw.githubusercontent.com/SchaleDB/SchaleDB'
+    assert source_of(FORK) == 'raw.githubusercontent.com/lonqie/SchaleDB'
+    assert source_of('https://schaledb.com/data/en/students.json') == 'schaledb.com'
+
+def test_errors_outweigh_latency(tmp_path):
+    selector = MirrorSelector(path=tmp_path / 'mirrors.json')
+    selector.record(GITHUB, 0.05, ok=False)
+    selector.record(JSDELIVR, 0.4, ok=True)
+    # Unseen sources are tried first; ties keep the caller's order
+    assert selector.order([GITHUB, JSDELIVR, FORK]) == [FORK, JSDELIVR, GITHUB]
+    selector.save()
+    assert MirrorSelector(path=tmp_path / 'mirrors.json').stats == selector.stats
+
+def test_timed_get_counts_error_statuses_as_failures(tmp_path):
+    selector = MirrorSelector(path=tmp_path / 'mirrors.json')
+    session = FakeSession({GITHUB: FakeResponse(404), JSDELIVR: FakeResponse(200)})
+    timed_get(session, GITHUB, selector)
+    timed_get(session, JSDELIVR, selector)
+    assert selector.stats[source_of(GITHUB)]['errors'] == 1.0
+    assert selector.stats[source_of(JSDELIVR)]['errors'] == 0.0
+
+def test_fetch_json_falls_back_past_invalid_payloads(tmp_path):
+    selector = MirrorSelector(path=tmp_path / 'mirrors.json')
+    session = FakeSession({
+        GITHUB: FakeResponse(200),
+        JSDELIVR: FakeResponse(200, {'students': []}),
+        FORK: FakeResponse(200, [{'Id': 10000}]),
+    })
+    url, data = fetch_json(session, [GITHUB, JSDELIVR, FORK], validate=lambda data: isinstance(data, list),
+                           selector=selector)
+    assert (url, data) == (FORK, [{'Id': 10000}])
+    assert session.requested == [GITHUB, JSDELIVR, FORK]
+    # Unparsable and invalid payloads count against their mirrors
+    assert [selector.stats[source_of(url)]['errors'] for url in (GITHUB, JSDELIVR, FORK)] == [1.0, 1.0, 0.0]
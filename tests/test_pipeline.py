@@ -0,0 +1,73 @@
+import pytest
+
+from ba_pipeline import BLOCKED, DONE, FAILED, SKIPPED, Pipeline, Stage
+
+def _writer(path, ran, name):
+    def run():
+        ran.append(name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(name)
+    return run
+
+def _pipeline(tmp_path, ran, fail=()):
+    def stage(name, inputs=(), outputs=(), after=(), **kwargs):
+        run = _writer(outputs[0], ran, name) if outputs else (lambda: ran.append(name))
+        if name in fail:
+            def run():
+                raise RuntimeError(name)
+        return Stage(name, run, inputs=inputs, outputs=outputs, after=after, **kwargs)
+
+    return Pipeline([
+        # Listed out of order: the order follows from the files
+        stage('normalize', inputs=['raw.json'], outputs=['students.json']),
+        stage('fetch', outputs=['raw.json']),
+        stage('images', inputs=['students.json'], outputs=['manifest.json']),
+        stage('snapshots', inputs=['students.json'], outputs=['students.msgpack']),
+        stage('cdn', after=['images']),
+        stage('sync', inputs=['students.json'], optional=True),
+    ], state_path=tmp_path / 'state.json')
+
+def test_stages_run_after_their_dependencies(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ran = []
+    pipeline = _pipeline(tmp_path, ran)
+    assert pipeline.dependencies['normalize'] == {'fetch'}
+    assert pipeline.dependencies['cdn'] == {'images'}
+
+    names = pipeline.select()
+    assert 'sync' not in names
+    status = pipeline.run(names)
+    assert set(status.values()) == {DONE}
+    for before, after in [('fetch', 'normalize'), ('normalize', 'images'),
+                          ('normalize', 'snapshots'), ('images', 'cdn')]:
+        assert ran.index(before) < ran.index(after)
+
+def test_select_pulls_in_upstream_stages(tmp_path):
+    pipeline = _pipeline(tmp_path, [])
+    assert pipeline.select(['cdn']) == ['fetch', 'normalize', 'images', 'cdn']
+    assert pipeline.select(['cdn'], upstream=False) == ['cdn']
+    assert pipeline.select(['sync']) == ['fetch', 'normalize', 'sync']
+
+def test_unchanged_stages_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _pipeline(tmp_path, []).run(['fetch', 'normalize'])
+    ran = []
+    # Fetches always run; a stage whose input is unchanged is skipped
+    status = _pipeline(tmp_path, ran).run(['fetch', 'normalize'])
+    assert status == {'fetch': DONE, 'normalize': SKIPPED}
+    assert ran == ['fetch']
+
+def test_failure_blocks_dependents(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ran = []
+    pipeline = _pipeline(tmp_path, ran, fail=('normalize',))
+    status = pipeline.run(pipeline.select())
+    assert status['normalize'] == FAILED
+    assert status['images'] == status['snapshots'] == status['cdn'] == BLOCKED
+    assert ran == ['fetch']
+
+def test_cycles_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match='cycle'):
+        Pipeline([Stage('a', print, inputs=['b.json'], outputs=['a.json']),
+                  Stage('b', print, inputs=['a.json'], outputs=['b.json'])],
+                 state_path=tmp_path / 'state.json')
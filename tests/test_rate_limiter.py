@@ -0,0 +1,70 @@
+import pytest
+
+import ba_rate_limiter
+from ba_rate_limiter import HostRateLimiter, parse_retry_after
+
+URL = 'https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/data/en/students.json'
+OTHER = 'https://cdn.jsdelivr.net/gh/SchaleDB/SchaleDB@main/data/en/students.json'
+
+class FakeClock:
+    """time.monotonic/time.sleep for the limiter; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ba_rate_limiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(ba_rate_limiter.time, 'sleep', clock.sleep)
+    return clock
+
+def test_requests_within_the_burst_do_not_wait(clock):
+    limiter = HostRateLimiter(rate=4.0)
+    for _ in range(4):
+        limiter.acquire(URL)
+    assert clock.slept == []
+
+def test_throttled_host_waits_for_retry_after(clock):
+    limiter = HostRateLimiter(rate=4.0)
+    limiter.acquire(URL)
+    limiter.record(URL, 429, '2')
+    assert limiter.bucket(URL).rate == 2.0
+
+    limiter.acquire(URL)
+    assert sum(clock.slept) >= 2.0
+    # Other hosts keep their own bucket
+    clock.slept.clear()
+    limiter.acquire(OTHER)
+    assert clock.slept == []
+
+def test_throttled_host_without_retry_after_slows_down(clock):
+    limiter = HostRateLimiter(rate=4.0)
+    limiter.record(URL, 503)
+    start = clock.now
+    for _ in range(3):
+        limiter.acquire(URL)
+    # Halved to 2 requests per second with an emptied bucket
+    assert clock.now - start == pytest.approx(1.5)
+
+def test_successes_raise_the_rate_again(clock):
+    limiter = HostRateLimiter(rate=4.0, increase=0.5)
+    limiter.record(URL, 429)
+    limiter.record(URL, 200)
+    limiter.record(URL, 404)
+    assert limiter.bucket(URL).rate == 3.0
+
+def test_parse_retry_after():
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after('-3') == 0.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,61 @@
+import json
+
+from ba_field_mapping import SCHALEDB_SKILL, SCHALEDB_TO_SUPABASE, Computed, Each, Field, Mapping
+from ba_record_state import PreviousOutput, RecordState
+
+STUDENT = {'Id': 10000, 'Name': 'Aru', 'Skills': [{'SkillType': 'ex', 'Name': 'Hard-Boiled Shot', 'Cost': [3]}]}
+
+def _state(tmp_path, mapping):
+    return RecordState('students', signature=mapping.signature, directory=tmp_path)
+
+def _run(tmp_path, mapping) -> bool:
+    """One run over STUDENT; True when it counts as changed"""
+    state = _state(tmp_path, mapping)
+    changed = state.check(STUDENT['Id'], STUDENT)
+    state.save()
+    return changed
+
+def test_unchanged_mapping_keeps_state(tmp_path):
+    assert _run(tmp_path, SCHALEDB_TO_SUPABASE)
+    assert not _run(tmp_path, SCHALEDB_TO_SUPABASE)
+
+def test_editing_a_nested_field_invalidates_state(tmp_path):
+    assert _run(tmp_path, SCHALEDB_TO_SUPABASE)
+    # Only the nested skill mapping differs; the top-level generated code is identical
+    skill = Mapping({**SCHALEDB_SKILL.fields, 'cost': Field('Cost', omit_empty=True, index=0)}, name='schaledb_skill')
+    edited = SCHALEDB_TO_SUPABASE.extend(skills=Each('Skills', skill))
+    assert edited.extract.__doc__ == SCHALEDB_TO_SUPABASE.extract.__doc__
+    assert edited.signature != SCHALEDB_TO_SUPABASE.signature
+    assert _run(tmp_path, edited)
+
+def test_editing_computed_code_changes_signature():
+    first = Mapping({'label': Computed(lambda record, key: record.get('Name'))})
+    second = Mapping({'label': Computed(lambda record, key: record.get('DevName'))})
+    assert first.signature != second.signature
+
+def _write_output(path, ids):
+    path.write_text(json.dumps([{'id': record_id, 'name': f"student {record_id}"} for record_id in ids]))
+
+def test_previous_output_reuses_records_in_order(tmp_path):
+    path = tmp_path / 'output.json'
+    _write_output(path, range(100))
+    previous = PreviousOutput(path, lookahead=4)
+    assert [previous.take(record_id)['id'] for record_id in range(100)] == list(range(100))
+    assert not previous.buffer
+
+def test_previous_output_buffer_stays_bounded(tmp_path):
+    path = tmp_path / 'output.json'
+    _write_output(path, range(100))
+    previous = PreviousOutput(path, lookahead=4)
+    # Unknown ids read at most one window each instead of the whole file
+    for record_id in range(1000, 1010):
+        assert previous.take(record_id) is None
+        assert len(previous.buffer) <= 4
+    # Records behind the window are simply mapped again
+    assert previous.take(0) is None
+    assert set(previous.buffer) == {'40', '41', '42', '43'}
+    assert previous.take(42)['id'] == 42
+    assert previous.take(44)['id'] == 44
+
+def test_previous_output_without_a_file(tmp_path):
+    assert PreviousOutput(tmp_path / 'missing.json').take(1) is None
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from ba_field_mapping import SCHALEDB_TO_SUPABASE, TORIKUSHII_CHARACTER
+from ba_schema import CHARACTER, SUPABASE_CHARACTER, load_records
+from ba_sync_complete import SYNC_CHARACTER
+from conftest import FIXTURES, REPO_ROOT
+
+@pytest.fixture
+def student():
+    with open(FIXTURES / 'schaledb_student.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@pytest.mark.parametrize('is_limited', [0, 1, 2, 3])
+def test_mapped_schaledb_student_is_valid(student, is_limited):
+    student['IsLimited'] = is_limited
+    assert SUPABASE_CHARACTER(SCHALEDB_TO_SUPABASE(student)) == []
+
+def test_missing_is_limited_uses_the_mapper_default(student):
+    del student['IsLimited']
+    assert SUPABASE_CHARACTER(SCHALEDB_TO_SUPABASE(student)) == []
+
+def test_out_of_range_is_limited_is_rejected(student):
+    student['IsLimited'] = 4
+    assert SUPABASE_CHARACTER(SCHALEDB_TO_SUPABASE(student)) == [('is_limited', 'above 3')]
+
+def test_mapped_skills_match_the_skill_schema(student):
+    mapped = SCHALEDB_TO_SUPABASE(student)
+    assert [skill['name'] for skill in mapped['skills']] == ["Hard-Boiled Shot", "Outlaw's Elegance", "Normal Attack"]
+    del student['Skills'][0]['Name']
+    assert SUPABASE_CHARACTER(SCHALEDB_TO_SUPABASE(student)) == [('skills[].name', 'missing')]
+
+@pytest.fixture
+def torikushii():
+    with open(FIXTURES / 'torikushii_character.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@pytest.mark.parametrize('mapping', [TORIKUSHII_CHARACTER, SYNC_CHARACTER])
+def test_mapped_torikushii_character_is_valid(torikushii, mapping):
+    mapped = mapping(torikushii, '10000')
+    assert mapped['terrain'] == {'Street': 'S', 'Outdoor': 'A', 'Indoor': 'B'}
+    assert CHARACTER(mapped) == []
+
+def test_mapped_torikushii_character_breaking_the_schema(torikushii):
+    torikushii['Terrain']['Street'] = ['S']
+    torikushii['Weapon']['Name'] = 7
+    assert CHARACTER(TORIKUSHII_CHARACTER(torikushii, '10000')) == [
+        ('terrain.Street', 'expected str or int'),
+        ('weapon.Name', 'expected str'),
+    ]
+
+def test_schaledb_shaped_character_is_valid(student):
+    # torikushii records share SchaleDB's PascalCase keys, keyed by id
+    record = {key: value for key, value in student.items() if key != 'Id'}
+    record['IsLimited'] = 1
+    assert CHARACTER(TORIKUSHII_CHARACTER(record, '10000')) == []
+
+def test_committed_characters_are_valid():
+    report = CHARACTER.validate_all(load_records(REPO_ROOT / 'data' / 'characters' / 'characters.json'))
+    assert report.ok, report.summary()
@@ -0,0 +1,55 @@
+from ba_download_engine import DownloadJob
+from ba_image_downloader import BlueArchiveImageDownloader
+from ba_job_journal import DONE
+from ba_sharding import merge_partial_manifests, select_shard, shard_of, write_partial_manifest
+
+BASE = 'https://raw.githubusercontent.com/SchaleDB/SchaleDB/main/images'
+
+def _jobs():
+    jobs = []
+    for char_id in range(10000, 10060):
+        for kind in ('icon', 'portrait'):
+            url = f"{BASE}/student/{kind}/{char_id}.webp"
+            jobs.append(DownloadJob(url, f"images/student/{kind}/{char_id}.webp"))
+            # A second layout of the same upstream image
+            jobs.append(DownloadJob(url, f"images/characters/{kind}s/{char_id}.webp"))
+    return jobs
+
+def test_shards_are_disjoint_and_cover_every_job():
+    jobs = _jobs()
+    total = 4
+    shards = [select_shard(jobs, (index, total)) for index in range(1, total + 1)]
+    seen = [id(job) for shard in shards for job in shard]
+    assert len(seen) == len(set(seen)) == len(jobs)
+    assert select_shard(jobs, None) == jobs
+    # Every layout of one image is downloaded by the same shard
+    for job in jobs:
+        assert job in shards[shard_of(job.key, total) - 1]
+
+def test_merge_combines_partial_manifests(tmp_path):
+    write_partial_manifest((1, 2), ['student/icon/10000.webp', 'school/Gehenna.webp'], tmp_path,
+                           assets={'student/icon/10000.webp': {'sha256': 'a'}})
+    write_partial_manifest((2, 2), ['student/icon/10001.webp'], tmp_path,
+                           assets={'student/icon/10001.webp': {'sha256': 'b'}})
+    files, assets, shards, total = merge_partial_manifests(tmp_path)
+    assert files == {'student/icon': {'10000.webp', '10001.webp'}, 'school': {'Gehenna.webp'}}
+    assert set(assets) == {'student/icon/10000.webp', 'student/icon/10001.webp'}
+    assert (shards, total) == ([1, 2], 2)
+
+def test_shards_keep_separate_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = BlueArchiveImageDownloader(shard=(1, 2))
+    jobs = select_shard(_jobs(), (1, 2))
+    first.journal.plan(jobs)
+    first.journal.mark(jobs, DONE)
+
+    # The second shard's empty journal starts a new cycle without touching the first's rows
+    second = BlueArchiveImageDownloader(shard=(2, 2), new_cycle=True)
+    assert first.journal.is_complete()
+    assert second.journal.counts() == {}
+    assert first.journal.path != second.journal.path
+    assert first.engine.cache.path != second.engine.cache.path
+    assert first.engine.store.index_path != second.engine.store.index_path
+    assert (tmp_path / first.index.path).parent == tmp_path / '.cache' / 'shard-1-of-2'
+    first.journal.close()
+    second.journal.close()
@@ -0,0 +1,46 @@
+import json
+import os
+
+import pytest
+
+from ba_snapshot import fresh_snapshot, load_dataset, load_snapshot, write_snapshot
+from conftest import FIXTURES
+
+pytest.importorskip('msgpack')
+
+def _write(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+def test_msgpack_round_trip(tmp_path):
+    with open(FIXTURES / 'students.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    source = _write(tmp_path / 'students.json', data)
+    path = write_snapshot(source)
+    assert path.suffix == '.msgpack'
+    assert fresh_snapshot(source) == path
+    assert load_snapshot(path) == data
+    assert load_dataset(source) == data
+
+def test_object_round_trip(tmp_path):
+    data = {'10000': {'name': 'Aru'}, '10001': {'name': 'Eimi'}}
+    source = _write(tmp_path / 'characters.json', data)
+    write_snapshot(source, fmt='msgpack')
+    assert load_dataset(source) == data
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    data = {'total_characters': 3, 'by_school': {'Gehenna': 2, 'Millennium': 1}, 'by_rarity': {'3': 2, '2': 1}}
+    source = _write(tmp_path / 'character_statistics.json', data)
+    path = write_snapshot(source)
+    assert path.name.endswith('.snapshot.parquet')
+    assert load_snapshot(path) == data
+
+def test_stale_snapshot_falls_back_to_json(tmp_path):
+    source = _write(tmp_path / 'students.json', [{'id': 10000}])
+    write_snapshot(source)
+    _write(source, [{'id': 10000}, {'id': 10001}])
+    os.utime(source, ns=(0, 0))
+    assert fresh_snapshot(source) is None
+    assert load_dataset(source) == [{'id': 10000}, {'id': 10001}]